@@ -1,5 +1,21 @@
 from django.contrib import admin
-from .models import UserProfile  # ✅ import the model properly
 
-admin.site.register(UserProfile)  # ✅ register the correct model
+from core.paginator import EstimatedCountPaginator
+from .models import UserProfile
 
+
+@admin.register(UserProfile)
+class UserProfileAdmin(admin.ModelAdmin):
+    list_display = ['username', 'role', 'phone_number', 'created_at']
+    # __str__ and the username column read the user; join it into the page query.
+    list_select_related = ['user']
+    list_filter = ['role']
+    search_fields = ['user__username', 'user__first_name', 'user__last_name']
+    autocomplete_fields = ['user']
+    ordering = ['id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @admin.display(ordering='user__username')
+    def username(self, obj):
+        return obj.user.username
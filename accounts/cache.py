@@ -0,0 +1,120 @@
+# Per-user fragment cache for the dashboard.
+# Each user has one version number per fragment. Fragments are stored under a
+# key that includes the current version, so invalidating a fragment is a
+# single incr() on its version key: old entries are simply never read again
+# and age out of the cache on their own. Versions are bumped only once the
+# change commits; bumping earlier would let a render that still sees the old
+# rows store them under the new version.
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.connection import ConnectionProxy
+
+# Like django.core.cache.cache, but for the 'dashboard' alias.
+cache = ConnectionProxy(caches, 'dashboard')
+
+PROFILE = 'profile'
+LEAVE = 'leave'
+
+STATS_KEY = 'dashboard:stats:{}'
+
+
+def _version_key(user_id, fragment):
+    return f'dashboard:version:{fragment}:{user_id}'
+
+
+def _count(name):
+    key = STATS_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+async def _acount(name):
+    key = STATS_KEY.format(name)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 0, timeout=None)
+        await cache.aincr(key)
+
+
+def fragment_version(user_id, fragment):
+    key = _version_key(user_id, fragment)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 1 so a version key that was evicted
+        # can never resurrect a fragment stored under an older version.
+        version = int(time.time() * 1000)
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+async def afragment_version(user_id, fragment):
+    key = _version_key(user_id, fragment)
+    version = await cache.aget(key)
+    if version is None:
+        version = int(time.time() * 1000)
+        if not await cache.aadd(key, version, timeout=None):
+            version = await cache.aget(key, version)
+    return version
+
+
+def invalidate(user_ids, *fragments):
+    """
+    Bump the version of ``fragments`` for every user in ``user_ids`` once
+    the current transaction commits (at once outside one).
+    """
+    transaction.on_commit(partial(_bump_versions, set(user_ids), fragments), robust=True)
+
+
+def _bump_versions(user_ids, fragments):
+    for user_id in user_ids:
+        for fragment in fragments:
+            key = _version_key(user_id, fragment)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Never rendered for this user, nothing to invalidate.
+                pass
+
+
+def get_fragment(user_id, fragment, render):
+    """Return the cached HTML for a fragment, calling ``render()`` on a miss."""
+    key = f'dashboard:{fragment}:{user_id}:{fragment_version(user_id, fragment)}'
+    html = cache.get(key)
+    if html is not None:
+        _count('hits')
+        return html
+    _count('misses')
+    html = render()
+    cache.set(key, html, settings.DASHBOARD_CACHE_TIMEOUT)
+    return html
+
+
+async def aget_fragment(user_id, fragment, arender):
+    """Async version of get_fragment(); ``arender`` is a coroutine function."""
+    key = f'dashboard:{fragment}:{user_id}:{await afragment_version(user_id, fragment)}'
+    html = await cache.aget(key)
+    if html is not None:
+        await _acount('hits')
+        return html
+    await _acount('misses')
+    html = await arender()
+    await cache.aset(key, html, settings.DASHBOARD_CACHE_TIMEOUT)
+    return html
+
+
+def stats():
+    """Hit/miss counters shared by every process using the same cache backend."""
+    counters = cache.get_many([STATS_KEY.format('hits'), STATS_KEY.format('misses')])
+    hits = counters.get(STATS_KEY.format('hits'), 0)
+    misses = counters.get(STATS_KEY.format('misses'), 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
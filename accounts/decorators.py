@@ -0,0 +1,29 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+
+
+def employer_required(view_func):
+    """
+    UR3: restrict a view to employers. Anonymous users are sent to the login
+    page; authenticated non-employers get a 403. Relies on RoleMiddleware.
+    Works for both sync and async views.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            role = await request.aees_role()
+            if not role or not role.is_employer:
+                raise PermissionDenied
+            return await view_func(request, *args, **kwargs)
+    else:
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            role = request.ees_role
+            if not role or not role.is_employer:
+                raise PermissionDenied
+            return view_func(request, *args, **kwargs)
+
+    return login_required(_wrapped_view)
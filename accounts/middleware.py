@@ -0,0 +1,52 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .roles import aresolve_role, resolve_role
+
+
+class RoleMiddleware:
+    """
+    Expose the user's resolved role as ``request.ees_role``, and as the
+    coroutine ``request.aees_role()`` for async views.
+
+    The lookup is lazy, so requests that never check the role pay nothing,
+    and runs at most once per request. Anonymous users get ``None``.
+    Must come after AuthenticationMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        self._attach(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self._attach(request)
+        return await self.get_response(request)
+
+    @staticmethod
+    def _attach(request):
+        request.ees_role = SimpleLazyObject(lambda: _resolve(request))
+
+        async def aees_role():
+            if not hasattr(request, '_aees_role'):
+                user = await request.auser()
+                request._aees_role = await aresolve_role(user) if user.is_authenticated else None
+            return request._aees_role
+
+        request.aees_role = aees_role
+
+
+def _resolve(request):
+    if not request.user.is_authenticated:
+        return None
+    return resolve_role(request.user)
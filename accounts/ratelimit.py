@@ -0,0 +1,95 @@
+# Token-bucket rate limiting for login attempts.
+# Buckets live in the process-local 'ratelimit' cache so a check is a memory
+# lookup: floods are turned away before any password hashing happens, which
+# is what actually saturates the workers. Each worker keeps its own buckets,
+# so the effective limit is per worker process: with N gunicorn workers a
+# client gets up to N times LOGIN_RATE_LIMIT before every worker refuses it.
+# Clients are told apart by client_ip(), which needs TRUSTED_PROXY_COUNT set
+# behind a reverse proxy; otherwise everyone shares the proxy's bucket.
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    def __init__(self, name, capacity, per_minute):
+        self.name = name
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+
+    def _cache_key(self, key):
+        # Keys come from the request (usernames, forwarded addresses), so
+        # hash them into something every cache backend accepts.
+        return f'rl:{self.name}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+    def consume(self, key):
+        """Take one token for ``key``; return False if the bucket is empty."""
+        cache = caches['ratelimit']
+        cache_key = self._cache_key(key)
+        now = time.monotonic()
+        with _lock:
+            tokens, updated = cache.get(cache_key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Keep the entry until the bucket would be full again.
+            cache.set(cache_key, (tokens, now), timeout=int((self.capacity - tokens) / self.rate) + 1)
+        return allowed
+
+    def refund(self, key):
+        """Give back a token taken by consume(), up to the capacity."""
+        cache = caches['ratelimit']
+        cache_key = self._cache_key(key)
+        with _lock:
+            tokens, updated = cache.get(cache_key, (self.capacity, time.monotonic()))
+            tokens = min(self.capacity, tokens + 1)
+            cache.set(cache_key, (tokens, updated), timeout=int((self.capacity - tokens) / self.rate) + 1)
+
+
+def login_buckets():
+    limits = settings.LOGIN_RATE_LIMIT
+    return (
+        TokenBucket('login-ip', **limits['ip']),
+        TokenBucket('login-username', **limits['username']),
+    )
+
+
+def client_ip(request):
+    """
+    The address of the client behind ``request``. With TRUSTED_PROXY_COUNT
+    reverse proxies in front of the app, each appending the address it saw
+    to X-Forwarded-For, that is the entry the outermost proxy added; entries
+    further left came from the client and may be forged.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR', 'unknown')
+    hops = settings.TRUSTED_PROXY_COUNT
+    if not hops:
+        return remote_addr
+    forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+    return forwarded[-hops] if len(forwarded) >= hops else remote_addr
+
+
+def _username_key(username):
+    return (username or '').strip().lower()[:150]
+
+
+def allow_login_attempt(request, username):
+    """Consume a token from the IP and the username buckets."""
+    ip_bucket, username_bucket = login_buckets()
+    ip_ok = ip_bucket.consume(client_ip(request))
+    username_ok = username_bucket.consume(_username_key(username))
+    return ip_ok and username_ok
+
+
+def login_succeeded(username):
+    """
+    Refund the username token of a successful login: that bucket exists to
+    slow password guessing, not users who sign in often.
+    """
+    login_buckets()[1].refund(_username_key(username))
@@ -0,0 +1,50 @@
+# Request-scoped role resolution.
+# resolve_role() reads the user's Employee row (and UserProfile.role) with one
+# indexed, joined query; RoleMiddleware runs it at most once per request. It
+# is not cached across requests, so a demotion takes effect on every worker
+# with the next request.
+from dataclasses import dataclass
+
+from django.contrib.auth.models import User
+
+EMPLOYER = 'employer'
+EMPLOYEE = 'employee'
+
+
+@dataclass(frozen=True)
+class ResolvedRole:
+    role: str
+    employee_id: int = None
+    department: str = None
+    profile_id: int = None
+
+    @property
+    def is_employer(self):
+        return self.role == EMPLOYER
+
+
+ROLE_FIELDS = ('employee__id', 'employee__is_employer', 'employee__department', 'profile__id', 'profile__role')
+
+
+def _build(row):
+    row = row or {}
+    # Employee.is_employer grants employer rights. UserProfile.role only
+    # mirrors it, and a profile that disagrees withdraws them rather than
+    # granting any: a mismatch fails closed.
+    is_employer = bool(row.get('employee__is_employer')) and row.get('profile__role') in (None, EMPLOYER)
+    return ResolvedRole(
+        role=EMPLOYER if is_employer else EMPLOYEE,
+        employee_id=row.get('employee__id'),
+        department=row.get('employee__department'),
+        profile_id=row.get('profile__id'),
+    )
+
+
+def resolve_role(user):
+    """Return the ResolvedRole for an authenticated ``user``."""
+    return _build(User.objects.filter(pk=user.pk).values(*ROLE_FIELDS).first())
+
+
+async def aresolve_role(user):
+    """Async version of resolve_role()."""
+    return _build(await User.objects.filter(pk=user.pk).values(*ROLE_FIELDS).afirst())
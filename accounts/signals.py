@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from employee.models import Employee, LeaveBalance, LeaveRequest
+from employee.signals import leave_balances_recomputed, leave_requests_decided
+
+from . import cache as dashboard_cache
+from .models import UserProfile
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_profile(sender, instance, **kwargs):
+    dashboard_cache.invalidate([instance.pk], dashboard_cache.PROFILE)
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+@receiver([post_save, post_delete], sender=Employee)
+def invalidate_profile(sender, instance, **kwargs):
+    dashboard_cache.invalidate([instance.user_id], dashboard_cache.PROFILE)
+
+
+# The leave fragment also shows the employee's balance.
+@receiver([post_save, post_delete], sender=LeaveBalance)
+@receiver([post_save, post_delete], sender=LeaveRequest)
+def invalidate_leave(sender, instance, **kwargs):
+    user_ids = Employee.objects.filter(pk=instance.employee_id).values_list('user_id', flat=True)
+    dashboard_cache.invalidate(user_ids, dashboard_cache.LEAVE)
+
+
+@receiver(leave_requests_decided)
+def invalidate_decided_leave(sender, user_ids, **kwargs):
+    dashboard_cache.invalidate(user_ids, dashboard_cache.LEAVE)
+
+
+@receiver(leave_balances_recomputed)
+def invalidate_recomputed_balances(sender, user_ids, **kwargs):
+    dashboard_cache.invalidate(user_ids, dashboard_cache.LEAVE)
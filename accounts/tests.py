@@ -1,3 +1,255 @@
-from django.test import TestCase
+import warnings
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.cache.backends.base import CacheKeyWarning
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.metrics import registry
+from core.testing import QueryBudgetMixin
+from employee.models import Employee, LeaveRequest
+from . import cache as dashboard_cache
+from .middleware import RoleMiddleware
+from .ratelimit import login_buckets
+from .models import UserProfile
+
+
+class DashboardCacheTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.user = User.objects.create_user(username='alice', first_name='Alice')
+        self.employee = Employee.objects.create(user=self.user, department='Finance')
+        self.client.force_login(self.user)
+
+    def test_second_hit_is_served_from_cache(self):
+        self.client.get(reverse('dashboard'))
+        with self.assertNumQueries(1):  # user only; the session is cached
+            response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'Finance')
+        self.assertEqual(dashboard_cache.stats()['hits'], 2)
+        self.assertEqual(dashboard_cache.stats()['misses'], 2)
+
+    def test_fragments_survive_more_keys_than_the_backend_default(self):
+        # Django culls past 300 entries unless MAX_ENTRIES says otherwise;
+        # 400 users need 1600 keys here.
+        users = range(10_000, 10_400)
+        for user_id in users:
+            for fragment in (dashboard_cache.PROFILE, dashboard_cache.LEAVE):
+                dashboard_cache.get_fragment(user_id, fragment, lambda: 'html')
+        for user_id in users:
+            for fragment in (dashboard_cache.PROFILE, dashboard_cache.LEAVE):
+                dashboard_cache.get_fragment(user_id, fragment, lambda: self.fail('re-rendered'))
+        self.assertEqual(dashboard_cache.stats(), {'hits': 800, 'misses': 800, 'hit_rate': 0.5})
+
+    def test_cold_dashboard_within_query_budget(self):
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(employee=self.employee, start_date=date(2025, 1, day), end_date=date(2025, 1, day), reason='x')
+            for day in range(1, 20)
+        ])
+        self.assertWithinQueryBudget(reverse('dashboard'))
+
+    def test_middleware_records_view_metrics(self):
+        registry.reset()
+        self.client.get(reverse('dashboard'))
+        entry = registry.summary()['dashboard']
+        self.assertEqual(entry['requests'], 1)
+        self.assertEqual(entry['queries']['p50'], 5)
+        self.assertGreater(entry['render_ms']['p50'], 0)
+        self.assertEqual(entry['over_budget'], 0)
+
+    def test_profile_changes_invalidate_profile_fragment(self):
+        self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.department = 'Sales'
+            self.employee.save()
+            UserProfile.objects.create(user=self.user, phone_number='0700000000')
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'Sales')
+        self.assertContains(response, '0700000000')
+        self.assertEqual(dashboard_cache.stats()['hits'], 1)
+
+    def test_leave_changes_invalidate_leave_fragment(self):
+        self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            leave = LeaveRequest.objects.create(
+                employee=self.employee, start_date=date(2025, 6, 2), end_date=date(2025, 6, 3), reason='Wedding',
+            )
+        self.assertContains(self.client.get(reverse('dashboard')), 'Pending')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaveRequest.objects.filter(pk=leave.pk).decide('Rejected')
+            # Until the decision commits, a render may only see the old rows,
+            # so it must not be able to cache them under a new version.
+            self.assertNotContains(self.client.get(reverse('dashboard')), 'Rejected')
+        self.assertContains(self.client.get(reverse('dashboard')), 'Rejected')
+
+
+class RoleMiddlewareTests(TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.user = User.objects.create_user(username='bob')
+        self.employee = Employee.objects.create(user=self.user, department='Sales')
+
+    def resolve(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        RoleMiddleware(lambda request: None)(request)
+        return request.ees_role
+
+    def test_role_resolved_once_per_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        RoleMiddleware(lambda request: None)(request)
+        with self.assertNumQueries(1):
+            self.assertEqual(request.ees_role.role, 'employee')
+            self.assertEqual(request.ees_role.department, 'Sales')
+            self.assertFalse(request.ees_role.is_employer)
+
+    def test_employee_record_grants_employer(self):
+        self.employee.is_employer = True
+        self.employee.save()
+        self.assertTrue(self.resolve().is_employer)
+        UserProfile.objects.create(user=self.user, role='employer')
+        self.assertTrue(self.resolve().is_employer)
+
+    def test_mismatched_roles_fail_closed(self):
+        # The profile alone never grants employer rights...
+        UserProfile.objects.create(user=self.user, role='employer')
+        self.assertFalse(self.resolve().is_employer)
+        # ...and a profile that disagrees with the employee record withdraws them.
+        self.employee.is_employer = True
+        self.employee.save()
+        UserProfile.objects.filter(user=self.user).update(role='employee')
+        self.assertFalse(self.resolve().is_employer)
+
+    def test_demotion_applies_to_the_next_request(self):
+        self.employee.is_employer = True
+        self.employee.save()
+        self.assertTrue(self.resolve().is_employer)
+        # A bulk update sends no signals, so nothing could invalidate a cache.
+        Employee.objects.filter(pk=self.employee.pk).update(is_employer=False)
+        self.assertFalse(self.resolve().is_employer)
+
+    def test_employer_views_are_forbidden_to_employees(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('leave_queue')).status_code, 403)
+        self.employee.is_employer = True
+        self.employee.save()
+        self.assertEqual(self.client.get(reverse('leave_queue')).status_code, 200)
+
+
+@override_settings(LOGIN_RATE_LIMIT={
+    'ip': {'capacity': 3, 'per_minute': 1},
+    'username': {'capacity': 2, 'per_minute': 1},
+})
+class LoginTests(TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        caches['ratelimit'].clear()
+        self.user = User.objects.create_user(username='carol', password='Str0ng-passphrase!')
+
+    def test_successful_login_hashes_password_once(self):
+        with mock.patch.object(PBKDF2PasswordHasher, 'encode', autospec=True,
+                               side_effect=PBKDF2PasswordHasher.encode) as encode:
+            response = self.client.post(reverse('login'), {'username': 'carol', 'password': 'Str0ng-passphrase!'})
+        self.assertRedirects(response, reverse('dashboard'))
+        self.assertEqual(encode.call_count, 1)
+
+    def test_flood_is_rejected_before_hashing(self):
+        for _ in range(2):
+            self.client.post(reverse('login'), {'username': 'carol', 'password': 'wrong'})
+        with mock.patch.object(PBKDF2PasswordHasher, 'encode') as encode:
+            response = self.client.post(reverse('login'), {'username': 'carol', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 429)
+        encode.assert_not_called()
+
+    def test_ip_bucket_covers_many_usernames(self):
+        for name in ('a', 'b', 'c'):
+            self.client.post(reverse('login'), {'username': name, 'password': 'wrong'})
+        response = self.client.post(reverse('login'), {'username': 'd', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(LOGIN_RATE_LIMIT={
+        'ip': {'capacity': 100, 'per_minute': 1},
+        'username': {'capacity': 2, 'per_minute': 1},
+    })
+    def test_successful_logins_do_not_use_up_the_username_bucket(self):
+        for _ in range(4):
+            response = self.client.post(reverse('login'), {'username': 'carol', 'password': 'Str0ng-passphrase!'})
+            self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+            self.client.logout()
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_clients_behind_the_proxy_get_their_own_ip_bucket(self):
+        def attempt(forwarded_for):
+            return self.client.post(reverse('login'), {'username': forwarded_for, 'password': 'wrong'},
+                                    REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=forwarded_for).status_code
+
+        # Forged entries left of the one the proxy appended do not help.
+        self.assertEqual([attempt(f'1.1.1.{i}, 203.0.113.5') for i in range(4)], [200, 200, 200, 429])
+        self.assertEqual(attempt('203.0.113.6'), 200)
+
+    def test_lockout_survives_a_spray_of_other_keys(self):
+        for _ in range(3):
+            self.client.post(reverse('login'), {'username': 'carol', 'password': 'wrong'}, REMOTE_ADDR='10.0.0.1')
+        _, username_bucket = login_buckets()
+        for number in range(1000):  # over LocMemCache's default MAX_ENTRIES of 300
+            username_bucket.consume(f'sprayed-{number}')
+        response = self.client.post(reverse('login'), {'username': 'carol', 'password': 'wrong'}, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+
+    def test_usernames_make_valid_cache_keys(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            response = self.client.post(reverse('login'), {'username': 'jo smith\u00e9' * 30, 'password': 'wrong'})
+        self.assertEqual(response.status_code, 200)
+
+
+class SessionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='erin')
+
+    def session_queries(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse('dashboard'))
+        return [q['sql'] for q in captured.captured_queries if 'django_session' in q['sql']]
+
+    def test_cached_db_sessions_skip_the_session_query(self):
+        self.assertEqual(self.session_queries(), [])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_db_sessions_query_every_request(self):
+        self.assertEqual(len(self.session_queries()), 1)
+
+    def test_clear_expired_sessions_deletes_in_batches(self):
+        past = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create([Session(session_key=f'old{i}', session_data='', expire_date=past) for i in range(5)])
+        Session.objects.create(session_key='live', session_data='', expire_date=timezone.now() + timedelta(days=1))
+        out = StringIO()
+        with CaptureQueriesContext(connection) as captured:
+            call_command('clear_expired_sessions', batch_size=2, stdout=out)
+        deletes = [q for q in captured.captured_queries if q['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 3)
+        self.assertIn('Deleted 5 expired sessions.', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+
+
+class RegistrationTests(TestCase):
+    def test_registration_creates_employee_record(self):
+        response = self.client.post(reverse('register'), {
+            'username': 'dave', 'first_name': 'Dave', 'last_name': 'Doe', 'email': 'dave@example.com',
+            'password1': 'Str0ng-passphrase!', 'password2': 'Str0ng-passphrase!',
+        })
+        self.assertRedirects(response, reverse('login'))
+        self.assertEqual(Employee.objects.get(user__username='dave').department, 'General')
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
@@ -7,6 +8,6 @@ urlpatterns = [
     path('register/', views.RegisterView.as_view(), name='register'),
     path('login/', views.custom_login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
-    path('', views.dashboard_view, name='dashboard'),
+    path('', views.adashboard_view if settings.ASYNC_VIEWS else views.dashboard_view, name='dashboard'),
     path('home/', views.home_view, name='home'),
 ]
\ No newline at end of file
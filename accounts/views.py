@@ -1,14 +1,23 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth import login, authenticate, logout
+from django.template.loader import render_to_string
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.cache import never_cache
 from django.views.decorators.debug import sensitive_post_parameters
 from django.utils.decorators import method_decorator
 from django.views.generic import CreateView, TemplateView
 from django.urls import reverse_lazy
+from core.metrics import query_budget
+from core.shortcuts import arender
+from employee import balances
+from employee.models import Employee, LeaveRequest
+from . import cache as dashboard_cache
 from .forms import CustomUserCreationForm, CustomAuthenticationForm
+from .models import UserProfile
+from .ratelimit import allow_login_attempt, login_succeeded
 
 @method_decorator([sensitive_post_parameters(), csrf_protect, never_cache], name='dispatch')
 class RegisterView(CreateView):
@@ -16,8 +25,11 @@ class RegisterView(CreateView):
     template_name = 'register.html'
     success_url = reverse_lazy('login')
 
+    @transaction.atomic
     def form_valid(self, form):
         response = super().form_valid(form)
+        # UR4: every self-registered user is an employee with a profile.
+        Employee.objects.create(user=self.object)
         username = form.cleaned_data.get('username')
         messages.success(self.request, f'Account created for {username}! You can now log in.')
         return response
@@ -34,15 +46,19 @@ def custom_login_view(request):
         return redirect('dashboard')
     
     if request.method == 'POST':
+        # Refuse floods before the form runs the (expensive) password hash.
+        if not allow_login_attempt(request, request.POST.get('username')):
+            messages.error(request, 'Too many login attempts. Please wait a minute and try again.')
+            return render(request, 'login.html', {'form': CustomAuthenticationForm()}, status=429)
         form = CustomAuthenticationForm(request, data=request.POST)
+        # is_valid() authenticates the user, so reuse that result instead of
+        # hashing the password a second time.
         if form.is_valid():
-            username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            user = authenticate(username=username, password=password)
-            if user is not None:
-                login(request, user)
-                messages.success(request, f'Welcome back, {username}!')
-                return redirect('dashboard')
+            user = form.get_user()
+            login_succeeded(request.POST.get('username'))
+            login(request, user)
+            messages.success(request, f'Welcome back, {user.get_username()}!')
+            return redirect('dashboard')
         else:
             messages.error(request, 'Invalid username or password.')
     else:
@@ -50,9 +66,61 @@ def custom_login_view(request):
     
     return render(request, 'login.html', {'form': form})
 
+DASHBOARD_LEAVE_LIMIT = 10
+
+
+@query_budget(5)
 @login_required
 def dashboard_view(request):
-    return render(request, 'dashboard.html')
+    # ESS1/ESS3: the profile and leave list are cached per user and only
+    # re-rendered after one of their source rows changes (see accounts.signals).
+    user = request.user
+
+    def render_profile():
+        return render_to_string('dashboard_profile.html', {
+            'user': user,
+            'employee': Employee.objects.filter(user=user).first(),
+            'profile': UserProfile.objects.filter(user=user).first(),
+        })
+
+    def render_leave():
+        leave_requests = LeaveRequest.objects.filter(employee__user=user).order_by('-created_at', '-id')
+        return render_to_string('dashboard_leave.html', {
+            'leave_requests': leave_requests[:DASHBOARD_LEAVE_LIMIT],
+            'balance': balances.current(user),
+        })
+
+    return render(request, 'dashboard.html', {
+        'profile_html': dashboard_cache.get_fragment(user.pk, dashboard_cache.PROFILE, render_profile),
+        'leave_html': dashboard_cache.get_fragment(user.pk, dashboard_cache.LEAVE, render_leave),
+    })
+
+
+@query_budget(5)
+@login_required
+async def adashboard_view(request):
+    # Async twin of dashboard_view for ASGI deployments (settings.ASYNC_VIEWS).
+    # Fragment data is fetched with the async ORM before rendering.
+    user = await request.auser()
+
+    async def render_profile():
+        return render_to_string('dashboard_profile.html', {
+            'user': user,
+            'employee': await Employee.objects.filter(user=user).afirst(),
+            'profile': await UserProfile.objects.filter(user=user).afirst(),
+        })
+
+    async def render_leave():
+        leave_requests = LeaveRequest.objects.filter(employee__user=user).order_by('-created_at', '-id')
+        return render_to_string('dashboard_leave.html', {
+            'leave_requests': [leave async for leave in leave_requests[:DASHBOARD_LEAVE_LIMIT]],
+            'balance': await balances.acurrent(user),
+        })
+
+    return await arender(request, 'dashboard.html', {
+        'profile_html': await dashboard_cache.aget_fragment(user.pk, dashboard_cache.PROFILE, render_profile),
+        'leave_html': await dashboard_cache.aget_fragment(user.pk, dashboard_cache.LEAVE, render_leave),
+    })
 
 def home_view(request):
     return render(request, 'home.html')
@@ -0,0 +1,52 @@
+"""
+JSON API polling benchmark.
+
+    python -m benchmarks.api_polling --polls 500
+
+Polls /api/v1/leave/ (a full 100-row page) the way an integration would,
+once re-downloading every time and once sending back the ETag it got, and
+reports polls/sec and queries per poll for each. Data does not change
+between polls, so the conditional run is all 304s.
+"""
+import argparse
+
+from benchmarks.common import scratch_database, seed_leave_requests, setup_django, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employees', type=int, default=500)
+    parser.add_argument('--requests-per-employee', type=int, default=10)
+    parser.add_argument('--polls', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext, setup_test_environment
+    from django.urls import reverse
+
+    setup_test_environment()
+    with scratch_database():
+        staff = seed_leave_requests(args.employees, args.requests_per_employee)
+        staff[0].is_employer = True
+        staff[0].save()
+        client = Client()
+        client.force_login(staff[0].user)
+        url = reverse('api_leave_list')
+        query = {'limit': 100}
+        etag = client.get(url, query)['ETag']
+
+        print(f"{'mode':14} {'polls/s':>9} {'ms/poll':>8} {'queries/poll':>13} {'bytes/poll':>11}")
+        for mode, headers in (('unconditional', {}), ('conditional', {'HTTP_IF_NONE_MATCH': etag})):
+            size = 0
+            with CaptureQueriesContext(connection) as captured, timer() as elapsed:
+                for _ in range(args.polls):
+                    response = client.get(url, query, **headers)
+                    size += len(response.content)
+            print(f"{mode:14} {args.polls / elapsed['seconds']:>9.0f} {elapsed['seconds'] * 1000 / args.polls:>8.2f} "
+                  f"{len(captured) / args.polls:>13.1f} {size / args.polls:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+WSGI vs ASGI concurrency benchmark for the read-heavy views.
+
+    python -m benchmarks.asgi --workers 2 --concurrency 64 --duration 15
+
+Starts the same number of gunicorn workers twice on a seeded database
+(a scratch SQLite file unless --db names a PostgreSQL profile): sync workers serving core.wsgi with the sync views, then uvicorn
+workers serving core.asgi with ASYNC_VIEWS on. Each run keeps
+--concurrency logged-in clients busy on the dashboard, the employee leave
+list and the employer queue for --duration seconds and reports
+requests/sec and latency percentiles per endpoint.
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+from benchmarks.common import BASE_DIR
+from benchmarks.loadtest import DB_PROFILES, Recorder, Session, server_environment, start_server
+
+ENDPOINTS = (
+    ('dashboard', '/accounts/'),
+    ('leave list', '/employee/leave/'),
+    ('employer queue', '/employee/queue/'),
+)
+DATASET_PASSWORD = 'generated-Passw0rd!'
+
+
+def seed(env, employees):
+    manage = [sys.executable, str(BASE_DIR / 'manage.py')]
+    quiet = {'env': env, 'check': True, 'cwd': BASE_DIR, 'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+    subprocess.run(manage + ['migrate', '--verbosity', '0'], **quiet)
+    subprocess.run(manage + ['generate_dataset', '--employees', str(employees), '--clear'], **quiet)
+    found = subprocess.run(
+        manage + ['shell', '--no-imports', '-c', 'from employee.models import Employee; '
+                                 'print(Employee.objects.filter(is_employer=True).values_list("user__username", flat=True)[0])'],
+        env=env, check=True, cwd=BASE_DIR, capture_output=True, text=True,
+    )
+    return found.stdout.strip().splitlines()[-1]
+
+
+def client(base_url, recorder, username, stop, ready, number):
+    # The login itself is not measured.
+    session = Session(base_url, Recorder(), f'10.0.{number >> 8 & 255}.{number & 255}')
+    status, _ = session.form('login', '/accounts/login/', {'username': username, 'password': DATASET_PASSWORD})
+    ready.wait()
+    if status != 302:
+        print(f'login as {username} failed (HTTP {status})', file=sys.stderr)
+        return
+    session.recorder = recorder
+    index = 0
+    while not stop.is_set():
+        step, path = ENDPOINTS[index % len(ENDPOINTS)]
+        session.request(step, 'GET', path)
+        index += 1
+
+
+def run(mode, args, workdir):
+    options = SimpleNamespace(db=args.db, server=mode, port=args.port, workers=args.workers, threads=args.threads)
+    env = server_environment(options, workdir)
+    # Every client signs in as the same user at once.
+    env.update({'LOGIN_USERNAME_BURST': '1000000', 'LOGIN_USERNAME_PER_MINUTE': '1000000'})
+    username = seed(env, args.employees)
+    process = start_server(options, env)
+    recorder = Recorder()
+    # Everybody logs in first; measuring starts once the last login is done.
+    stop, ready = threading.Event(), threading.Barrier(args.concurrency + 1)
+    threads = [
+        threading.Thread(target=client, args=(f'http://127.0.0.1:{args.port}', recorder, username, stop, ready, number))
+        for number in range(args.concurrency)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return recorder.summary(args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=1, help='Threads per sync gunicorn worker.')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--employees', type=int, default=2000, help='Size of the seeded dataset.')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--db', choices=DB_PROFILES, default='sqlite-wal')
+    args = parser.parse_args()
+
+    print(f"{'server':9} {'endpoint':16} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+    for mode, label in (('gunicorn', 'WSGI'), ('uvicorn', 'ASGI')):
+        with tempfile.TemporaryDirectory() as workdir:
+            overall, steps = run(mode, args, workdir)
+        for step, entry in list(steps.items()) + [('ALL', overall)]:
+            errors = entry['errors'] if isinstance(entry['errors'], int) else sum(entry['errors'].values())
+            print(f"{label:9} {step:16} {entry['requests'] / args.duration:>8.1f} {entry.get('p50_ms', 0):>8} "
+                  f"{entry.get('p95_ms', 0):>8} {entry.get('p99_ms', 0):>8} {errors:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Shared helpers for the benchmark scripts in this package.
+# Each benchmark runs against a throwaway database created the same way the
+# test runner does it (an in-memory database on SQLite), so it never touches
+# db.sqlite3 or a real PostgreSQL database.
+import contextlib
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    # DEBUG keeps every executed query in memory, which skews both timing
+    # and memory numbers.
+    settings.DEBUG = False
+
+
+@contextlib.contextmanager
+def scratch_database():
+    from django.db import connection
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def peak_rss_mb():
+    """High-water resident set size of this process, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+@contextlib.contextmanager
+def timer():
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['seconds'] = time.perf_counter() - start
+
+
+def seed_leave_requests(employees, requests_per_employee, departments=('Finance', 'Sales', 'Engineering', 'HR')):
+    """Insert ``employees`` users/employees with ``requests_per_employee`` leave requests each."""
+    from datetime import date, timedelta
+
+    from django.contrib.auth.models import User
+    from django.contrib.auth.hashers import make_password
+
+    from employee.models import Employee, LeaveRequest
+
+    password = make_password('benchmark-password')
+    users = User.objects.bulk_create(
+        [User(username=f'bench{i}', password=password) for i in range(employees)], batch_size=1000,
+    )
+    staff = Employee.objects.bulk_create(
+        [Employee(user=user, department=departments[i % len(departments)]) for i, user in enumerate(users)],
+        batch_size=1000,
+    )
+    statuses = ('Pending', 'Approved', 'Rejected')
+    batch = []
+    for i, employee in enumerate(staff):
+        for j in range(requests_per_employee):
+            start = date(2024, 1, 1) + timedelta(days=(i + j * 14) % 700)
+            batch.append(LeaveRequest(
+                employee=employee, start_date=start, end_date=start + timedelta(days=2),
+                reason='Benchmark leave', status=statuses[(i + j) % 3],
+            ))
+            if len(batch) >= 5000:
+                LeaveRequest.objects.bulk_create(batch)
+                batch = []
+    LeaveRequest.objects.bulk_create(batch)
+    return staff
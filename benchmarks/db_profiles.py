@@ -0,0 +1,129 @@
+"""
+Per-request latency under each database profile (DB_PROFILE).
+
+    python -m benchmarks.db_profiles --profiles sqlite sqlite-wal
+    PG_NAME=ees PG_USER=postgres PG_PWD=secret \\
+        python -m benchmarks.db_profiles --profiles postgres postgres-pool
+
+Each profile runs in its own process, since settings are fixed at startup.
+--clients threads each act as a logged-in employee, alternating between
+reading their leave list and submitting a leave request, through the full
+request cycle (so connections are opened and closed exactly as in a real
+server). SQLite profiles use a scratch file; PostgreSQL profiles use the PG_*
+variables (PG_HOST defaults to 127.0.0.1) and a throwaway test database.
+Reports p50/p95/p99 request latency, throughput and failed requests such as
+"database is locked".
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import BASE_DIR, seed_leave_requests, setup_django
+from benchmarks.loadtest import DB_PROFILES, percentiles
+
+
+def child(args):
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+
+    from benchmarks.common import scratch_database
+
+    setup_test_environment()
+    if settings.DB_PROFILE.startswith('sqlite'):
+        # A scratch file rather than the test runner's in-memory database, so
+        # journal mode and file locking behave as they do in production.
+        call_command('migrate', verbosity=0)
+        database = contextlib.nullcontext()
+    else:
+        database = scratch_database()
+    with database:
+        staff = seed_leave_requests(args.clients, 5)
+        latencies, errors = [], []
+        lock = threading.Lock()
+        start_day = date.today() + timedelta(days=3000)
+
+        def worker(index, employee):
+            client = Client()
+            client.force_login(employee.user)
+            for step in range(args.requests):
+                started = time.perf_counter()
+                try:
+                    if step % 2:
+                        day = start_day + timedelta(days=index * args.requests * 2 + step * 2)
+                        client.post(reverse('submit_leave'), {
+                            'start_date': day.isoformat(), 'end_date': day.isoformat(), 'reason': 'bench',
+                        })
+                    else:
+                        client.get(reverse('my_leave'))
+                except Exception as exc:  # noqa: BLE001 - any failure is a failed request
+                    with lock:
+                        errors.append(type(exc).__name__ + ': ' + str(exc)[:60])
+                    continue
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+        threads = [threading.Thread(target=worker, args=(i, employee)) for i, employee in enumerate(staff)]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+    print(json.dumps({
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        **percentiles(latencies),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', choices=DB_PROFILES, default=['sqlite', 'sqlite-wal'])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100, help='Requests per client.')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    print(f"{'profile':14} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory() as workdir:
+            env = dict(os.environ, DB_PROFILE=profile, DEBUG='False', VIEW_METRICS_DIR='')
+            if profile.startswith('sqlite'):
+                env['SQLITE_PATH'] = os.path.join(workdir, 'bench.sqlite3')
+            else:
+                env.setdefault('PG_HOST', '127.0.0.1')
+                env.setdefault('PG_PORT', '5432')
+            result = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.db_profiles', '--child',
+                 '--clients', str(args.clients), '--requests', str(args.requests)],
+                env=env, cwd=BASE_DIR, capture_output=True, text=True,
+            )
+        if result.returncode:
+            print(f'{profile:14} failed: {result.stderr.strip().splitlines()[-1]}')
+            continue
+        entry = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{profile:14} {entry['throughput_rps']:>8} {entry.get('p50_ms', 0):>8} {entry.get('p95_ms', 0):>8} "
+              f"{entry.get('p99_ms', 0):>8} {entry['errors']:>7}"
+              + (f"  ({entry['first_error']})" if entry['first_error'] else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+"""
+Load test for the P1 target: 100 concurrent users, responses under 2 seconds.
+
+    python -m benchmarks.loadtest --db sqlite --server runserver --users 100
+    python -m benchmarks.loadtest --db postgres --server gunicorn --workers 4
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000   # already running
+
+Every virtual employee registers, logs in, loads the dashboard a few times,
+submits a leave request and logs out; a few virtual employers page through
+the queue and approve what they find. Only the standard library is used and
+all traffic stays on localhost.
+
+--db picks the DB_PROFILE of core/settings.py for the server it starts:
+the SQLite profiles use a scratch file, the PostgreSQL ones connect with the
+PG_* variables from the environment (PG_HOST defaults to 127.0.0.1 here).
+Every virtual user sends its own X-Forwarded-For address, as if behind one
+proxy, so login rate limits apply per user as in production. Results are
+printed and saved as JSON under benchmarks/results/ so runs can be compared
+over time.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.common import BASE_DIR
+
+RESULTS_DIR = BASE_DIR / 'benchmarks' / 'results'
+PASSWORD = 'Load-test-passphrase-2024'
+EMPLOYER = 'loadtest-employer'
+SLO_MS = 2000
+SERVERS = ('runserver', 'gunicorn', 'uvicorn')
+DB_PROFILES = ('sqlite', 'sqlite-wal', 'postgres', 'postgres-pool')
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+IDS_RE = re.compile(r'name="ids" value="(\d+)"')
+
+
+class Session:
+    """A keep-alive connection with a cookie jar; redirects are not followed."""
+
+    def __init__(self, base_url, recorder, client_ip='127.0.0.1'):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.recorder = recorder
+        self.client_ip = client_ip
+        self.cookies = {}
+        self.connection = None
+
+    def request(self, step, method, path, form=None):
+        body = urlencode(form, doseq=True) if form is not None else None
+        headers = {
+            'Cookie': '; '.join(f'{k}={v}' for k, v in self.cookies.items()),
+            'X-Forwarded-For': self.client_ip,
+        }
+        if body is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            text = response.read().decode('utf-8', 'replace')
+        except (OSError, http.client.HTTPException) as exc:
+            self.connection = None
+            self.recorder.record(step, (time.perf_counter() - start) * 1000, error=type(exc).__name__)
+            return None, ''
+        elapsed = (time.perf_counter() - start) * 1000
+        for header, value in response.getheaders():
+            if header.lower() == 'set-cookie':
+                name, _, rest = value.partition('=')
+                self.cookies[name] = rest.split(';', 1)[0]
+        error = None if response.status < 400 else f'HTTP {response.status}'
+        self.recorder.record(step, elapsed, error=error)
+        return response.status, text
+
+    def form(self, step, path, fields):
+        """GET a form page for its CSRF token, then POST ``fields`` to it."""
+        _, page = self.request(f'{step} (form)', 'GET', path)
+        token = CSRF_RE.search(page)
+        if not token:
+            return None, page
+        return self.request(step, 'POST', path, {'csrfmiddlewaretoken': token.group(1), **fields})
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+
+    def record(self, step, elapsed_ms, error=None):
+        with self.lock:
+            self.latencies[step].append(elapsed_ms)
+            if error:
+                self.errors[step][error] += 1
+
+    def summary(self, duration):
+        steps = {}
+        everything = []
+        for step, values in sorted(self.latencies.items()):
+            everything.extend(values)
+            steps[step] = {'requests': len(values), **percentiles(values), 'errors': dict(self.errors[step])}
+        overall = {
+            'requests': len(everything),
+            'throughput_rps': len(everything) / duration if duration else 0,
+            **percentiles(everything),
+            'errors': sum(sum(errors.values()) for errors in self.errors.values()),
+        }
+        return overall, steps
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+
+    def pick(fraction):
+        return round(values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))], 1)
+
+    return {'p50_ms': pick(0.5), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99), 'max_ms': round(values[-1], 1)}
+
+
+def employee_flow(base_url, recorder, run_id, index, dashboards, first_leave_day):
+    session = Session(base_url, recorder, f'10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}')
+    username = f'lt-{run_id}-{index}'
+    session.form('register', '/accounts/register/', {
+        'username': username, 'first_name': 'Load', 'last_name': f'User{index}',
+        'email': f'{username}@example.com', 'password1': PASSWORD, 'password2': PASSWORD,
+    })
+    session.form('login', '/accounts/login/', {'username': username, 'password': PASSWORD})
+    for _ in range(dashboards):
+        session.request('dashboard', 'GET', '/accounts/')
+    start = first_leave_day + timedelta(days=index % 300)
+    session.form('submit leave', '/employee/leave/new/', {
+        'start_date': start.isoformat(), 'end_date': (start + timedelta(days=1)).isoformat(), 'reason': 'Load test',
+    })
+    session.request('dashboard', 'GET', '/accounts/')
+    session.request('logout', 'GET', '/accounts/logout/')
+
+
+def employer_flow(base_url, recorder, stop, pause):
+    session = Session(base_url, recorder, '192.0.2.1')
+    session.form('employer login', '/accounts/login/', {'username': EMPLOYER, 'password': PASSWORD})
+    while not stop.is_set():
+        _, page = session.request('employer queue', 'GET', '/employee/queue/')
+        ids = IDS_RE.findall(page)[:10]
+        token = CSRF_RE.search(page)
+        if ids and token:
+            session.request('employer approve', 'POST', '/employee/queue/decide/', {
+                'csrfmiddlewaretoken': token.group(1), 'decision': 'approve', 'ids': ids,
+            })
+        stop.wait(pause)
+
+
+def server_environment(args, workdir):
+    env = dict(os.environ)
+    env.update({
+        'TRUSTED_PROXY_COUNT': '1',
+        'VIEW_METRICS_DIR': '',
+    })
+    env['DEBUG'] = 'False'
+    env['DB_PROFILE'] = args.db
+    if args.db.startswith('sqlite'):
+        env['SQLITE_PATH'] = str(Path(workdir) / 'loadtest.sqlite3')
+    else:
+        env.setdefault('PG_HOST', '127.0.0.1')
+        env.setdefault('PG_PORT', '5432')
+    if args.server == 'uvicorn':
+        env['ASYNC_VIEWS'] = 'True'
+    return env
+
+
+def prepare_database(env):
+    script = (
+        'from django.contrib.auth.models import User\n'
+        'from employee.models import Employee\n'
+        f'user, _ = User.objects.get_or_create(username={EMPLOYER!r})\n'
+        f'user.set_password({PASSWORD!r}); user.is_active = True; user.save()\n'
+        'Employee.objects.update_or_create(user=user, defaults={"is_employer": True})\n'
+    )
+    manage = [sys.executable, str(BASE_DIR / 'manage.py')]
+    quiet = {'env': env, 'check': True, 'cwd': BASE_DIR, 'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+    subprocess.run(manage + ['migrate', '--verbosity', '0'], **quiet)
+    subprocess.run(manage + ['shell', '-c', script], **quiet)
+
+
+def start_server(args, env):
+    address = f'127.0.0.1:{args.port}'
+    if args.server == 'runserver':
+        command = [sys.executable, 'manage.py', 'runserver', address, '--noreload']
+    elif args.server == 'uvicorn':
+        command = [sys.executable, '-m', 'gunicorn', 'core.asgi:application', '--bind', address,
+                   '--workers', str(args.workers), '--worker-class', 'uvicorn_worker.UvicornWorker']
+    else:
+        command = [sys.executable, '-m', 'gunicorn', 'core.wsgi:application', '--bind', address,
+                   '--workers', str(args.workers), '--threads', str(max(1, args.threads))]
+    process = subprocess.Popen(command, env=env, cwd=BASE_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', args.port, timeout=2)
+            connection.request('GET', '/accounts/login/')
+            connection.getresponse().read()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.3)
+    process.terminate()
+    raise SystemExit(f'{args.server} did not start on {address}.')
+
+
+def run(args, base_url):
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    first_leave_day = date.today() + timedelta(days=30)
+    stop = threading.Event()
+
+    employers = [
+        threading.Thread(target=employer_flow, args=(base_url, recorder, stop, args.employer_pause))
+        for _ in range(args.employers)
+    ]
+    employees = [
+        threading.Thread(target=employee_flow,
+                         args=(base_url, recorder, run_id, index, args.dashboards, first_leave_day))
+        for index in range(args.users)
+    ]
+    started = time.perf_counter()
+    for thread in employers + employees:
+        thread.start()
+    for thread in employees:
+        thread.join()
+    stop.set()
+    for thread in employers:
+        thread.join()
+    duration = time.perf_counter() - started
+    return recorder.summary(duration), duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Test a server that is already running instead of starting one.')
+    parser.add_argument('--db', choices=DB_PROFILES, default='sqlite', help='DB_PROFILE for the server.')
+    parser.add_argument('--server', choices=SERVERS, default='runserver',
+                        help="'uvicorn' runs core.asgi under gunicorn with ASYNC_VIEWS on.")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes.')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker.')
+    parser.add_argument('--users', type=int, default=100, help='Concurrent virtual employees.')
+    parser.add_argument('--employers', type=int, default=2, help='Concurrent virtual employers.')
+    parser.add_argument('--dashboards', type=int, default=5, help='Dashboard loads per employee.')
+    parser.add_argument('--employer-pause', type=float, default=0.5, help='Seconds between queue passes.')
+    parser.add_argument('--output', help='Results file (defaults to benchmarks/results/<timestamp>.json).')
+    args = parser.parse_args()
+
+    process = None
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.url:
+            base_url, target = args.url.rstrip('/'), args.url
+        else:
+            env = server_environment(args, workdir)
+            prepare_database(env)
+            process = start_server(args, env)
+            base_url = f'http://127.0.0.1:{args.port}'
+            target = f'{args.server} + {args.db}'
+        try:
+            (overall, steps), duration = run(args, base_url)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=10)
+
+    print(f'{target}: {args.users} employees + {args.employers} employers in {duration:.1f}s')
+    print(f"{'step':24} {'reqs':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'errors':>7}")
+    for step, entry in list(steps.items()) + [('ALL', overall)]:
+        errors = entry['errors'] if isinstance(entry['errors'], int) else sum(entry['errors'].values())
+        print(f"{step:24} {entry['requests']:>6} {entry.get('p50_ms', 0):>8} {entry.get('p95_ms', 0):>8} "
+              f"{entry.get('p99_ms', 0):>8} {entry.get('max_ms', 0):>8} {errors:>7}")
+    slo_met = overall.get('p95_ms', 0) < SLO_MS and overall['errors'] == 0
+    print(f"throughput {overall['throughput_rps']:.1f} req/s; "
+          f"P1 (p95 < {SLO_MS} ms, no errors): {'met' if slo_met else 'NOT met'}")
+
+    result = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'target': target,
+        'db': None if args.url else args.db,
+        'server': None if args.url else args.server,
+        'parameters': {key: value for key, value in vars(args).items() if key != 'output'},
+        'host': {'python': platform.python_version(), 'machine': platform.machine(), 'cpus': os.cpu_count()},
+        'duration_s': round(duration, 2),
+        'overall': overall,
+        'steps': steps,
+        'slo_met': slo_met,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"loadtest-{result['timestamp'].replace(':', '')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f'results saved to {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Login throughput benchmark.
+
+    python -m benchmarks.login --logins 50
+
+Measures, in one process (i.e. per worker), successful logins/sec through the
+login view, the number of password hashes each login costs, and how fast a
+flood of attempts for one username is turned away once its bucket is empty.
+"""
+import argparse
+from unittest import mock
+
+from benchmarks.common import scratch_database, setup_django, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--flood', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.hashers import PBKDF2PasswordHasher
+    from django.contrib.auth.models import User
+    from django.core.cache import caches
+    from django.test import Client, override_settings
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+
+    setup_test_environment()
+    url = reverse('login')
+    password = 'Str0ng-passphrase!'
+
+    with scratch_database():
+        User.objects.create_user(username='bench', password=password)
+        client = Client()
+
+        unlimited = {'ip': {'capacity': 10 ** 9, 'per_minute': 10 ** 9},
+                     'username': {'capacity': 10 ** 9, 'per_minute': 10 ** 9}}
+        with override_settings(LOGIN_RATE_LIMIT=unlimited), \
+                mock.patch.object(PBKDF2PasswordHasher, 'encode', autospec=True,
+                                  side_effect=PBKDF2PasswordHasher.encode) as encode:
+            with timer() as elapsed:
+                for _ in range(args.logins):
+                    client.post(url, {'username': 'bench', 'password': password})
+                    client.logout()
+        print(f'successful logins: {args.logins / elapsed["seconds"]:8.1f} /s  '
+              f'({encode.call_count / args.logins:.1f} hash(es) per login)')
+
+        caches['ratelimit'].clear()
+        rejected = 0
+        with mock.patch.object(PBKDF2PasswordHasher, 'encode', autospec=True,
+                               side_effect=PBKDF2PasswordHasher.encode) as encode:
+            with timer() as elapsed:
+                for _ in range(args.flood):
+                    response = client.post(url, {'username': 'bench', 'password': 'wrong'})
+                    rejected += response.status_code == 429
+        print(f'flood attempts:    {args.flood / elapsed["seconds"]:8.1f} /s  '
+              f'({rejected} rejected, {encode.call_count} hashed)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Employee directory search latency.
+
+    python -m benchmarks.search --employees 100000
+
+Generates --employees employees (generate_dataset, no leave), then times
+directory searches for prefixes, whole words, departments and typos through
+employee.search, reporting p50/p95/p99 per kind. The target is p95 under
+50 ms at 100k employees.
+"""
+import argparse
+import io
+import random
+import time
+
+from benchmarks.common import scratch_database, setup_django
+from benchmarks.loadtest import percentiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employees', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200, help='Queries per kind.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+
+    from employee import search
+
+    rng = random.Random(7)
+    with scratch_database():
+        call_command('generate_dataset', '--employees', str(args.employees), '--requests-per-employee', '0',
+                     '--no-rebuild', stdout=io.StringIO())
+
+        def typo(word):
+            i = rng.randrange(1, len(word) - 1)
+            return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+        kinds = {
+            'prefix': lambda n: f'last{n}'[:rng.randint(4, 6)],
+            'full name': lambda n: f'first{n} last{n}',
+            'department': lambda n: rng.choice(['engineering', 'finance', 'sales', 'operations'])[:5],
+            'typo': lambda n: typo(f'last{n}'),
+        }
+        print(f"{'kind':12} {'p50':>8} {'p95':>8} {'p99':>8} {'hits':>6}")
+        for kind, make_query in kinds.items():
+            timings, hits = [], 0
+            for _ in range(args.queries):
+                query = make_query(rng.randrange(args.employees))
+                started = time.perf_counter()
+                hits += bool(search.search(query))
+                timings.append((time.perf_counter() - started) * 1000)
+            entry = percentiles(timings)
+            print(f"{kind:12} {entry['p50_ms']:>8} {entry['p95_ms']:>8} {entry['p99_ms']:>8} {hits:>6}")
+
+
+if __name__ == '__main__':
+    main()
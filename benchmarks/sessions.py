@@ -0,0 +1,83 @@
+"""
+Session engine benchmark.
+
+    python -m benchmarks.sessions --users 50 --requests 20
+
+Logs --users employees in under each SESSION_MODE and replays --requests
+authenticated page views per user, reporting queries per request (total and
+against django_session) and mean request time, i.e. the queries each mode
+saves compared with plain database sessions.
+"""
+import argparse
+import shutil
+import tempfile
+
+from benchmarks.common import scratch_database, seed_leave_requests, setup_django, timer
+
+PAGES = ('dashboard', 'my_leave', 'submit_leave')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=20, help='Page views per user.')
+    parser.add_argument('--cache', choices=('file', 'locmem'), default='file',
+                        help="Backend for the 'sessions' cache used by cached_db.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext, setup_test_environment
+    from django.urls import reverse
+
+    setup_test_environment()
+    urls = [reverse(name) for name in PAGES]
+    session_cache = {
+        'file': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                 'LOCATION': tempfile.mkdtemp(prefix='ees-bench-sessions-')},
+        'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-sessions'},
+    }[args.cache]
+
+    with scratch_database():
+        staff = seed_leave_requests(args.users, 5)
+        results = {}
+        for mode, engine in settings.SESSION_ENGINES.items():
+            with override_settings(SESSION_ENGINE=engine, CACHES={**settings.CACHES, 'sessions': session_cache}):
+                caches['sessions'].clear()
+                caches['dashboard'].clear()  # same cold fragment caches for every mode
+                clients = []
+                for employee in staff:
+                    client = Client()
+                    client.force_login(employee.user)
+                    clients.append(client)
+                # Warm up, so every mode starts from a logged-in, cached state.
+                for client in clients:
+                    client.get(urls[0])
+
+                with CaptureQueriesContext(connection) as captured, timer() as elapsed:
+                    for step in range(args.requests):
+                        for client in clients:
+                            client.get(urls[step % len(urls)])
+                total = args.users * args.requests
+                session = sum('django_session' in query['sql'] for query in captured.captured_queries)
+                results[mode] = {
+                    'queries': len(captured.captured_queries) / total,
+                    'session': session / total,
+                    'ms': elapsed['seconds'] * 1000 / total,
+                }
+
+    if args.cache == 'file':
+        shutil.rmtree(session_cache['LOCATION'], ignore_errors=True)
+
+    baseline = results['db']['queries']
+    print(f"{'mode':16} {'queries/req':>12} {'session q/req':>14} {'saved/req':>10} {'ms/req':>8}")
+    for mode, entry in results.items():
+        print(f"{mode:16} {entry['queries']:>12.2f} {entry['session']:>14.2f} "
+              f"{baseline - entry['queries']:>10.2f} {entry['ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Server start-up benchmark.
+
+    python -m benchmarks.startup --workers 4 --runs 3
+
+Measures how long `import core.wsgi` takes in a fresh interpreter (the cost
+every worker pays without preloading), then starts gunicorn --runs times
+with its defaults and with core/gunicorn_conf.py, on a migrated scratch
+SQLite file, and reports for each the time from launch to the first
+successful response, that response's own latency and the median of the
+next --requests requests. --importtime lists the slowest imports.
+"""
+import argparse
+import http.client
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.common import BASE_DIR
+from benchmarks.loadtest import prepare_database, server_environment
+
+IMPORT_SCRIPT = 'import time; s = time.perf_counter(); import core.wsgi; print(time.perf_counter() - s)'
+PATH = '/accounts/login/'
+
+
+def import_times(env, runs):
+    return [
+        float(subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], env=env, cwd=BASE_DIR, check=True,
+                             capture_output=True, text=True).stdout.split()[-1]) * 1000
+        for _ in range(runs)
+    ]
+
+
+def slowest_imports(env, count):
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import core.wsgi'], env=env, cwd=BASE_DIR,
+                            check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative) / 1000, name.rstrip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def get(port):
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    connection.request('GET', PATH)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.status, (time.perf_counter() - started) * 1000
+
+
+def start_once(command, env, port, requests):
+    launched = time.perf_counter()
+    process = subprocess.Popen(command, env=env, cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = launched + 60
+        while time.perf_counter() < deadline:
+            try:
+                status, first_ms = get(port)
+            except OSError:
+                if process.poll() is not None:
+                    raise SystemExit(f'gunicorn exited with {process.returncode}: {" ".join(command)}')
+                time.sleep(0.02)
+                continue
+            if status == 200:
+                break
+        else:
+            raise SystemExit('gunicorn did not answer within 60s.')
+        ready_ms = (time.perf_counter() - launched) * 1000
+        following = [get(port)[1] for _ in range(requests)]
+        return ready_ms, first_ms, statistics.median(following)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=20, help='Requests timed after the first one.')
+    parser.add_argument('--port', type=int, default=8767)
+    parser.add_argument('--importtime', type=int, default=0, metavar='N', help='Also list the N slowest imports.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = server_environment(SimpleNamespace(db='sqlite-wal', server='gunicorn'), workdir)
+        prepare_database(env)
+
+        timings = import_times(env, args.runs)
+        print(f'import core.wsgi: min {min(timings):.0f} ms, median {statistics.median(timings):.0f} ms')
+        for cumulative_ms, name in slowest_imports(env, args.importtime):
+            print(f'  {cumulative_ms:>8.1f} ms  {name}')
+
+        common = ['--bind', f'127.0.0.1:{args.port}', '--workers', str(args.workers)]
+        servers = {
+            'defaults': [sys.executable, '-m', 'gunicorn', *common, 'core.wsgi:application'],
+            'gunicorn_conf': [sys.executable, '-m', 'gunicorn', '-c', 'python:core.gunicorn_conf', *common,
+                              'core.wsgi:application'],
+        }
+        print(f"\n{'server':14} {'ready ms':>9} {'first ms':>9} {'next p50':>9}")
+        for label, command in servers.items():
+            results = [start_once(command, env, args.port, args.requests) for _ in range(args.runs)]
+            ready, first, following = (statistics.median(column) for column in zip(*results))
+            print(f'{label:14} {ready:>9.0f} {first:>9.1f} {following:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# gunicorn settings for production:
+#
+#     gunicorn -c python:core.gunicorn_conf core.wsgi:application
+#
+# The app is preloaded in the master and warmed up there (core.warmup), then
+# the heap is frozen so the forked workers share it copy-on-write instead of
+# each importing Django and the project on its own. Workers are recycled
+# after a number of requests and when their memory grows past a limit, and
+# their number follows the CPUs this process may run on. Every value can be
+# overridden from the environment or on the command line.
+import gc
+import os
+import resource
+import tempfile
+
+# Imported under another name: gunicorn reads ``config`` as one of its settings.
+from decouple import config as env
+
+
+def cpu_count():
+    """CPUs available to this process, honouring container CPU sets."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def rss_mb():
+    """Current resident set size of this process in MiB."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except OSError:
+        # No procfs (macOS): fall back to the high-water mark, in bytes there.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024)
+
+
+CPUS = cpu_count()
+
+bind = env('GUNICORN_BIND', default=f"0.0.0.0:{env('PORT', default='8000')}")
+# Requests mostly wait on the database, so run more workers than CPUs, and a
+# few threads in each to overlap that waiting without more copies of the app.
+workers = env('WEB_CONCURRENCY', default=CPUS * 2 + 1, cast=int)
+threads = env('GUNICORN_THREADS', default=2, cast=int)
+timeout = env('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = 30
+keepalive = 5
+
+preload_app = env('GUNICORN_PRELOAD', default=True, cast=bool)
+
+# Recycle workers to bound slow leaks; the jitter keeps them from all
+# restarting at once.
+max_requests = env('GUNICORN_MAX_REQUESTS', default=2000, cast=int)
+max_requests_jitter = env('GUNICORN_MAX_REQUESTS_JITTER', default=200, cast=int)
+# ...and as soon as one outgrows this many MiB (0 turns the check off).
+max_worker_memory_mb = env('GUNICORN_MAX_WORKER_MEMORY_MB', default=512, cast=int)
+
+# Worker heartbeats go to tmpfs where there is one, so a slow disk cannot
+# get healthy workers killed.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# Per-view metrics snapshots for `manage.py dump_view_metrics`, off by
+# default elsewhere; read by the settings when the app is loaded.
+os.environ.setdefault('VIEW_METRICS_DIR', os.path.join(tempfile.gettempdir(), 'ees-view-metrics'))
+
+
+def when_ready(server):
+    # Runs in the master once the app is loaded, just before the first fork.
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+
+    from core.warmup import warm_up
+
+    warm_up()
+    # Nothing may inherit an open connection.
+    connections.close_all()
+    # Move everything allocated so far out of the collector's reach, so its
+    # passes in the workers do not write to (and so copy) shared pages.
+    gc.collect()
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from core.warmup import warm_database, warm_database_threads, warm_up
+
+    if not worker.cfg.preload_app:
+        warm_up()
+    # With threads > 1 gunicorn runs the gthread worker, whose requests are
+    # served by its pool threads rather than this one.
+    pool = getattr(worker, 'tpool', None)
+    if pool is not None:
+        warm_database_threads(pool, worker.cfg.threads)
+    else:
+        warm_database()
+
+
+def post_request(worker, req, environ, resp):
+    if max_worker_memory_mb and rss_mb() > max_worker_memory_mb:
+        worker.log.info('Worker %s uses %.0f MiB (limit %d); restarting it after this request.',
+                        worker.pid, rss_mb(), max_worker_memory_mb)
+        worker.alive = False
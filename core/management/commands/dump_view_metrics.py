@@ -0,0 +1,38 @@
+import json
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.metrics import FIELDS, load_snapshots, summarise
+
+
+class Command(BaseCommand):
+    help = 'Print per-view query counts and timings merged from every server process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print the raw summary as JSON.')
+        parser.add_argument('--reset', action='store_true', help='Delete the collected snapshots afterwards.')
+
+    def handle(self, *args, **options):
+        directory = settings.VIEW_METRICS_DIR
+        if not directory:
+            raise CommandError('VIEW_METRICS_DIR is not set, so no snapshots are written.')
+
+        summary = summarise(*load_snapshots(directory))
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+        elif not summary:
+            self.stdout.write('No requests recorded yet.')
+        else:
+            header = f"{'view':40} {'reqs':>6} {'over':>5}" + ''.join(f' {field + " p50/p95/p99":>26}' for field in FIELDS)
+            self.stdout.write(header)
+            for view_name, entry in summary.items():
+                cells = ''.join(
+                    ' {:>26}'.format('/'.join('-' if v is None else f'{v:g}' for v in entry[field].values()))
+                    for field in FIELDS
+                )
+                self.stdout.write(f"{view_name[:40]:40} {entry['requests']:>6} {entry['over_budget']:>5}{cells}")
+
+        if options['reset']:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,46 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    help = 'Run background tasks queued with core.tasks.enqueue().'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.TASK_WORKERS,
+                            help='Worker threads, each with its own database connection.')
+        parser.add_argument('--batch-size', type=int, default=settings.TASK_BATCH_SIZE,
+                            help='Tasks of the same name handed to one handler call.')
+        parser.add_argument('--poll', type=float, default=settings.TASK_POLL_SECONDS,
+                            help='Seconds an idle worker waits before looking again.')
+        parser.add_argument('--once', action='store_true',
+                            help='Run whatever is due now in this process, then exit (for cron).')
+
+    def handle(self, *args, **options):
+        requeued = tasks.requeue_stale()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} task(s) abandoned by a previous worker.')
+
+        if options['once']:
+            done = tasks.run_pending(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Ran {done} task(s).'))
+            return
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+        workers = [tasks.Worker(stop, options['batch_size'], options['poll']) for _ in range(options['workers'])]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Running {len(workers)} worker(s) for: {', '.join(sorted(tasks.registry)) or 'no tasks'}.")
+
+        # Sweep for tasks left running by crashed workers while the pool works.
+        while not stop.wait(settings.TASK_LOCK_TIMEOUT / 2):
+            tasks.requeue_stale()
+        for worker in workers:
+            worker.join()
+        self.stdout.write('Stopped.')
@@ -0,0 +1,206 @@
+# Per-view request metrics.
+# ViewMetricsMiddleware records, for every request, the number of SQL queries
+# and time spent in the database (via connection.execute_wrapper, so it works
+# with DEBUG off), template render time, response size and total time. Samples
+# are aggregated in-process per URL name and summarised as p50/p95/p99.
+# Each process also snapshots its samples to VIEW_METRICS_DIR so the
+# dump_view_metrics command can merge every worker's numbers.
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template as DjangoTemplate
+
+logger = logging.getLogger('ees.metrics')
+
+FIELDS = ('queries', 'db_ms', 'render_ms', 'total_ms', 'bytes')
+
+_render_ms = contextvars.ContextVar('ees_render_ms', default=None)
+
+
+def query_budget(max_queries):
+    """Declare the most SQL queries a view may run per request (middleware included)."""
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarise(samples_by_view, over_budget=None):
+    over_budget = over_budget or {}
+    summary = {}
+    for view_name, samples in sorted(samples_by_view.items()):
+        entry = {'requests': len(samples), 'over_budget': over_budget.get(view_name, 0)}
+        for index, field in enumerate(FIELDS):
+            values = sorted(sample[index] for sample in samples if sample[index] is not None)
+            entry[field] = {
+                'p50': percentile(values, 0.50),
+                'p95': percentile(values, 0.95),
+                'p99': percentile(values, 0.99),
+            }
+        summary[view_name] = entry
+    return summary
+
+
+class MetricsRegistry:
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+            self.over_budget = defaultdict(int)
+            self.last_flush = time.monotonic()
+
+    def record(self, view_name, sample, over_budget=False):
+        with self.lock:
+            self.samples[view_name].append(sample)
+            if over_budget:
+                self.over_budget[view_name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {name: list(samples) for name, samples in self.samples.items()}, dict(self.over_budget)
+
+    def summary(self):
+        return summarise(*self.snapshot())
+
+    def maybe_flush(self):
+        directory = settings.VIEW_METRICS_DIR
+        if not directory or time.monotonic() - self.last_flush < settings.VIEW_METRICS_FLUSH_SECONDS:
+            return
+        self.last_flush = time.monotonic()
+        samples, over_budget = self.snapshot()
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        target = path / f'{os.getpid()}.json'
+        temporary = target.with_suffix('.tmp')
+        temporary.write_text(json.dumps({'samples': samples, 'over_budget': over_budget}))
+        temporary.replace(target)
+
+
+registry = MetricsRegistry()
+
+
+def load_snapshots(directory):
+    """Merge the samples every process has written to ``directory``."""
+    samples, over_budget = defaultdict(list), defaultdict(int)
+    for path in Path(directory).glob('*.json'):
+        data = json.loads(path.read_text())
+        for name, rows in data['samples'].items():
+            samples[name].extend(rows)
+        for name, count in data['over_budget'].items():
+            over_budget[name] += count
+    return samples, over_budget
+
+
+def _instrument_templates():
+    # Top-level template renders (render(), render_to_string(), TemplateResponse)
+    # all go through the backend Template wrapper; time them into the current
+    # request's accumulator, if any.
+    if getattr(DjangoTemplate.render, 'ees_instrumented', False):
+        return
+    original = DjangoTemplate.render
+
+    def render(self, context=None, request=None):
+        elapsed = _render_ms.get()
+        if elapsed is None:
+            return original(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            elapsed[0] += (time.perf_counter() - start) * 1000
+
+    render.ees_instrumented = True
+    DjangoTemplate.render = render
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - start) * 1000
+
+
+class ViewMetricsMiddleware:
+    """Record per-view query count and timings. Should be first in MIDDLEWARE."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        _instrument_templates()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with self._measure(request) as measured:
+            measured['response'] = self.get_response(request)
+        return measured['response']
+
+    async def __acall__(self, request):
+        with self._measure(request) as measured:
+            measured['response'] = await self.get_response(request)
+        return measured['response']
+
+    @contextlib.contextmanager
+    def _measure(self, request):
+        counter = _QueryCounter()
+        render_ms = [0.0]
+        measured = {}
+        token = _render_ms.set(render_ms)
+        start = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(counter))
+                yield measured
+        finally:
+            _render_ms.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        response = measured['response']
+        match = request.resolver_match
+        view_name = match.view_name if match else '<unresolved>'
+        size = None if response.streaming else len(response.content)
+        budget = getattr(match.func, 'query_budget', None) if match else None
+        over_budget = budget is not None and counter.queries > budget
+        if over_budget:
+            logger.warning('%s ran %d queries (budget %d)', view_name, counter.queries, budget)
+
+        registry.record(
+            view_name,
+            (counter.queries, round(counter.db_ms, 3), round(render_ms[0], 3), round(total_ms, 3), size),
+            over_budget=over_budget,
+        )
+        registry.maybe_flush()
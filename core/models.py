@@ -0,0 +1,71 @@
+from functools import partial
+
+from django.db import models, transaction
+from django.utils.timezone import now
+
+
+# A unit of background work for core.tasks, run by `manage.py run_worker`.
+# Rows are deleted once they succeed; failures are retried with backoff and
+# kept with their last error once they run out of attempts.
+class Task(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=10,
+        choices=[(QUEUED, 'Queued'), (RUNNING, 'Running'), (FAILED, 'Failed')],
+        default=QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=now)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest due task, then more of the same name.
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+            models.Index(fields=['status', 'name', 'run_at'], name='task_status_name_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+# One row per data set that clients poll (e.g. the JSON API), bumped after
+# every change to it commits. The version and timestamp give ETags and
+# Last-Modified for a whole collection from a single-row read.
+class ChangeCounter(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=now)
+
+    @classmethod
+    def bump(cls, name):
+        """
+        Bump ``name`` once the current transaction commits (at once outside
+        one), in its own short statement: bumping inside the writer's
+        transaction would hold the row lock until commit and queue every
+        concurrent writer behind it. A poll that lands between the commit
+        and the bump sees new rows under the old version, and simply
+        fetches them again once the version moves.
+        """
+        transaction.on_commit(partial(cls._bump, name), robust=True)
+
+    @classmethod
+    def _bump(cls, name):
+        if not cls.objects.filter(name=name).update(version=models.F('version') + 1, changed_at=now()):
+            cls.objects.get_or_create(name=name, defaults={'version': 1})
+
+    @classmethod
+    def current(cls, name):
+        counter = cls.objects.filter(name=name).first()
+        return counter or cls(name=name, changed_at=None)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,35 @@
+# Admin paginator for large tables. Django's changelist runs an exact
+# COUNT(*) for every page, which on PostgreSQL is a full scan of the table.
+# For an unfiltered changelist on PostgreSQL the planner's row estimate is
+# used instead once the table is big enough that the exact number does not
+# matter; filtered lists and other databases keep the exact count.
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using='default'):
+    """The planner's row estimate for ``model``'s table on PostgreSQL, else None."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 until the table is first analysed.
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    # Below this many rows an exact count is cheap and nicer to show.
+    exact_below = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.exact_below:
+                return estimate
+        return super().count
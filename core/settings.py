@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import date
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 import os
+import tempfile
 
 
 
@@ -39,18 +42,21 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'core.apps.CoreConfig',
     'accounts',
     'employee.apps.EmployeeConfig',
     'whitenoise.runserver_nostatic',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.ViewMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.static.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -78,18 +84,53 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# Serve the read-heavy views (dashboard, leave list, employer queue) with
+# their async versions. Only worth enabling under ASGI (core.asgi); under
+# WSGI every async view pays for an extra event loop hop.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-if DEBUG:
+# Named database profiles, selected with DB_PROFILE. Without it, DEBUG picks
+# 'sqlite' and production picks 'postgres', as before.
+#   sqlite         stock SQLite file
+#   sqlite-wal     SQLite in WAL mode with synchronous=NORMAL and a busy
+#                  timeout: readers stop blocking the writer, commits skip
+#                  most fsyncs, and writers queue instead of failing
+#   postgres       PostgreSQL with persistent connections (CONN_MAX_AGE) and
+#                  health checks, so requests skip the TCP+auth handshake
+#   postgres-pool  PostgreSQL through psycopg 3's connection pool; needs
+#                  `pip install "psycopg[binary,pool]"`
+# QuerySet.iterator() (used by the exports) reads through server-side
+# cursors on PostgreSQL; set PG_DISABLE_SERVER_SIDE_CURSORS=True when a
+# transaction-pooling proxy such as PgBouncer sits in front of the database.
+DB_PROFILE = config('DB_PROFILE', default='sqlite' if DEBUG else 'postgres')
+
+if DB_PROFILE in ('sqlite', 'sqlite-wal'):
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {
+                # Take the write lock when the transaction starts, so two
+                # writers (e.g. two managers deciding leave) queue on the busy
+                # timeout instead of deadlocking on lock upgrade, which SQLite
+                # reports at once as "database is locked".
+                'transaction_mode': 'IMMEDIATE',
+            },
         }
     }
-else:
+    if DB_PROFILE == 'sqlite-wal':
+        DATABASES['default']['OPTIONS']['init_command'] = (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            f"PRAGMA busy_timeout={config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int)};"
+            'PRAGMA temp_store=MEMORY;'
+            'PRAGMA cache_size=-20000;'
+        )
+elif DB_PROFILE in ('postgres', 'postgres-pool'):
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.postgresql',
@@ -98,8 +139,177 @@ else:
             'PASSWORD': config('PG_PWD'),
             'HOST': config('PG_HOST', default='yamabiko.proxy.rlwy.net'),
             'PORT': config('PG_PORT', default='16213'),
+            'DISABLE_SERVER_SIDE_CURSORS': config('PG_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
         }
     }
+    if DB_PROFILE == 'postgres':
+        DATABASES['default']['CONN_MAX_AGE'] = config('PG_CONN_MAX_AGE', default=600, cast=int)
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    else:
+        # The pool owns the connections, so CONN_MAX_AGE must stay at 0.
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': config('PG_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('PG_POOL_MAX_SIZE', default=10, cast=int),
+                'timeout': config('PG_POOL_TIMEOUT', default=10, cast=int),
+            },
+        }
+else:
+    raise ImproperlyConfigured(
+        f"Unknown DB_PROFILE {DB_PROFILE!r}; use sqlite, sqlite-wal, postgres or postgres-pool."
+    )
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# DASHBOARD_CACHE picks the backend of the 'dashboard' cache, which holds the
+# per-user dashboard fragments, their version keys and the hit/miss counters:
+# 'file' (shared by every worker on the host, so an invalidation reaches all
+# of them) or 'locmem' (fine for a single process only: other workers would
+# serve stale fragments for up to DASHBOARD_CACHE_TIMEOUT). Each user needs
+# four entries (two fragments, two versions); past MAX_ENTRIES Django culls a
+# third of the cache at random, so size it for the user count.
+DASHBOARD_CACHE = config('DASHBOARD_CACHE', default='file')
+DASHBOARD_CACHE_MAX_ENTRIES = config('DASHBOARD_CACHE_MAX_ENTRIES', default=100000, cast=int)
+if DASHBOARD_CACHE not in ('file', 'locmem'):
+    raise ImproperlyConfigured(f"Unknown DASHBOARD_CACHE {DASHBOARD_CACHE!r}; use file or locmem.")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ees-default',
+    },
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('DASHBOARD_CACHE_DIR', default=os.path.join(tempfile.gettempdir(), 'ees-dashboard')),
+        'OPTIONS': {'MAX_ENTRIES': DASHBOARD_CACHE_MAX_ENTRIES},
+    } if DASHBOARD_CACHE == 'file' else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ees-dashboard',
+        'OPTIONS': {'MAX_ENTRIES': DASHBOARD_CACHE_MAX_ENTRIES},
+    },
+    # Always process-local: login rate-limit buckets must be checkable
+    # without a network round trip. The limits are therefore per worker.
+    # Entries expire once their bucket has refilled (a few minutes at the
+    # default limits), and LocMemCache evicts the least recently used third
+    # when full. An attacker who makes RATELIMIT_MAX_ENTRIES fresh keys
+    # within that window can flush a lockout. At 100000 that takes thousands
+    # of source addresses, since every attempt also spends an IP token. It
+    # costs at most about 35 MB per worker.
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ees-ratelimit',
+        'OPTIONS': {'MAX_ENTRIES': config('RATELIMIT_MAX_ENTRIES', default=100000, cast=int)},
+    },
+}
+
+# Sessions. SESSION_MODE picks where session data lives:
+#   cached_db       - read from the 'sessions' cache, written through to the
+#                     database, so a warm session costs no query.
+#   db              - Django's default: a SELECT on every request.
+#   signed_cookies  - no server-side storage at all; a logout cannot revoke
+#                     a copied cookie before SESSION_COOKIE_AGE.
+# SESSION_CACHE is 'file' (shared by every worker on the host) or 'locmem'
+# (one process only: another worker would keep serving a session that was
+# logged out elsewhere until SESSION_COOKIE_AGE runs out).
+SESSION_MODE = config('SESSION_MODE', default='cached_db')
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'db': 'django.contrib.sessions.backends.db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+if SESSION_MODE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f"Unknown SESSION_MODE {SESSION_MODE!r}; use {', '.join(SESSION_ENGINES)}."
+    )
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+SESSION_CACHE_ALIAS = 'sessions'
+
+SESSION_CACHE = config('SESSION_CACHE', default='file')
+if SESSION_CACHE == 'file':
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('SESSION_CACHE_DIR', default=os.path.join(tempfile.gettempdir(), 'ees-sessions')),
+        'OPTIONS': {'MAX_ENTRIES': config('SESSION_CACHE_MAX_ENTRIES', default=50000, cast=int)},
+    }
+elif SESSION_CACHE == 'locmem':
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ees-sessions',
+        'OPTIONS': {'MAX_ENTRIES': config('SESSION_CACHE_MAX_ENTRIES', default=50000, cast=int)},
+    }
+else:
+    raise ImproperlyConfigured(f"Unknown SESSION_CACHE {SESSION_CACHE!r}; use file or locmem.")
+
+# Rows deleted per statement by `manage.py clear_expired_sessions`.
+SESSION_CLEANUP_BATCH_SIZE = config('SESSION_CLEANUP_BATCH_SIZE', default=5000, cast=int)
+
+
+# Tests run with the file caches in a scratch directory (core.testing).
+TEST_RUNNER = 'core.testing.TestRunner'
+
+# Seconds a rendered dashboard fragment may live; fragments are also
+# invalidated as soon as their source rows change.
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=60 * 15, cast=int)
+
+
+# Login token buckets: 'capacity' attempts at once, refilled at 'per_minute'.
+# Buckets are per worker process (see accounts.ratelimit), so with N workers
+# a client may get up to N times these limits. Successful logins give their
+# username token back.
+LOGIN_RATE_LIMIT = {
+    'ip': {
+        'capacity': config('LOGIN_IP_BURST', default=20, cast=int),
+        'per_minute': config('LOGIN_IP_PER_MINUTE', default=10, cast=float),
+    },
+    'username': {
+        'capacity': config('LOGIN_USERNAME_BURST', default=5, cast=int),
+        'per_minute': config('LOGIN_USERNAME_PER_MINUTE', default=1, cast=float),
+    },
+}
+
+# Reverse proxies in front of the app that append the client's address to
+# X-Forwarded-For; the rate limiter keys on the address the outermost one
+# saw. Production sits behind Railway's one proxy. Leave it at 0 when
+# clients connect directly, or they could pick their own address.
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0 if DEBUG else 1, cast=int)
+
+
+# Per-view metrics (core.metrics). Each process snapshots its samples to
+# VIEW_METRICS_DIR at most every VIEW_METRICS_FLUSH_SECONDS for
+# `manage.py dump_view_metrics`. Off unless set; core/gunicorn_conf.py sets
+# it for production servers.
+VIEW_METRICS_DIR = config('VIEW_METRICS_DIR', default=None)
+VIEW_METRICS_FLUSH_SECONDS = config('VIEW_METRICS_FLUSH_SECONDS', default=30, cast=int)
+
+
+# Background tasks (core.tasks), run by `manage.py run_worker`.
+TASK_WORKERS = config('TASK_WORKERS', default=2, cast=int)
+TASK_BATCH_SIZE = config('TASK_BATCH_SIZE', default=100, cast=int)
+TASK_POLL_SECONDS = config('TASK_POLL_SECONDS', default=1, cast=float)
+TASK_MAX_ATTEMPTS = config('TASK_MAX_ATTEMPTS', default=5, cast=int)
+# Seconds after which a running task is assumed abandoned and requeued.
+TASK_LOCK_TIMEOUT = config('TASK_LOCK_TIMEOUT', default=300, cast=int)
+
+
+# Leave archival (`manage.py archive_leave`): decided requests that ended and
+# were filed more than LEAVE_ARCHIVE_AFTER_DAYS ago move to the archive table.
+LEAVE_ARCHIVE_AFTER_DAYS = config('LEAVE_ARCHIVE_AFTER_DAYS', default=730, cast=int)
+LEAVE_ARCHIVE_BATCH_SIZE = config('LEAVE_ARCHIVE_BATCH_SIZE', default=1000, cast=int)
+# PostgreSQL only, read when migration 0012 runs: create the archive as a
+# table partitioned by year of created_at.
+LEAVE_ARCHIVE_PARTITIONED = config('LEAVE_ARCHIVE_PARTITIONED', default=False, cast=bool)
+
+
+# Leave balances (employee.balances): working days of leave per employee
+# per calendar year, not counting weekends or the public holidays of
+# LEAVE_HOLIDAY_CALENDAR (see employee.holidays; the default matches
+# TIME_ZONE below). LEAVE_EXTRA_HOLIDAYS adds comma-separated YYYY-MM-DD
+# dates, e.g. for Eid al-Fitr.
+LEAVE_ANNUAL_ENTITLEMENT_DAYS = config('LEAVE_ANNUAL_ENTITLEMENT_DAYS', default=21, cast=int)
+LEAVE_HOLIDAY_CALENDAR = config('LEAVE_HOLIDAY_CALENDAR', default='Africa/Nairobi')
+LEAVE_EXTRA_HOLIDAYS = [date.fromisoformat(day) for day in config('LEAVE_EXTRA_HOLIDAYS', default='', cast=Csv())]
 
 
 # Password validation
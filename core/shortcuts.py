@@ -0,0 +1,15 @@
+from django.shortcuts import render
+
+
+async def arender(request, template_name, context=None, **kwargs):
+    """
+    render() for async views.
+
+    Templates are rendered synchronously, and the auth context processor reads
+    ``request.user``, whose lazy lookup would hit the database from the event
+    loop. Resolving it with auser() first (which also loads the session)
+    leaves the render itself free of queries, so every context value must
+    already be evaluated.
+    """
+    request.user = await request.auser()
+    return render(request, template_name, context, **kwargs)
@@ -0,0 +1,48 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that also runs on the event loop under ASGI.
+
+    WhiteNoise's own middleware is sync-only, so under ASGI Django would run
+    it, and hand every request on from it, with a thread hop each way. Here
+    only static files leave the loop: they are looked up in the index
+    WhiteNoise builds at startup, then opened and read in a worker thread.
+    Everything else goes straight on to the next async handler.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Development only: find_file() checks the disk on every request.
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            response = await sync_to_async(self.serve)(static_file, request)
+            if response.file_to_stream is not None:
+                # Django would otherwise read the whole file into memory.
+                response.streaming_content = _read_chunks(response.file_to_stream, response.block_size)
+            return response
+        return await self.get_response(request)
+
+
+async def _read_chunks(file, size):
+    # The response still closes the file.
+    while chunk := await sync_to_async(file.read)(size):
+        yield chunk
@@ -0,0 +1,153 @@
+# A small database-backed task queue, so slow side effects (deactivating
+# users, rebuilding calendar rows, notifications) run outside the request
+# that triggered them without needing a broker.
+#
+# Handlers are registered with @task in an app's tasks.py and receive a list
+# of payloads: a worker claims up to TASK_BATCH_SIZE due tasks of the same
+# name at once, so a burst of approvals becomes one handler call. Handlers
+# must therefore be idempotent, which also makes retries safe. enqueue()
+# inserts the task only when the surrounding transaction commits, so a
+# rolled-back request never leaves work behind.
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(name, max_attempts=None):
+    """Register ``func(payloads)`` as the handler for tasks called ``name``."""
+    def register(func):
+        func.task_name = name
+        func.max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+        registry[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, delay=None):
+    """Queue ``name`` with ``payload`` once the current transaction commits."""
+    if name not in registry:
+        raise LookupError(f'No task handler is registered as {name!r}.')
+    run_at = timezone.now() + delay if delay else None
+
+    def insert():
+        Task.objects.create(name=name, payload=payload or {}, **({'run_at': run_at} if run_at else {}))
+
+    transaction.on_commit(insert)
+
+
+def _worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def _claim(worker_id, batch_size):
+    """Lock and return a batch of due tasks sharing one name, oldest first."""
+    now = timezone.now()
+    due = Task.objects.filter(status=Task.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+    # SKIP LOCKED lets several workers claim side by side on PostgreSQL;
+    # SQLite serialises writers anyway.
+    lock = {'skip_locked': True} if connection.features.has_select_for_update_skip_locked else {}
+    with transaction.atomic():
+        first = due.select_for_update(**lock).values_list('name', flat=True).first()
+        if first is None:
+            return []
+        batch = list(due.filter(name=first).select_for_update(**lock)[:batch_size])
+        return _mark_running(batch, worker_id, now)
+
+
+def _mark_running(batch, worker_id, now):
+    """
+    Mark the tasks of ``batch`` that are still queued as running, and return
+    those. select_for_update() is a no-op on SQLite, so another thread may
+    have claimed some of them since they were read; the UPDATE re-checks
+    the status and only the rows it changed are kept.
+    """
+    claimed = Task.objects.filter(pk__in=[t.pk for t in batch], status=Task.QUEUED).update(
+        status=Task.RUNNING, locked_at=now, locked_by=worker_id,
+    )
+    if claimed < len(batch):
+        mine = set(Task.objects.filter(
+            pk__in=[t.pk for t in batch], status=Task.RUNNING, locked_at=now, locked_by=worker_id,
+        ).values_list('pk', flat=True))
+        batch = [t for t in batch if t.pk in mine]
+    return batch
+
+
+def requeue_stale():
+    """Put back tasks whose worker died mid-run."""
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_LOCK_TIMEOUT)
+    return Task.objects.filter(status=Task.RUNNING, locked_at__lt=cutoff).update(
+        status=Task.QUEUED, locked_at=None, locked_by='',
+    )
+
+
+def run_batch(worker_id=None, batch_size=None):
+    """Claim and run one batch. Returns the number of tasks it contained."""
+    batch = _claim(worker_id or _worker_id(), batch_size or settings.TASK_BATCH_SIZE)
+    if not batch:
+        return 0
+    name = batch[0].name
+    handler = registry.get(name)
+    try:
+        if handler is None:
+            raise LookupError(f'No task handler is registered as {name!r}.')
+        with transaction.atomic():
+            handler([t.payload for t in batch])
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Task batch %s (%d tasks) failed', name, len(batch))
+        max_attempts = getattr(handler, 'max_attempts', 1)
+        for t in batch:
+            t.attempts += 1
+            t.last_error = error
+            t.locked_at, t.locked_by = None, ''
+            if t.attempts >= max_attempts:
+                t.status = Task.FAILED
+            else:
+                t.status = Task.QUEUED
+                # Exponential backoff: 2, 4, 8... seconds.
+                t.run_at = timezone.now() + timedelta(seconds=2 ** t.attempts)
+        Task.objects.bulk_update(batch, ['attempts', 'last_error', 'locked_at', 'locked_by', 'status', 'run_at'])
+    else:
+        Task.objects.filter(pk__in=[t.pk for t in batch]).delete()
+    return len(batch)
+
+
+def run_pending(batch_size=None):
+    """Run every task that is due now, in this thread. Returns the task count."""
+    total = 0
+    while True:
+        done = run_batch(batch_size=batch_size)
+        if not done:
+            return total
+        total += done
+
+
+class Worker(threading.Thread):
+    """Polls for due tasks until ``stop`` is set."""
+
+    def __init__(self, stop, batch_size, poll_seconds):
+        super().__init__(daemon=True)
+        self.stop, self.batch_size, self.poll_seconds = stop, batch_size, poll_seconds
+
+    def run(self):
+        worker_id = _worker_id()
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                if not run_batch(worker_id, self.batch_size):
+                    self.stop.wait(self.poll_seconds)
+        finally:
+            connection.close()
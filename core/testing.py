@@ -0,0 +1,91 @@
+import contextlib
+import importlib
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, resolve
+
+from core import tasks
+
+URLCONFS = ('accounts.urls', 'employee.urls', 'core.urls')
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the suite with every file-based cache moved to a scratch directory,
+    so tests that clear a cache never touch a server's on the same host.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._scratch = tempfile.TemporaryDirectory(prefix='ees-test-caches-')
+        caches = {
+            alias: {**config, 'LOCATION': f'{self._scratch.name}/{alias}'} if 'FileBasedCache' in config['BACKEND']
+            else config
+            for alias, config in settings.CACHES.items()
+        }
+        self._caches = override_settings(CACHES=caches)
+        self._caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.disable()
+        self._scratch.cleanup()
+        super().teardown_test_environment(**kwargs)
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin that fails when a view runs more queries than it declared
+    with core.metrics.query_budget, so N+1 regressions break the build.
+    """
+
+    def assertWithinQueryBudget(self, url, method='get', data=None):
+        view = resolve(url.split('?')[0]).func
+        budget = getattr(view, 'query_budget', None)
+        if budget is None:
+            self.fail(f'{view.__module__}.{view.__name__} declares no query budget.')
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(url, data or {})
+        self.assertLessEqual(
+            len(captured), budget,
+            f'{url} ran {len(captured)} queries, over its budget of {budget}:\n'
+            + '\n'.join(query['sql'] for query in captured.captured_queries),
+        )
+        return response
+
+
+class AsyncViewsMixin:
+    """
+    TestCase mixin that serves the async view variants (settings.ASYNC_VIEWS),
+    which are chosen when the URLconfs are imported.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.enterClassContext(override_settings(ASYNC_VIEWS=True))
+        cls._reload_urlconfs()
+        cls.addClassCleanup(cls._reload_urlconfs)
+
+    @staticmethod
+    def _reload_urlconfs():
+        for name in URLCONFS:
+            importlib.reload(importlib.import_module(name))
+        clear_url_caches()
+
+
+class TaskQueueMixin:
+    """
+    TestCase mixin for code that enqueues background tasks: TestCase never
+    commits, so on_commit enqueues are captured and the queue is drained here.
+    """
+
+    @contextlib.contextmanager
+    def runTasks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            yield
+        tasks.run_pending()
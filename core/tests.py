@@ -0,0 +1,166 @@
+import io
+import os
+import runpy
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import OperationalError, connections
+from django.db.utils import ConnectionHandler
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import tasks
+from .models import Task
+from .testing import TaskQueueMixin
+from .warmup import warm_database_threads
+
+
+class TaskQueueTests(TaskQueueMixin, TestCase):
+    def setUp(self):
+        self.calls = []
+        tasks.task('test.record')(lambda payloads: self.calls.append(payloads))
+        self.addCleanup(tasks.registry.pop, 'test.record')
+
+    def test_tasks_are_queued_on_commit_and_batched_by_name(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for n in range(3):
+                tasks.enqueue('test.record', {'n': n})
+            self.assertFalse(Task.objects.exists())
+        self.assertEqual(Task.objects.count(), 3)
+        self.assertEqual(tasks.run_pending(), 3)
+        self.assertEqual(self.calls, [[{'n': 0}, {'n': 1}, {'n': 2}]])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failures_are_retried_then_kept(self):
+        Task.objects.create(name='test.record', payload={'n': 1})
+        failing = mock.Mock(side_effect=RuntimeError, max_attempts=2)
+        with mock.patch.dict(tasks.registry, {'test.record': failing}), self.assertLogs('core.tasks', 'ERROR'):
+            self.assertEqual(tasks.run_pending(), 1)
+            task = Task.objects.get()
+            self.assertEqual((task.status, task.attempts), (Task.QUEUED, 1))
+            self.assertGreater(task.run_at, timezone.now())
+            Task.objects.update(run_at=timezone.now())
+            tasks.run_pending()
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, 2))
+        self.assertIn('RuntimeError', task.last_error)
+
+    def test_tasks_claimed_by_another_worker_meanwhile_are_dropped(self):
+        batch = [Task.objects.create(name='test.record', payload={'n': n}) for n in range(3)]
+        # Another thread claimed the second one after this worker read the batch.
+        Task.objects.filter(pk=batch[1].pk).update(status=Task.RUNNING, locked_by='other')
+        claimed = tasks._mark_running(batch, 'me', timezone.now())
+        self.assertEqual([t.pk for t in claimed], [batch[0].pk, batch[2].pk])
+        self.assertEqual(Task.objects.get(pk=batch[1].pk).locked_by, 'other')
+
+    def test_run_worker_once_drains_the_queue(self):
+        Task.objects.create(name='test.record', payload={'n': 1})
+        out = io.StringIO()
+        call_command('run_worker', '--once', stdout=out)
+        self.assertIn('Ran 1 task(s).', out.getvalue())
+        self.assertEqual(self.calls, [[{'n': 1}]])
+
+
+def profile_databases(profile, **env):
+    """DATABASES as core/settings.py builds it for DB_PROFILE=``profile``."""
+    with mock.patch.dict(os.environ, {'DB_PROFILE': profile, 'PG_PWD': 'secret', **env}):
+        return runpy.run_path(settings.BASE_DIR / 'core' / 'settings.py')['DATABASES']
+
+
+class DatabaseProfileTests(TestCase):
+    def test_every_profile_builds_a_usable_databases_setting(self):
+        for profile, engine in [
+            ('sqlite', 'sqlite3'), ('sqlite-wal', 'sqlite3'), ('postgres', 'postgresql'), ('postgres-pool', 'postgresql'),
+        ]:
+            with self.subTest(profile=profile):
+                databases = ConnectionHandler(profile_databases(profile))
+                wrapper = databases['default']
+                self.assertEqual(wrapper.settings_dict['ENGINE'], f'django.db.backends.{engine}')
+                if profile == 'postgres':
+                    self.assertEqual(wrapper.settings_dict['CONN_MAX_AGE'], 600)
+                    self.assertEqual(wrapper.get_connection_params()['password'], 'secret')
+                elif profile == 'postgres-pool':
+                    # The pool owns the connections, so Django must not keep them.
+                    self.assertEqual(wrapper.settings_dict['CONN_MAX_AGE'], 0)
+                    self.assertLessEqual(
+                        wrapper.settings_dict['OPTIONS']['pool']['min_size'],
+                        wrapper.settings_dict['OPTIONS']['pool']['max_size'],
+                    )
+                else:
+                    self.assertTrue(wrapper.get_connection_params()['database'])
+
+    def test_unknown_profile_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            profile_databases('mysql')
+
+    def test_sqlite_wal_profile_switches_the_journal_to_wal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            databases = ConnectionHandler(profile_databases(
+                'sqlite-wal', SQLITE_PATH=os.path.join(directory, 'wal.sqlite3'), SQLITE_BUSY_TIMEOUT_MS='1234',
+            ))
+            wal = databases['default']
+            try:
+                with wal.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], 1234)
+                    cursor.execute('PRAGMA synchronous')
+                    self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            finally:
+                wal.close()
+
+    def test_sqlite_transactions_take_the_write_lock_up_front(self):
+        # decide() reads the pending rows and then writes. Two deferred
+        # transactions doing that at once cannot upgrade their read locks, and
+        # SQLite fails one at once; an IMMEDIATE one makes the other wait.
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict = profile_databases('sqlite', SQLITE_PATH=os.path.join(directory, 'db.sqlite3'))
+            settings_dict['default']['OPTIONS']['timeout'] = 0.1
+            first, second = ConnectionHandler(settings_dict)['default'], ConnectionHandler(settings_dict)['default']
+            try:
+                first.cursor().execute('CREATE TABLE t (x integer)')
+                second.ensure_connection()
+                first._start_transaction_under_autocommit()  # what atomic() runs
+                first.cursor().execute('SELECT count(*) FROM t')
+                with self.assertRaisesMessage(OperationalError, 'database is locked'):
+                    second._start_transaction_under_autocommit()
+                first.connection.commit()
+                second._start_transaction_under_autocommit()
+                second.cursor().execute('INSERT INTO t VALUES (1)')
+                second.connection.commit()
+            finally:
+                first.close()
+                second.close()
+
+
+class DatabaseWarmupTests(TestCase):
+    def in_each_thread(self, pool, function):
+        barrier = threading.Barrier(2)
+
+        def run():
+            barrier.wait()
+            return function()
+
+        return [future.result() for future in [pool.submit(run) for _ in range(2)]]
+
+    def test_requests_in_gthread_threads_use_the_warmed_connection(self):
+        def request_keeps_connection():
+            warmed = connections['default'].connection
+            Client().get(reverse('login'))
+            return warmed is not None and connections['default'].connection is warmed
+
+        # As with the postgres profile; the test database does not persist its connections.
+        with mock.patch.dict(connections.settings['default'], CONN_MAX_AGE=600), \
+                ThreadPoolExecutor(max_workers=2) as pool:
+            try:
+                warm_database_threads(pool, 2)
+                self.assertEqual(self.in_each_thread(pool, request_keeps_connection), [True, True])
+            finally:
+                self.in_each_thread(pool, connections.close_all)
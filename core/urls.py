@@ -1,7 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from . import views
+
 urlpatterns = [
+    path('admin/metrics/', views.view_metrics_view, name='view_metrics'),
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),  # if applicable
+    path('employee/', include('employee.urls')),
+    path('api/v1/', include('employee.api')),
 ]
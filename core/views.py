@@ -1 +1,10 @@
-from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .metrics import registry
+
+
+@staff_member_required
+def view_metrics_view(request):
+    # Per-view query counts and timings recorded by this process.
+    return JsonResponse({'views': registry.summary()})
@@ -0,0 +1,81 @@
+# Start-up warm-up for production servers (see core/gunicorn_conf.py).
+# Django builds the URL resolver's lookup tables and compiles templates
+# lazily, so without this the first requests each worker serves pay for it.
+# warm_up() runs in the gunicorn master after the app is preloaded, so every
+# worker inherits the result copy-on-write. Database connections cannot be
+# shared across fork(), so warm_database() runs in each worker instead, in
+# the threads that will serve its requests: Django's connections belong to
+# a thread.
+import logging
+import threading
+import time
+from pathlib import Path
+
+from django.db import connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def warm_urls():
+    """Populate the resolver used by resolve() and reverse(). Returns the number of view names."""
+    return len(get_resolver().reverse_dict)
+
+
+def _template_names(engine):
+    for directory in engine.template_dirs:
+        directory = Path(directory)
+        for path in sorted(directory.rglob('*.html')):
+            yield path.relative_to(directory).as_posix()
+
+
+def warm_templates():
+    """
+    Compile every .html template the engines can find. Only lasting with
+    the cached template loader, which Django uses when DEBUG is off.
+    Returns the number compiled.
+    """
+    compiled = 0
+    for engine in engines.all():
+        for name in _template_names(engine):
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError):
+                # Partials for other engines, or fragments never loaded directly.
+                continue
+            compiled += 1
+    return compiled
+
+
+def warm_up():
+    """Build what every worker would otherwise build on its first requests."""
+    started = time.perf_counter()
+    urls = warm_urls()
+    templates = warm_templates()
+    logger.info('Warmed %d URL names and %d templates in %.0f ms',
+                urls, templates, (time.perf_counter() - started) * 1000)
+    return {'urls': urls, 'templates': templates}
+
+
+def warm_database():
+    """Open this thread's connection to every database (or fill its pool)."""
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def warm_database_threads(executor, count):
+    """
+    Run warm_database() in each of the ``count`` threads of ``executor``
+    (gunicorn's gthread pool), so the first request in each thread finds its
+    connection open. Only lasting with persistent connections (CONN_MAX_AGE).
+    """
+    # Each call waits for the others, so no thread can take two of them.
+    barrier = threading.Barrier(count)
+
+    def warm():
+        barrier.wait()
+        warm_database()
+
+    for future in [executor.submit(warm) for _ in range(count)]:
+        future.result()
@@ -2,6 +2,8 @@
 WSGI config for core project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+In production gunicorn serves it with core/gunicorn_conf.py, which imports
+it once in the master process and forks the workers from there.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
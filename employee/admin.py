@@ -1,5 +1,130 @@
 from django.contrib import admin
-from .models import Employee, LeaveRequest
 
-# Register your models here.
-admin.site.register([Employee, LeaveRequest])
\ No newline at end of file
+from core.paginator import EstimatedCountPaginator
+from .models import ArchivedLeaveRequest, Employee, LeaveBalance, LeaveRequest, LeaveStatusEvent
+
+
+@admin.action(description='Approve selected leave requests')
+def approve_requests(modeladmin, request, queryset):
+    updated = queryset.decide('Approved', actor=request.user)
+    modeladmin.message_user(request, f'{updated} leave request(s) approved.')
+
+
+@admin.action(description='Reject selected leave requests')
+def reject_requests(modeladmin, request, queryset):
+    updated = queryset.decide('Rejected', actor=request.user)
+    modeladmin.message_user(request, f'{updated} leave request(s) rejected.')
+
+
+@admin.register(Employee)
+class EmployeeAdmin(admin.ModelAdmin):
+    list_display = ['username', 'full_name', 'department', 'position', 'is_employer', 'date_of_hire']
+    # __str__ and the name columns read the user; join it into the page query.
+    list_select_related = ['user']
+    list_filter = ['department', 'is_employer']
+    # Also what the employee autocomplete on LeaveRequestAdmin searches.
+    search_fields = ['user__username', 'user__first_name', 'user__last_name', 'user__email']
+    autocomplete_fields = ['user']
+    ordering = ['id']
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) Django runs for filtered pages.
+    show_full_result_count = False
+
+    @admin.display(ordering='user__username')
+    def username(self, obj):
+        return obj.user.username
+
+    @admin.display(ordering='user__last_name')
+    def full_name(self, obj):
+        return obj.user.get_full_name()
+
+
+class LeaveStatusEventInline(admin.TabularInline):
+    model = LeaveStatusEvent
+    fields = readonly_fields = ['status', 'actor', 'created_at']
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('actor')
+
+
+@admin.register(LeaveRequest)
+class LeaveRequestAdmin(admin.ModelAdmin):
+    actions = [approve_requests, reject_requests]
+    list_display = ['employee_name', 'department', 'start_date', 'end_date', 'status', 'created_at']
+    list_select_related = ['employee__user']
+    # status and department are indexed, and so is each date together with
+    # status: (status, start_date) and (status, end_date).
+    list_filter = ['status', 'employee__department', 'start_date', 'end_date']
+    autocomplete_fields = ['employee']
+    # Matches the (status, created_at) index the default status filter uses.
+    ordering = ['-created_at', '-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    inlines = [LeaveStatusEventInline]
+    # Status only changes through the actions, which record it in the
+    # request's status history.
+    readonly_fields = ['status', 'decided_at']
+
+    def get_readonly_fields(self, request, obj=None):
+        # Decided requests are settled: their days are in the leave balance
+        # ledger, which a later edit would leave behind.
+        if obj is not None and obj.status != 'Pending':
+            return [*self.readonly_fields, 'employee', 'start_date', 'end_date']
+        return self.readonly_fields
+
+    @admin.display(ordering='employee__user__last_name', description='Employee')
+    def employee_name(self, obj):
+        return obj.employee.user.get_full_name() or obj.employee.user.username
+
+    @admin.display(ordering='employee__department')
+    def department(self, obj):
+        return obj.employee.department
+
+
+@admin.register(ArchivedLeaveRequest)
+class ArchivedLeaveRequestAdmin(admin.ModelAdmin):
+    # Read-only: rows only arrive through `manage.py archive_leave`.
+    list_display = ['employee_name', 'start_date', 'end_date', 'status', 'created_at', 'archived_at']
+    list_select_related = ['employee__user']
+    list_filter = ['status', 'start_date']
+    ordering = ['-created_at', '-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(ordering='employee__user__last_name', description='Employee')
+    def employee_name(self, obj):
+        return obj.employee.user.get_full_name() or obj.employee.user.username
+
+
+@admin.register(LeaveBalance)
+class LeaveBalanceAdmin(admin.ModelAdmin):
+    list_display = ['employee_name', 'department', 'year', 'entitlement', 'taken', 'remaining']
+    list_select_related = ['employee__user']
+    list_filter = ['year', 'employee__department']
+    search_fields = ['employee__user__username', 'employee__user__last_name']
+    autocomplete_fields = ['employee']
+    ordering = ['-year', 'employee_id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Entitlements are set here; taken follows approvals (and
+    # `manage.py recompute_leave_balances`).
+    readonly_fields = ['taken']
+
+    @admin.display(ordering='employee__user__last_name', description='Employee')
+    def employee_name(self, obj):
+        return obj.employee.user.get_full_name() or obj.employee.user.username
+
+    @admin.display(ordering='employee__department')
+    def department(self, obj):
+        return obj.employee.department
@@ -0,0 +1,213 @@
+# Leave-trend analytics for employers.
+#
+# Charts read LeaveRollup, a monthly summary per employee and status, rather
+# than grouping LeaveRequest on every request. refresh_rollups() keeps it
+# current incrementally: only the months that hold requests filed or decided
+# since the last run (its created_at/decided_at watermarks) are recomputed,
+# and each of those months is rebuilt whole, so re-running is harmless.
+# Requests that are deleted, or edited without being re-decided, are picked
+# up by a full rebuild (`manage.py refresh_leave_rollups --full`). Rebuilt
+# months always include archived requests, so archiving changes no figures.
+# Working days are counted the way the leave balances count them, so a
+# department's days for a year add up to its members' ledgers.
+from datetime import date, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .holidays import holidays
+from .models import ArchivedLeaveRequest, LeaveRequest, LeaveRollup, RollupWatermark
+
+WATERMARK = 'leave'
+
+# Rows are re-read this far behind the watermarks, so a request whose
+# created_at was stamped before a refresh but committed after it is not
+# missed. Rebuilding a month twice is idempotent.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def business_days(start_dates, end_dates, holidays=()):
+    """Working days (Mon-Fri, minus ``holidays``) in each inclusive range."""
+    starts = np.asarray(start_dates, dtype='datetime64[D]')
+    ends = np.asarray(end_dates, dtype='datetime64[D]') + np.timedelta64(1, 'D')
+    return np.busday_count(starts, ends, holidays=np.asarray(holidays, dtype='datetime64[D]'))
+
+
+def _next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def rebuild_month(month):
+    """
+    Replace the rollup rows of ``month`` (a first-of-month date). Requests,
+    decisions and latency count towards the month a request starts in;
+    working days towards the month they fall in, net of public holidays
+    like the leave balances (employee.balances), so leave that runs into
+    the next month adds its remaining days there.
+    """
+    fields = ('employee_id', 'employee__department', 'status', 'start_date', 'end_date', 'created_at', 'decided_at')
+    last_day = _next_month(month) - timedelta(days=1)
+    rows = [
+        row
+        for model in (LeaveRequest, ArchivedLeaveRequest)
+        for row in model.objects.filter(start_date__lte=last_day, end_date__gte=month).values_list(*fields)
+    ]
+    LeaveRollup.objects.filter(month=month).delete()
+    if not rows:
+        return 0
+
+    employee_ids, departments, statuses, starts, ends, created, decided = zip(*rows)
+    starts_here = np.array([start >= month for start in starts])
+    days = business_days(
+        [max(start, month) for start in starts], [min(end, last_day) for end in ends], holidays(month.year),
+    )
+    status_names, status_codes = np.unique(np.array(statuses), return_inverse=True)
+    created_at = np.fromiter((moment.timestamp() for moment in created), float, len(rows))
+    decided_at = np.fromiter((moment.timestamp() if moment else np.nan for moment in decided), float, len(rows))
+    is_decided = ~np.isnan(decided_at) & starts_here
+    latency = np.where(is_decided, (decided_at - created_at) / 3600, 0.0)
+
+    keys = np.column_stack([np.array(employee_ids), status_codes])
+    groups, first, group_of = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    group_of = group_of.ravel()
+    counts = np.bincount(group_of, weights=starts_here)
+    day_totals = np.bincount(group_of, weights=days)
+    decided_counts = np.bincount(group_of, weights=is_decided)
+    latency_totals = np.bincount(group_of, weights=latency)
+
+    LeaveRollup.objects.bulk_create([
+        LeaveRollup(
+            month=month,
+            department=departments[first[i]],
+            employee_id=int(employee_id),
+            status=str(status_names[status_code]),
+            requests=int(counts[i]),
+            business_days=int(day_totals[i]),
+            decided=int(decided_counts[i]),
+            latency_hours=float(latency_totals[i]),
+        )
+        for i, (employee_id, status_code) in enumerate(groups)
+    ], batch_size=1000)
+    return len(groups)
+
+
+def _months_spanned(queryset):
+    """Every month from a request's start to its end, over ``queryset``, in order."""
+    months = set()
+    spans = queryset.values_list(TruncMonth('start_date'), TruncMonth('end_date')).order_by().distinct()
+    for month, last in spans:
+        while month <= last:
+            months.add(month)
+            month = _next_month(month)
+    return sorted(months)
+
+
+def refresh_rollups(full=False):
+    """
+    Bring LeaveRollup up to date and return the number of months rebuilt.
+
+    With ``full`` every month is rebuilt from scratch; otherwise only months
+    with requests filed or decided since the watermarks.
+    """
+    with transaction.atomic():
+        mark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=WATERMARK)
+        changed = LeaveRequest.objects.all()
+        if full or mark.created_at is None:
+            LeaveRollup.objects.all().delete()
+        else:
+            since = Q(created_at__gt=mark.created_at - WATERMARK_OVERLAP)
+            if mark.decided_at is not None:
+                since |= Q(decided_at__gt=mark.decided_at - WATERMARK_OVERLAP)
+            changed = changed.filter(since)
+
+        latest = changed.aggregate(created_at=Max('created_at'), decided_at=Max('decided_at'))
+        months = _months_spanned(changed)
+        for month in months:
+            rebuild_month(month)
+
+        for field, value in latest.items():
+            current = getattr(mark, field)
+            if value is not None and (current is None or value > current):
+                setattr(mark, field, value)
+        mark.save()
+    return len(months)
+
+
+def _per_month(queryset, by_department):
+    keys = ['month', 'department'] if by_department else ['month']
+    return queryset.values(*keys).order_by(*keys)
+
+
+def _point(row):
+    point = {'month': row['month'].strftime('%Y-%m')}
+    if 'department' in row:
+        point['department'] = row['department']
+    return point
+
+
+def trend(queryset, by_department=False):
+    """Requests and business days per month and status."""
+    keys = ['month', 'department', 'status'] if by_department else ['month', 'status']
+    rows = queryset.values(*keys).annotate(
+        requests=Sum('requests'), business_days=Sum('business_days'),
+    ).order_by(*keys)
+    return [
+        {**_point(row), 'status': row['status'], 'requests': row['requests'], 'business_days': row['business_days']}
+        for row in rows
+    ]
+
+
+def approval_rate(queryset, by_department=False):
+    """Share of decided requests that were approved, per month."""
+    rows = _per_month(queryset, by_department).annotate(
+        approved=Sum('requests', filter=Q(status='Approved'), default=0),
+        rejected=Sum('requests', filter=Q(status='Rejected'), default=0),
+    )
+    return [
+        {
+            **_point(row),
+            'approved': row['approved'],
+            'rejected': row['rejected'],
+            'rate': round(row['approved'] / (row['approved'] + row['rejected']), 4)
+            if row['approved'] + row['rejected'] else None,
+        }
+        for row in rows
+    ]
+
+
+def approval_latency(queryset, by_department=False):
+    """Mean hours from filing to decision, per month."""
+    rows = _per_month(queryset, by_department).annotate(
+        decided=Sum('decided'), hours=Sum('latency_hours'),
+    )
+    return [
+        {
+            **_point(row),
+            'decided': row['decided'],
+            'mean_hours': round(row['hours'] / row['decided'], 2) if row['decided'] else None,
+        }
+        for row in rows
+    ]
+
+
+SERIES = {
+    'trend': trend,
+    'approval-rate': approval_rate,
+    'approval-latency': approval_latency,
+}
+
+
+def series(name, first_month, last_month, department=None, by_department=False):
+    """Points of series ``name`` for the months first_month..last_month."""
+    queryset = LeaveRollup.objects.filter(month__gte=first_month, month__lte=last_month)
+    if department:
+        queryset = queryset.filter(department=department)
+    return SERIES[name](queryset, by_department)
+
+
+def default_range(today=None):
+    """The twelve months up to and including the current one."""
+    last = (today or date.today()).replace(day=1)
+    return _next_month(last.replace(year=last.year - 1)), last
@@ -0,0 +1,124 @@
+# Read-only JSON API for integrations and dashboards (I2), mounted at
+# /api/v1/. Clients poll it, so every list carries a weak ETag and a
+# Last-Modified taken from a ChangeCounter row that is bumped with each
+# change; a poll that sends them back gets a 304 after a single-row read,
+# without querying or serialising any leave or employee rows.
+import hashlib
+from functools import wraps
+
+from django.http import JsonResponse
+from django.urls import path
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+
+from accounts.decorators import employer_required
+from core.metrics import query_budget
+from core.models import ChangeCounter
+from . import exports
+from .pagination import DEFAULT_PAGE_SIZE, id_page, keyset_page
+
+LEAVE_FIELDS = dict(exports.LEAVE_COLUMNS, employee_id='employee_id', decided_at='decided_at')
+EMPLOYEE_FIELDS = dict(exports.EMPLOYEE_COLUMNS)
+
+
+def _counter(request, name):
+    # condition() asks for the ETag and Last-Modified separately; read once.
+    cache = request.__dict__.setdefault('_change_counters', {})
+    if name not in cache:
+        cache[name] = ChangeCounter.current(name)
+    return cache[name]
+
+
+def _etag(name):
+    def etag(request, *args, **kwargs):
+        # Same data version and same query (filters, fields, cursor) means
+        # the same body.
+        query = hashlib.md5(request.GET.urlencode().encode(), usedforsecurity=False).hexdigest()[:12]
+        return f'W/"{name}-{_counter(request, name).version}-{query}"'
+    return etag
+
+
+def _last_modified(name):
+    def last_modified(request, *args, **kwargs):
+        return _counter(request, name).changed_at
+    return last_modified
+
+
+def _filtered(kind):
+    """
+    Parse the export filters of ``kind`` into ``request.export_filters``, or
+    answer 400. Goes above condition(), so a bad query never gets an ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                request.export_filters = exports.parse_filters(kind, request.GET)
+            except ValueError as exc:
+                return JsonResponse({'error': str(exc)}, status=400)
+            # Pages are keyset-paginated, which a union with the archive is not.
+            if request.export_filters.get('include_archive'):
+                return JsonResponse({'error': 'include_archive is not supported by the API.'}, status=400)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _selected_fields(request, available):
+    """The ``fields`` query parameter as a list, or every field; ValueError on unknown names."""
+    requested = [name.strip() for name in request.GET.get('fields', '').split(',') if name.strip()]
+    unknown = set(requested) - set(available)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}. Choose from {', '.join(available)}.")
+    return requested or list(available)
+
+
+def _page_size(request):
+    try:
+        return int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return DEFAULT_PAGE_SIZE
+
+
+def _list(request, available, queryset, paginate, sort_key):
+    try:
+        fields = _selected_fields(request, available)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    lookups = [available[name] for name in fields]
+    # The sort key is always read, since the cursor is built from it.
+    queryset = queryset.values(*sort_key, *lookups)
+    rows, next_cursor = paginate(queryset, request.GET.get('cursor'), _page_size(request))
+    return JsonResponse({
+        'results': [{name: row[lookup] for name, lookup in zip(fields, lookups)} for row in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+@query_budget(4)
+@require_GET
+@employer_required
+@cache_control(private=True, no_cache=True)
+@_filtered('leave')
+@condition(etag_func=_etag('leave'), last_modified_func=_last_modified('leave'))
+def leave_list_view(request):
+    queryset = exports.leave_queryset(**request.export_filters)
+    return _list(request, LEAVE_FIELDS, queryset, keyset_page, ('created_at', 'id'))
+
+
+@query_budget(4)
+@require_GET
+@employer_required
+@cache_control(private=True, no_cache=True)
+@_filtered('employees')
+@condition(etag_func=_etag('employee'), last_modified_func=_last_modified('employee'))
+def employee_list_view(request):
+    queryset = exports.employee_queryset(**request.export_filters)
+    return _list(request, EMPLOYEE_FIELDS, queryset, id_page, ('id',))
+
+
+urlpatterns = [
+    path('leave/', leave_list_view, name='api_leave_list'),
+    path('employees/', employee_list_view, name='api_employee_list'),
+]
@@ -0,0 +1,124 @@
+# Hot/cold archival of leave requests.
+#
+# archive_leave() moves decided requests that have ended and were filed
+# before a cutoff from LeaveRequest into ArchivedLeaveRequest, one bounded
+# batch per transaction: each batch is copied (with its status history folded
+# into the archive row) and deleted in the same transaction, so an
+# interrupted run leaves every request in exactly one of the two tables and
+# the next run simply carries on. Rows are only locked for one batch; on
+# PostgreSQL rows someone else holds are skipped and left for the next run.
+import time
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import ChangeCounter
+
+from .models import ArchivedLeaveRequest, DailyAbsence, LeaveRequest, LeaveStatusEvent
+
+ARCHIVED_STATUSES = ('Approved', 'Rejected')
+
+
+def default_cutoff():
+    return timezone.now() - timedelta(days=settings.LEAVE_ARCHIVE_AFTER_DAYS)
+
+
+def archivable(cutoff):
+    """Decided requests filed before ``cutoff`` whose leave ended before it."""
+    return LeaveRequest.objects.filter(
+        status__in=ARCHIVED_STATUSES, created_at__lt=cutoff, end_date__lt=timezone.localdate(cutoff),
+    )
+
+
+def _is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)',
+            [ArchivedLeaveRequest._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def _ensure_partitions(leave_requests):
+    # One partition per calendar year (UTC) of created_at, created on demand.
+    table = ArchivedLeaveRequest._meta.db_table
+    years = sorted({leave.created_at.astimezone(dt_timezone.utc).year for leave in leave_requests})
+    with connection.cursor() as cursor:
+        for year in years:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table}_{year} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{year}-01-01 00:00+00') TO ('{year + 1}-01-01 00:00+00')"
+            )
+
+
+def _events_by_request(ids):
+    events = defaultdict(list)
+    for event in LeaveStatusEvent.objects.filter(leave_request__in=ids).timeline_order():
+        events[event.leave_request_id].append({
+            'status': event.status,
+            'at': event.created_at.isoformat(),
+            'actor_id': event.actor_id,
+            'actor': event.actor.username if event.actor else None,
+        })
+    return events
+
+
+def archive_batch(cutoff, batch_size, partitioned=False):
+    """Move up to ``batch_size`` archivable requests in one transaction. Returns how many moved."""
+    lock = {'skip_locked': True} if connection.features.has_select_for_update_skip_locked else {}
+    with transaction.atomic():
+        batch = list(archivable(cutoff).select_for_update(**lock).order_by('id')[:batch_size])
+        if not batch:
+            return 0
+        ids = [leave.pk for leave in batch]
+        events = _events_by_request(ids)
+        if partitioned:
+            _ensure_partitions(batch)
+        ArchivedLeaveRequest.objects.bulk_create([
+            ArchivedLeaveRequest(
+                id=leave.pk,
+                employee_id=leave.employee_id,
+                start_date=leave.start_date,
+                end_date=leave.end_date,
+                reason=leave.reason,
+                status=leave.status,
+                created_at=leave.created_at,
+                decided_at=leave.decided_at,
+                events=events[leave.pk],
+            )
+            for leave in batch
+        ])
+        LeaveStatusEvent.objects.filter(leave_request__in=ids).delete()
+        DailyAbsence.objects.filter(leave_request__in=ids).delete()
+        # A plain DELETE: the ORM would otherwise run LeaveRequest's
+        # post_delete receivers once per row; the counter is bumped once below.
+        LeaveRequest.objects.filter(pk__in=ids)._raw_delete(LeaveRequest.objects.db)
+        ChangeCounter.bump('leave')
+    return len(batch)
+
+
+def archive_leave(cutoff=None, batch_size=None, pause=0, max_batches=None):
+    """
+    Archive requests older than ``cutoff`` (default: LEAVE_ARCHIVE_AFTER_DAYS
+    ago) batch by batch, sleeping ``pause`` seconds in between so other
+    writers get the database. Stops after ``max_batches`` if given. Returns
+    the number of requests archived.
+    """
+    cutoff = cutoff or default_cutoff()
+    batch_size = batch_size or settings.LEAVE_ARCHIVE_BATCH_SIZE
+    partitioned = _is_partitioned()
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size, partitioned)
+        if not moved:
+            break
+        total += moved
+        batches += 1
+        if pause:
+            time.sleep(pause)
+    return total
@@ -0,0 +1,152 @@
+# Leave balances: working days of approved leave per employee and calendar
+# year, against their entitlement, kept in LeaveBalance.
+#
+# record_taken() adjusts the ledger incrementally inside the transaction
+# that approves (or withdraws) leave. recompute() rebuilds it for a year
+# and/or department from the approved requests themselves, live and
+# archived, counting working days for all of them at once with numpy like
+# the analytics rollups. Leave that spans New Year counts towards each year
+# for the days that fall in it.
+from collections import defaultdict
+from datetime import date
+from functools import reduce
+from operator import or_
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from .analytics import business_days
+from .holidays import holidays
+from .models import ArchivedLeaveRequest, Employee, LeaveBalance, LeaveRequest
+
+
+def _year_bounds(year):
+    return date(year, 1, 1), date(year, 12, 31)
+
+
+def days_by_year(start_date, end_date):
+    """Working days in the inclusive range, per calendar year it touches."""
+    days = {}
+    for year in range(start_date.year, end_date.year + 1):
+        first, last = _year_bounds(year)
+        days[year] = int(business_days([max(start_date, first)], [min(end_date, last)], holidays(year))[0])
+    return days
+
+
+def record_taken(rows, sign=1):
+    """
+    Add the working days of ``rows`` (``(employee_id, start_date,
+    end_date)`` tuples) to their balances, or take them off with ``sign=-1``.
+    Call it inside the transaction that changes the requests' status.
+    Withdrawals only touch balances that exist, so a cascade deleting an
+    employee's leave does not bring back the balances it just deleted.
+    """
+    totals = defaultdict(int)
+    for employee_id, start_date, end_date in rows:
+        for year, days in days_by_year(start_date, end_date).items():
+            totals[employee_id, year] += sign * days
+    totals = {key: days for key, days in totals.items() if days}
+    if not totals:
+        return
+    if sign > 0:
+        LeaveBalance.objects.bulk_create(
+            [LeaveBalance(employee_id=employee_id, year=year) for employee_id, year in totals], ignore_conflicts=True,
+        )
+    # One UPDATE for the whole batch, adding each balance its own amount.
+    LeaveBalance.objects.filter(
+        reduce(or_, (Q(employee_id=employee_id, year=year) for employee_id, year in totals)),
+    ).update(taken=F('taken') + Case(
+        *(When(employee_id=employee_id, year=year, then=Value(days)) for (employee_id, year), days in totals.items()),
+        default=Value(0),
+    ))
+
+
+def current(user, year=None):
+    """
+    The balance of the employee behind ``user`` for ``year`` (default this
+    year), read with one query; unsaved, with the default entitlement, if
+    none is stored yet.
+    """
+    year = year or timezone.localdate().year
+    return LeaveBalance.objects.filter(employee__user=user, year=year).first() or LeaveBalance(year=year)
+
+
+async def acurrent(user, year=None):
+    """Async version of current() for async views."""
+    year = year or timezone.localdate().year
+    return await LeaveBalance.objects.filter(employee__user=user, year=year).afirst() or LeaveBalance(year=year)
+
+
+def available(employee_id, years, exclude=None):
+    """
+    Working days still free per year in ``years``: the remaining balance
+    less pending requests other than ``exclude`` (a LeaveRequest pk).
+    """
+    free = dict.fromkeys(years, settings.LEAVE_ANNUAL_ENTITLEMENT_DAYS)
+    for year, entitlement, taken in LeaveBalance.objects.filter(
+        employee_id=employee_id, year__in=years,
+    ).values_list('year', 'entitlement', 'taken'):
+        free[year] = entitlement - taken
+    pending = LeaveRequest.objects.filter(
+        employee_id=employee_id, status='Pending',
+        start_date__lte=_year_bounds(max(years))[1], end_date__gte=_year_bounds(min(years))[0],
+    )
+    if exclude:
+        pending = pending.exclude(pk=exclude)
+    for start_date, end_date in pending.values_list('start_date', 'end_date'):
+        for year, days in days_by_year(start_date, end_date).items():
+            if year in free:
+                free[year] -= days
+    return free
+
+
+def recompute(year=None, department=None, batch_size=1000):
+    """
+    Rebuild ``taken`` from approved leave for every employee, or those in
+    ``department``, for ``year``, or for every year with approved leave and
+    the current one. Entitlements are kept. Returns the balances written.
+    """
+    from .signals import leave_balances_recomputed
+
+    employees = Employee.objects.all()
+    if department:
+        employees = employees.filter(department=department)
+    rows = []
+    for model in (LeaveRequest, ArchivedLeaveRequest):
+        approved = model.objects.filter(status='Approved', employee__in=employees)
+        if year:
+            first, last = _year_bounds(year)
+            approved = approved.filter(start_date__lte=last, end_date__gte=first)
+        rows.extend(approved.values_list('employee_id', 'start_date', 'end_date'))
+
+    employee_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    starts = np.array([row[1] for row in rows], dtype='datetime64[D]')
+    ends = np.array([row[2] for row in rows], dtype='datetime64[D]')
+    if year:
+        years = [year]
+    else:
+        touched = (y for _, start, end in rows for y in range(start.year, end.year + 1))
+        years = sorted({timezone.localdate().year, *touched})
+    people = list(employees.order_by('pk').values_list('pk', 'user_id'))
+    everyone = [pk for pk, _ in people]
+
+    written = 0
+    with transaction.atomic():
+        for each_year in years:
+            first, last = (np.datetime64(bound) for bound in _year_bounds(each_year))
+            clipped_starts, clipped_ends = np.maximum(starts, first), np.minimum(ends, last)
+            inside = clipped_starts <= clipped_ends
+            days = business_days(clipped_starts[inside], clipped_ends[inside], holidays(each_year))
+            ids, group_of = np.unique(employee_ids[inside], return_inverse=True)
+            totals = dict(zip(ids.tolist(), np.bincount(group_of, weights=days).astype(int).tolist()))
+            LeaveBalance.objects.bulk_create(
+                [LeaveBalance(employee_id=pk, year=each_year, taken=totals.get(pk, 0)) for pk in everyone],
+                update_conflicts=True, unique_fields=['employee', 'year'], update_fields=['taken'],
+                batch_size=batch_size,
+            )
+            written += len(everyone)
+        leave_balances_recomputed.send(sender=LeaveBalance, user_ids=[user_id for _, user_id in people])
+    return written
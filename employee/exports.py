@@ -0,0 +1,164 @@
+# Streaming exports of leave requests and employees for payroll.
+# Rows are read with QuerySet.iterator() over values_list() tuples, so neither
+# the queryset cache nor model instances ever hold the full result; memory use
+# stays flat however many rows are exported. On PostgreSQL iterator() also
+# uses a server-side cursor. Leave exports include archived requests only
+# when asked (include_archive), as a UNION ALL with the archive table.
+import csv
+import json
+
+from django.utils.dateparse import parse_date
+
+from .models import ArchivedLeaveRequest, Employee, LeaveRequest
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'ndjson')
+STATUSES = tuple(value for value, _ in LeaveRequest._meta.get_field('status').choices)
+# Filters that only mean something for leave; the employee export rejects them.
+LEAVE_ONLY_FILTERS = ('start_date', 'end_date', 'status', 'include_archive')
+
+LEAVE_COLUMNS = (
+    ('id', 'id'),
+    ('username', 'employee__user__username'),
+    ('first_name', 'employee__user__first_name'),
+    ('last_name', 'employee__user__last_name'),
+    ('department', 'employee__department'),
+    ('start_date', 'start_date'),
+    ('end_date', 'end_date'),
+    ('status', 'status'),
+    ('reason', 'reason'),
+    ('created_at', 'created_at'),
+)
+
+EMPLOYEE_COLUMNS = (
+    ('id', 'id'),
+    ('username', 'user__username'),
+    ('first_name', 'user__first_name'),
+    ('last_name', 'user__last_name'),
+    ('email', 'user__email'),
+    ('department', 'department'),
+    ('position', 'position'),
+    ('date_of_hire', 'date_of_hire'),
+    ('is_employer', 'is_employer'),
+    ('is_active', 'user__is_active'),
+)
+
+
+def _filter_leave(queryset, start_date, end_date, status, department):
+    if start_date:
+        queryset = queryset.filter(end_date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(start_date__lte=end_date)
+    if status:
+        queryset = queryset.filter(status=status)
+    if department:
+        queryset = queryset.filter(employee__department=department)
+    return queryset
+
+
+def leave_queryset(start_date=None, end_date=None, status=None, department=None, include_archive=False):
+    """
+    Leave requests overlapping the given date range, filtered by status and
+    department. With ``include_archive`` archived requests are added; the
+    result is then a union, so only values()/values_list() apply to it.
+    """
+    filters = (start_date, end_date, status, department)
+    queryset = _filter_leave(LeaveRequest.objects.all(), *filters)
+    if include_archive:
+        queryset = queryset.union(_filter_leave(ArchivedLeaveRequest.objects.all(), *filters), all=True)
+    return queryset.order_by('id')
+
+
+def employee_queryset(department=None):
+    queryset = Employee.objects.all()
+    if department:
+        queryset = queryset.filter(department=department)
+    return queryset.order_by('id')
+
+
+EXPORTS = {
+    'leave': (leave_queryset, LEAVE_COLUMNS),
+    'employees': (employee_queryset, EMPLOYEE_COLUMNS),
+}
+
+
+def check_filters(kind, **filters):
+    """
+    The ``filters`` that apply to export ``kind``, with unset ones dropped.
+    Raises ValueError when a leave-only filter is set for the employee
+    export, rather than exporting everyone.
+    """
+    filters = {name: value for name, value in filters.items() if value}
+    if kind == 'employees':
+        ignored = [name for name in LEAVE_ONLY_FILTERS if name in filters]
+        if ignored:
+            raise ValueError(f"{', '.join(ignored)} only apply to the leave export.")
+    return filters
+
+
+def _date_param(params, name):
+    value = params.get(name) or ''
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        # Well formed but impossible, such as 2025-02-30.
+        parsed = None
+    if value and parsed is None:
+        raise ValueError(f'{name} must be a valid date (YYYY-MM-DD).')
+    return parsed
+
+
+def parse_filters(kind, params):
+    """
+    Export filters for ``kind`` from query parameters (``start_date``,
+    ``end_date``, ``status``, ``department``, ``include_archive=1``).
+    Raises ValueError on bad dates, unknown statuses and filters that do
+    not apply, so a typo never turns into an unfiltered export.
+    """
+    status = params.get('status') or None
+    if status is not None and status not in STATUSES:
+        raise ValueError(f"status must be one of {', '.join(STATUSES)}.")
+    start_date, end_date = _date_param(params, 'start_date'), _date_param(params, 'end_date')
+    if start_date and end_date and start_date > end_date:
+        raise ValueError('start_date must not be after end_date.')
+    return check_filters(
+        kind,
+        start_date=start_date,
+        end_date=end_date,
+        status=status,
+        department=params.get('department') or None,
+        include_archive=params.get('include_archive') == '1',
+    )
+
+
+def iter_rows(kind, chunk_size=CHUNK_SIZE, **filters):
+    """Return ``(header, rows)`` for an export ``kind``; rows is a lazy iterator of tuples."""
+    build_queryset, columns = EXPORTS[kind]
+    queryset = build_queryset(**filters).values_list(*(lookup for _, lookup in columns))
+    return [name for name, _ in columns], queryset.iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _to_json(value):
+    return value if isinstance(value, (str, int, float, bool)) or value is None else value.isoformat()
+
+
+def stream(kind, fmt, chunk_size=CHUNK_SIZE, **filters):
+    """Yield the export as text chunks in ``fmt`` ('csv' or 'ndjson')."""
+    header, rows = iter_rows(kind, chunk_size=chunk_size, **filters)
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+    elif fmt == 'ndjson':
+        for row in rows:
+            yield json.dumps(dict(zip(header, map(_to_json, row)))) + '\n'
+    else:
+        raise ValueError(f"Unknown export format {fmt!r}.")
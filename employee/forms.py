@@ -5,7 +5,13 @@
 # Tooltips/help text provided for date fields.
 
 from django import forms
+
+from . import balances
 from .models import LeaveRequest
+
+OVERLAP_ERROR = "You already have leave booked during these dates."
+
+
 class LeaveRequestForm(forms.ModelForm):
     class Meta:
         model = LeaveRequest
@@ -20,6 +26,13 @@ class LeaveRequestForm(forms.ModelForm):
             'end_date': 'Select the end date of your leave.',
             'reason': 'Provide a detailed reason for your leave request.',
         }
+
+    def __init__(self, *args, employee=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if employee is None and self.instance.employee_id:
+            employee = self.instance.employee
+        self.employee = employee
+
     def clean(self):
         cleaned_data = super().clean()
         start_date = cleaned_data.get('start_date')
@@ -27,5 +40,32 @@ class LeaveRequestForm(forms.ModelForm):
 
         if start_date and end_date and start_date > end_date:
             raise forms.ValidationError("End date must be after start date.")
-        
-        return cleaned_data
\ No newline at end of file
+
+        if start_date and end_date and self.employee is not None:
+            # Indexed interval lookup on (employee, end_date, start_date).
+            overlapping = LeaveRequest.objects.filter(employee=self.employee).overlapping(start_date, end_date)
+            if self.instance.pk:
+                overlapping = overlapping.exclude(pk=self.instance.pk)
+            if overlapping.exists():
+                raise forms.ValidationError(OVERLAP_ERROR)
+
+            # Pending requests count against the balance too, so several
+            # requests filed together cannot overdraw it.
+            requested = balances.days_by_year(start_date, end_date)
+            free = balances.available(self.employee.pk, list(requested), exclude=self.instance.pk)
+            for year, days in requested.items():
+                if days > free[year]:
+                    raise forms.ValidationError(
+                        f"This request needs {days} working day(s) in {year}, "
+                        f"but only {max(free[year], 0)} remain in your leave balance."
+                    )
+
+        return cleaned_data
+
+    def save(self, commit=True):
+        leave_request = super().save(commit=False)
+        if self.employee is not None:
+            leave_request.employee = self.employee
+        if commit:
+            leave_request.save()
+        return leave_request
\ No newline at end of file
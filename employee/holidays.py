@@ -0,0 +1,63 @@
+# Public holiday calendars for counting working days of leave.
+#
+# settings.LEAVE_HOLIDAY_CALENDAR names the calendar (it defaults to
+# TIME_ZONE, so Africa/Nairobi here) and LEAVE_EXTRA_HOLIDAYS adds one-off
+# dates such as Eid al-Fitr, whose date is announced each year and cannot
+# be computed in advance.
+from datetime import date, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+
+
+def easter_sunday(year):
+    """Gregorian Easter Sunday (the anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def kenya(year):
+    """Kenyan public holidays under the Public Holidays Act."""
+    fixed = [
+        date(year, 1, 1),    # New Year's Day
+        date(year, 5, 1),    # Labour Day
+        date(year, 6, 1),    # Madaraka Day
+        date(year, 10, 20),  # Mashujaa Day
+        date(year, 12, 12),  # Jamhuri Day
+        date(year, 12, 25),  # Christmas Day
+        date(year, 12, 26),  # Boxing Day
+    ]
+    if year >= 2024:
+        fixed.append(date(year, 10, 10))  # Mazingira Day
+    # A holiday falling on a Sunday is observed on the Monday after.
+    observed = [day + timedelta(days=1) for day in fixed if day.weekday() == 6]
+    easter = easter_sunday(year)
+    return sorted({*fixed, *observed, easter - timedelta(days=2), easter + timedelta(days=1)})
+
+
+CALENDARS = {
+    'Africa/Nairobi': kenya,
+    'none': lambda year: [],
+}
+
+
+@lru_cache(maxsize=64)
+def _holidays(calendar, year):
+    return tuple(CALENDARS[calendar](year))
+
+
+def holidays(first_year, last_year=None):
+    """Holidays of the configured calendar in ``first_year``..``last_year``, sorted."""
+    calendar = settings.LEAVE_HOLIDAY_CALENDAR
+    if calendar not in CALENDARS:
+        raise LookupError(f"Unknown LEAVE_HOLIDAY_CALENDAR {calendar!r}; choose from {', '.join(CALENDARS)}.")
+    years = range(first_year, (last_year or first_year) + 1)
+    extra = [day for day in settings.LEAVE_EXTRA_HOLIDAYS if day.year in years]
+    return sorted({*(day for year in years for day in _holidays(calendar, year)), *extra})
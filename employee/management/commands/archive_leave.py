@@ -0,0 +1,36 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from employee.archive import archive_leave, default_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        'Move approved and rejected leave requests that are long over into the archive table, '
+        'in small transactions. Safe to interrupt and re-run; it resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='Archive requests filed and ended before this day (YYYY-MM-DD). '
+                                             'Defaults to LEAVE_ARCHIVE_AFTER_DAYS ago.')
+        parser.add_argument('--batch-size', type=int, help='Requests per transaction (LEAVE_ARCHIVE_BATCH_SIZE).')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches.')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches.')
+
+    def handle(self, *args, **options):
+        cutoff = default_cutoff()
+        if options['before']:
+            day = parse_date(options['before'])
+            if day is None:
+                raise CommandError('--before must be YYYY-MM-DD.')
+            cutoff = timezone.make_aware(datetime.combine(day, time.min))
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        archived = archive_leave(cutoff, options['batch_size'], options['pause'], options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} leave request(s) filed before {timezone.localtime(cutoff):%Y-%m-%d}.'
+        ))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from employee import exports
+
+
+def _date(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Stream leave requests or employees as CSV or NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(exports.EXPORTS))
+        parser.add_argument('--format', choices=exports.FORMATS, default='csv')
+        parser.add_argument('--output', help='File to write to (defaults to stdout).')
+        parser.add_argument('--start-date', type=_date, help='Only leave ending on or after this date (YYYY-MM-DD).')
+        parser.add_argument('--end-date', type=_date, help='Only leave starting on or before this date (YYYY-MM-DD).')
+        parser.add_argument('--status', choices=exports.STATUSES)
+        parser.add_argument('--department', help='Only this department (both exports).')
+        parser.add_argument('--include-archive', action='store_true', help='Also export archived leave requests.')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        try:
+            filters = exports.check_filters(
+                options['kind'],
+                start_date=options['start_date'],
+                end_date=options['end_date'],
+                status=options['status'],
+                department=options['department'],
+                include_archive=options['include_archive'],
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        chunks = exports.stream(options['kind'], options['format'], chunk_size=options['chunk_size'], **filters)
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,209 @@
+import random
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from core.models import ChangeCounter
+from employee import search
+from employee.models import (
+    ArchivedLeaveRequest, DailyAbsence, DirectoryEntry, Employee, LeaveBalance, LeaveRequest, LeaveRollup,
+    LeaveStatusEvent,
+)
+
+# (department, relative headcount)
+DEPARTMENTS = (
+    ('Engineering', 22), ('Operations', 16), ('Sales', 14), ('Customer Support', 12),
+    ('Finance', 8), ('Marketing', 7), ('Human Resources', 5), ('Logistics', 6),
+    ('Legal', 3), ('Procurement', 3), ('Research', 3), ('Executive', 1),
+)
+POSITIONS = ('Associate', 'Officer', 'Analyst', 'Specialist', 'Senior Specialist', 'Team Lead', 'Manager')
+REASONS = (
+    'Annual leave', 'Sick leave', 'Family responsibility', 'Medical appointment',
+    'Wedding', 'Bereavement', 'Study leave', 'Travel', 'Personal matters',
+)
+# Leave length in days and its relative frequency: mostly short breaks.
+DURATIONS = ((1, 30), (2, 20), (3, 15), (5, 15), (7, 8), (10, 7), (14, 5))
+EMPLOYER_SHARE = 0.02
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a reproducible synthetic dataset of employees and leave requests for scale testing. '
+        'At --scale 1 that is 100,000 employees and 2,000,000 leave requests.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplier for the dataset size (0.01 gives 1,000 employees).')
+        parser.add_argument('--employees', type=int, default=100_000, help='Employees at --scale 1.')
+        parser.add_argument('--requests-per-employee', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Employees inserted per transaction.')
+        parser.add_argument('--prefix', default='gen', help='Username prefix for generated users.')
+        parser.add_argument('--clear', action='store_true', help='Delete users previously generated with --prefix first.')
+        parser.add_argument('--no-rebuild', action='store_true',
+                            help='Skip rebuilding derived tables (absence calendar, leave rollups, '
+                                 'leave balances) afterwards.')
+
+    def handle(self, *args, **options):
+        employees = int(options['employees'] * options['scale'])
+        if employees < 1 or options['chunk_size'] < 1:
+            raise CommandError('--scale, --employees and --chunk-size must produce at least one row.')
+        prefix = options['prefix']
+
+        if options['clear']:
+            deleted = self.clear(prefix)
+            self.stdout.write(f'Deleted {deleted} previously generated row(s).')
+        elif User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(f"Users named '{prefix}-*' already exist; use --clear or another --prefix.")
+
+        rng = random.Random(options['seed'])
+        # One hash for everybody: hashing per user would dominate the run.
+        password = make_password('generated-Passw0rd!')
+        today = timezone.localdate()
+
+        started = time.perf_counter()
+        leave_total = 0
+        for offset in range(0, employees, options['chunk_size']):
+            count = min(options['chunk_size'], employees - offset)
+            leave_total += self.insert_chunk(rng, prefix, offset, count, password, today,
+                                             options['requests_per_employee'])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{offset + count:,}/{employees:,} employees, {leave_total:,} leave requests '
+                f'({(offset + count + leave_total) / elapsed:,.0f} rows/s)'
+            )
+
+        if not options['no_rebuild']:
+            call_command('rebuild_absences', stdout=self.stdout)
+            call_command('refresh_leave_rollups', '--full', stdout=self.stdout)
+            call_command('recompute_leave_balances', stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {employees:,} employees and {leave_total:,} leave requests '
+            f'in {time.perf_counter() - started:.1f}s.'
+        ))
+
+    def clear(self, prefix):
+        """
+        Delete the users named ``prefix``-* and everything hanging off them.
+
+        A cascading QuerySet.delete() would load every row and send
+        pre/post_delete for each, and the receivers then update counters,
+        caches and derived tables one row at a time. Instead each table is
+        emptied with one DELETE, children first. Derived tables are rebuilt
+        once at the end of the run.
+        """
+        users = User.objects.filter(username__startswith=f'{prefix}-')
+        employees = Employee.objects.filter(user__in=users)
+        leave = LeaveRequest.objects.filter(employee__in=employees)
+        deleted = 0
+        with transaction.atomic():
+            # The one reference that is nulled rather than deleted.
+            LeaveStatusEvent.objects.filter(actor__in=users).update(actor=None)
+            for queryset in (
+                LeaveStatusEvent.objects.filter(leave_request__in=leave),
+                DailyAbsence.objects.filter(employee__in=employees),
+                leave,
+                ArchivedLeaveRequest.objects.filter(employee__in=employees),
+                LeaveRollup.objects.filter(employee__in=employees),
+                LeaveBalance.objects.filter(employee__in=employees),
+                DirectoryEntry.objects.filter(employee__in=employees),
+                employees,
+                UserProfile.objects.filter(user__in=users),
+                LogEntry.objects.filter(user__in=users),
+                User.groups.through.objects.filter(user__in=users),
+                User.user_permissions.through.objects.filter(user__in=users),
+                users,
+            ):
+                deleted += queryset._raw_delete(queryset.db)
+            ChangeCounter.bump('employee')
+            ChangeCounter.bump('leave')
+        return deleted
+
+    def insert_chunk(self, rng, prefix, offset, count, password, today, requests_per_employee):
+        names = [f'{prefix}-{offset + i:07d}' for i in range(count)]
+        departments = rng.choices([name for name, _ in DEPARTMENTS], [weight for _, weight in DEPARTMENTS], k=count)
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(
+                    username=name, email=f'{name}@example.com', password=password,
+                    first_name=f'First{offset + i}', last_name=f'Last{offset + i}',
+                    date_joined=timezone.now(),
+                )
+                for i, name in enumerate(names)
+            ])
+            user_ids = dict(User.objects.filter(username__in=names).values_list('username', 'id'))
+            employers = [rng.random() < EMPLOYER_SHARE for _ in names]
+            Employee.objects.bulk_create([
+                Employee(
+                    user_id=user_ids[name],
+                    department=department,
+                    position=rng.choice(POSITIONS),
+                    date_of_hire=today - timedelta(days=rng.randint(30, 365 * 12)),
+                    is_employer=is_employer,
+                )
+                for name, department, is_employer in zip(names, departments, employers)
+            ])
+            UserProfile.objects.bulk_create([
+                UserProfile(user_id=user_ids[name], role='employer' if is_employer else 'employee')
+                for name, is_employer in zip(names, employers)
+            ])
+            employee_ids = (
+                Employee.objects.filter(user_id__in=user_ids.values()).order_by('id').values_list('id', flat=True)
+            )
+            leave = [
+                request
+                for employee_id in employee_ids
+                for request in self.leave_history(rng, employee_id, today, requests_per_employee)
+            ]
+            LeaveRequest.objects.bulk_create(leave, batch_size=5000)
+            LeaveStatusEvent.objects.bulk_create([
+                LeaveStatusEvent(leave_request=request, status=request.status, created_at=request.decided_at)
+                for request in leave if request.decided_at is not None
+            ], batch_size=5000)
+            # bulk_create sends no signals, so index the new employees for
+            # directory search and bump the API counters here.
+            search.sync(employee_ids)
+            ChangeCounter.bump('employee')
+            ChangeCounter.bump('leave')
+        return len(leave)
+
+    def leave_history(self, rng, employee_id, today, count):
+        """Non-overlapping requests walking forward from ~3 years ago to ~3 months ahead."""
+        now = timezone.now()
+        span = 365 * 3 + 90
+        day = today - timedelta(days=365 * 3) + timedelta(days=rng.randint(0, 30))
+        gap = max(1, span // max(count, 1))
+        durations = rng.choices([d for d, _ in DURATIONS], [w for _, w in DURATIONS], k=count)
+        for length in durations:
+            start = day + timedelta(days=rng.randint(0, gap))
+            end = start + timedelta(days=length - 1)
+            if start > today:
+                status = rng.choices(('Pending', 'Approved', 'Rejected'), (60, 32, 8))[0]
+            else:
+                status = rng.choices(('Approved', 'Rejected', 'Pending'), (80, 17, 3))[0]
+            submitted = timezone.make_aware(
+                datetime.combine(start - timedelta(days=rng.randint(1, 45)), dt_time(8))
+                + timedelta(minutes=rng.randint(0, 600))
+            )
+            submitted = min(submitted, now)
+            decided = None if status == 'Pending' else min(submitted + timedelta(hours=rng.randint(1, 96)), now)
+            yield LeaveRequest(
+                employee_id=employee_id,
+                start_date=start,
+                end_date=end,
+                reason=rng.choice(REASONS),
+                status=status,
+                created_at=submitted,
+                decided_at=decided,
+            )
+            day = end + timedelta(days=1)
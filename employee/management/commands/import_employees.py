@@ -0,0 +1,190 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from accounts.models import UserProfile
+from core.models import ChangeCounter
+from employee import search
+from employee.models import Employee
+
+REQUIRED_COLUMNS = ('username', 'email', 'first_name', 'last_name')
+username_validator = UnicodeUsernameValidator()
+
+
+def _init_worker():
+    # Spawned (non-forked) workers start without configured settings.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-create User, Employee and UserProfile rows from a CSV file with the columns '
+        'username, email, first_name, last_name and optionally department, position, '
+        'date_of_hire, role and password. Progress is checkpointed after every chunk so '
+        'a failed import can be continued with --resume.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processes used to hash initial passwords.')
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip the rows committed by a previous run of the same file.')
+        parser.add_argument('--checkpoint', help='Checkpoint file (defaults to <csv_file>.progress).')
+
+    def handle(self, *args, **options):
+        path = Path(options['csv_file'])
+        if not path.exists():
+            raise CommandError(f'{path} does not exist.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+        checkpoint = Path(options['checkpoint'] or f'{path}.progress')
+
+        done = 0
+        if options['resume'] and checkpoint.exists():
+            done = json.loads(checkpoint.read_text())['rows_done']
+            self.stdout.write(f'Resuming after row {done}.')
+
+        created = skipped = 0
+        started = time.perf_counter()
+        with path.open(newline='', encoding='utf-8-sig') as source, \
+                ProcessPoolExecutor(max_workers=max(1, options['workers']), initializer=_init_worker) as pool:
+            reader = csv.DictReader(source)
+            missing = set(REQUIRED_COLUMNS) - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(f"Missing column(s): {', '.join(sorted(missing))}.")
+
+            for _ in islice(reader, done):
+                pass
+            while True:
+                chunk = list(islice(reader, options['chunk_size']))
+                if not chunk:
+                    break
+                valid, errors = self.validate_chunk(chunk, first_row=done + 1)
+                for error in errors:
+                    self.stderr.write(error)
+                self.insert_chunk(valid, pool)
+
+                done += len(chunk)
+                created += len(valid)
+                skipped += len(errors)
+                checkpoint.write_text(json.dumps({'rows_done': done}))
+                rate = created / (time.perf_counter() - started)
+                self.stdout.write(f'{done} rows read, {created} created, {skipped} skipped ({rate:,.0f} users/s)')
+
+        elapsed = time.perf_counter() - started
+        checkpoint.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} employee(s), skipped {skipped}, in {elapsed:.1f}s '
+            f'({created / elapsed if elapsed else 0:,.0f} users/s).'
+        ))
+
+    def validate_chunk(self, chunk, first_row):
+        """Return ``(valid_rows, error_messages)`` using one uniqueness query for the whole chunk."""
+        # Short rows have None for their missing columns; long ones put the
+        # extra values under a None key.
+        rows = [{key: (value or '').strip() for key, value in row.items() if key} for row in chunk]
+        usernames = {row['username'] for row in rows}
+        emails = {row['email'] for row in rows}
+        taken_usernames, taken_emails = set(), set()
+        for username, email in User.objects.filter(
+            Q(username__in=usernames) | Q(email__in=emails)
+        ).values_list('username', 'email'):
+            taken_usernames.add(username)
+            taken_emails.add(email)
+
+        valid, errors = [], []
+        for number, row in enumerate(rows, start=first_row):
+            try:
+                self.validate_row(row, taken_usernames, taken_emails)
+            except ValidationError as exc:
+                errors.append(f"Row {number} ({row.get('username') or '?'}): {'; '.join(exc.messages)}")
+                continue
+            taken_usernames.add(row['username'])
+            taken_emails.add(row['email'])
+            valid.append(row)
+        return valid, errors
+
+    def validate_row(self, row, taken_usernames, taken_emails):
+        for column in REQUIRED_COLUMNS:
+            if not row.get(column):
+                raise ValidationError(f'{column} is required.')
+        username_validator(row['username'])
+        validate_email(row['email'])
+        if row['username'] in taken_usernames:
+            raise ValidationError('A user with this username already exists.')
+        if row['email'] in taken_emails:
+            raise ValidationError('A user with this email already exists.')
+        if row.get('date_of_hire'):
+            try:
+                # None when malformed, ValueError for dates such as 2025-02-30.
+                hired = parse_date(row['date_of_hire'])
+            except ValueError:
+                hired = None
+            if hired is None:
+                raise ValidationError('date_of_hire must be a valid YYYY-MM-DD date.')
+        if row.get('role', 'employee') not in ('', 'employee', 'employer'):
+            raise ValidationError('role must be employee or employer.')
+        if row.get('password'):
+            validate_password(row['password'])
+
+    def insert_chunk(self, rows, pool):
+        if not rows:
+            return
+        # Hashing is the expensive part, so it is spread over the pool;
+        # rows without a password get an unusable one, which costs nothing.
+        to_hash = [row['password'] for row in rows if row.get('password')]
+        hashes = iter(pool.map(make_password, to_hash, chunksize=max(1, len(to_hash) // 32)))
+        passwords = [next(hashes) if row.get('password') else make_password(None) for row in rows]
+
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(
+                    username=row['username'], email=row['email'], password=password,
+                    first_name=row['first_name'], last_name=row['last_name'],
+                )
+                for row, password in zip(rows, passwords)
+            ])
+            # Read the keys back rather than relying on bulk_create setting
+            # them, which not every backend supports.
+            user_ids = dict(
+                User.objects.filter(username__in=[row['username'] for row in rows]).values_list('username', 'id')
+            )
+            today = timezone.localdate()
+            Employee.objects.bulk_create([
+                Employee(
+                    user_id=user_ids[row['username']],
+                    department=row.get('department') or 'General',
+                    position=row.get('position') or 'Unknown',
+                    date_of_hire=parse_date(row['date_of_hire']) if row.get('date_of_hire') else today,
+                    is_employer=row.get('role') == 'employer',
+                )
+                for row in rows
+            ])
+            UserProfile.objects.bulk_create([
+                UserProfile(user_id=user_ids[row['username']], role=row.get('role') or 'employee')
+                for row in rows
+            ])
+            # bulk_create sends no signals, so index the new employees for
+            # directory search and bump the API counter here.
+            search.sync_users(user_ids.values())
+            ChangeCounter.bump('employee')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from employee.transitions import deactivate_on_leave, reactivate_returning
+
+
+class Command(BaseCommand):
+    help = (
+        'Deactivate users whose approved leave is under way and reactivate those whose leave has just ended. '
+        'Safe to run repeatedly; schedule it daily, shortly after midnight.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Process as of this day (YYYY-MM-DD) instead of today.')
+        parser.add_argument('--lookback-days', type=int, default=7,
+                            help='How far back ended leave still reactivates its user.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        day = timezone.localdate()
+        if options['date']:
+            day = parse_date(options['date'])
+            if day is None:
+                raise CommandError('--date must be YYYY-MM-DD.')
+
+        reactivated = reactivate_returning(day, options['lookback_days'], options['batch_size'])
+        deactivated = deactivate_on_leave(day, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{day}: deactivated {deactivated} user(s), reactivated {reactivated} user(s).'
+        ))
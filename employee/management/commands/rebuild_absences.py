@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from employee.models import DailyAbsence, LeaveRequest
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialised daily absence calendar from approved leave requests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of leave requests to expand per batch.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        approved = (
+            LeaveRequest.objects.filter(status='Approved')
+            .select_related('employee')
+            .order_by('pk')
+        )
+
+        with transaction.atomic():
+            DailyAbsence.objects.all().delete()
+            batch, rows = [], 0
+            for leave in approved.iterator(chunk_size=batch_size):
+                batch.extend(DailyAbsence.objects.rows_for(leave))
+                if len(batch) >= batch_size:
+                    DailyAbsence.objects.bulk_create(batch, batch_size=batch_size)
+                    rows += len(batch)
+                    batch = []
+            DailyAbsence.objects.bulk_create(batch, batch_size=batch_size)
+            rows += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} absence day(s).'))
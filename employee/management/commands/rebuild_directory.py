@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from employee import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the employee directory search index from Employee and User rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            written = search.rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {written} employee(s).'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from employee.balances import recompute
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the working days taken in each leave balance from approved leave, live and archived. '
+        'Entitlements are left as they are.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only this calendar year (default: every year with leave).')
+        parser.add_argument('--department', help='Only employees of this department.')
+
+    def handle(self, *args, **options):
+        written = recompute(year=options['year'], department=options['department'])
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {written} leave balance(s).'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from employee.analytics import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = 'Refresh the monthly leave analytics rollups from requests filed or decided since the last run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Rebuild every month, e.g. after requests were deleted or edited.')
+
+    def handle(self, *args, **options):
+        months = refresh_rollups(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {months} month(s) of leave rollups.'))
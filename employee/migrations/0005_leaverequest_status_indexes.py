@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0004_leaverequest_created_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['status', 'created_at'], name='leave_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['employee', 'status', 'created_at'], name='leave_emp_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:45
+
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeBoundary, RangeOperators
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+from django.db.models import Exists, F, OuterRef, Q
+
+# PostgreSQL can enforce "no overlapping leave per employee" itself with a
+# GiST exclusion constraint over a daterange. Other backends rely on the
+# indexed interval query in LeaveRequestForm.clean. The constraint is kept
+# out of the model state: SQLite rebuilds tables from that state and cannot
+# create it.
+
+
+class DateRange(models.Func):
+    function = 'daterange'
+    output_field = DateRangeField()
+
+
+def exclusion_constraint():
+    return ExclusionConstraint(
+        name='leave_no_overlap',
+        expressions=[
+            ('employee', RangeOperators.EQUAL),
+            (DateRange('start_date', 'end_date', RangeBoundary(inclusive_lower=True, inclusive_upper=True)),
+             RangeOperators.OVERLAPS),
+        ],
+        condition=~Q(status='Rejected'),
+    )
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    LeaveRequest = apps.get_model('employee', 'LeaveRequest')
+    live = LeaveRequest.objects.using(schema_editor.connection.alias).exclude(status='Rejected')
+    overlapping = live.filter(Exists(live.filter(
+        employee=OuterRef('employee'), start_date__lte=OuterRef('end_date'), end_date__gte=OuterRef('start_date'),
+    ).exclude(pk=OuterRef('pk')))).order_by('employee_id', 'start_date')
+    clashes = list(overlapping.values_list('pk', flat=True)[:20])
+    if clashes:
+        raise RuntimeError(
+            "Cannot add the leave_no_overlap constraint: leave requests "
+            f"{', '.join(map(str, clashes))}{' and more' if len(clashes) == 20 else ''} "
+            "overlap another non-rejected request of the same employee. "
+            "Reject or shorten them, then migrate again."
+        )
+    schema_editor.add_constraint(LeaveRequest, exclusion_constraint())
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_constraint(apps.get_model('employee', 'LeaveRequest'), exclusion_constraint())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0005_leaverequest_status_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employee',
+            name='department',
+            field=models.CharField(db_index=True, default='General', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['employee', 'end_date', 'start_date'], name='leave_emp_interval_idx'),
+        ),
+        # Both no-ops outside PostgreSQL.
+        BtreeGistExtension(),
+        migrations.RunPython(add_exclusion_constraint, drop_exclusion_constraint),
+    ]
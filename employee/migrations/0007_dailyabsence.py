@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0006_leave_overlap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAbsence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('department', models.CharField(max_length=100)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='employee.employee')),
+                ('leave_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='absences', to='employee.leaverequest')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['department', 'date'], name='absence_department_date_idx'), models.Index(fields=['date'], name='absence_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('leave_request', 'date'), name='absence_unique_request_day')],
+            },
+        ),
+    ]
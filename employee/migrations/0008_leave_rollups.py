@@ -0,0 +1,61 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0007_dailyabsence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('department', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=20)),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('business_days', models.PositiveIntegerField(default=0)),
+                ('decided', models.PositiveIntegerField(default=0)),
+                ('latency_hours', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(null=True)),
+                ('decided_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='leaverequest',
+            name='decided_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['created_at'], name='leave_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['decided_at'], name='leave_decided_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='leaverollup',
+            name='employee',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='employee.employee'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverollup',
+            index=models.Index(fields=['month', 'department'], name='rollup_month_department_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaverollup',
+            constraint=models.UniqueConstraint(fields=('month', 'employee', 'status'), name='rollup_unique_month_employee_status'),
+        ),
+    ]
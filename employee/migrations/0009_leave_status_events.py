@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_decisions(apps, schema_editor):
+    # Requests decided before history was kept get one event for their
+    # current status, stamped with decided_at where it is known.
+    LeaveRequest = apps.get_model('employee', 'LeaveRequest')
+    LeaveStatusEvent = apps.get_model('employee', 'LeaveStatusEvent')
+    decided = (
+        LeaveRequest.objects.exclude(status='Pending')
+        .values_list('pk', 'status', 'decided_at', 'created_at')
+        .order_by('pk')
+    )
+    batch = []
+    for pk, status, decided_at, created_at in decided.iterator(chunk_size=2000):
+        batch.append(LeaveStatusEvent(leave_request_id=pk, status=status, created_at=decided_at or created_at))
+        if len(batch) >= 2000:
+            LeaveStatusEvent.objects.bulk_create(batch)
+            batch = []
+    LeaveStatusEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0008_leave_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Approved', 'Approved'), ('Rejected', 'Rejected')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('leave_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='employee.leaverequest')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['leave_request', 'created_at'], name='leave_event_req_created_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_decisions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0009_leave_status_events'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['status', 'end_date'], name='leave_status_end_idx'),
+        ),
+    ]
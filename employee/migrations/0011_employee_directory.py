@@ -0,0 +1,86 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# PostgreSQL: trigram GIN index for substring and similarity matching.
+POSTGRESQL_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX directory_document_trgm_idx ON employee_directoryentry USING gin (document gin_trgm_ops);
+"""
+
+# SQLite: an external-content FTS5 trigram index over DirectoryEntry (needs
+# SQLite 3.34+), with triggers that keep it in step with the table, and a
+# vocabulary view giving each trigram's document count.
+SQLITE_SQL = [
+    """CREATE VIRTUAL TABLE employee_directory_fts USING fts5(
+        document, content='employee_directoryentry', content_rowid='employee_id', tokenize='trigram'
+    )""",
+    "CREATE VIRTUAL TABLE employee_directory_vocab USING fts5vocab(employee_directory_fts, 'row')",
+    """CREATE TRIGGER employee_directory_ai AFTER INSERT ON employee_directoryentry BEGIN
+        INSERT INTO employee_directory_fts(rowid, document) VALUES (new.employee_id, new.document);
+    END""",
+    """CREATE TRIGGER employee_directory_ad AFTER DELETE ON employee_directoryentry BEGIN
+        INSERT INTO employee_directory_fts(employee_directory_fts, rowid, document)
+        VALUES ('delete', old.employee_id, old.document);
+    END""",
+    """CREATE TRIGGER employee_directory_au AFTER UPDATE ON employee_directoryentry BEGIN
+        INSERT INTO employee_directory_fts(employee_directory_fts, rowid, document)
+        VALUES ('delete', old.employee_id, old.document);
+        INSERT INTO employee_directory_fts(rowid, document) VALUES (new.employee_id, new.document);
+    END""",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRESQL_SQL)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_SQL:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS directory_document_trgm_idx;')
+    elif vendor == 'sqlite':
+        for name in ('employee_directory_ai', 'employee_directory_ad', 'employee_directory_au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        schema_editor.execute('DROP TABLE IF EXISTS employee_directory_vocab')
+        schema_editor.execute('DROP TABLE IF EXISTS employee_directory_fts')
+
+
+def populate_directory(apps, schema_editor):
+    # Same document as employee.search.document_for(); the triggers index it.
+    Employee = apps.get_model('employee', 'Employee')
+    DirectoryEntry = apps.get_model('employee', 'DirectoryEntry')
+    batch = []
+    for employee in Employee.objects.select_related('user').order_by('pk').iterator(chunk_size=2000):
+        user = employee.user
+        parts = (user.username, user.first_name, user.last_name, employee.department, employee.position)
+        batch.append(DirectoryEntry(employee_id=employee.pk, document=' '.join(p for p in parts if p).lower()))
+        if len(batch) >= 2000:
+            DirectoryEntry.objects.bulk_create(batch)
+            batch = []
+    DirectoryEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0010_leave_status_end_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectoryEntry',
+            fields=[
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='directory_entry', serialize=False, to='employee.employee')),
+                ('document', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(populate_directory, migrations.RunPython.noop),
+    ]
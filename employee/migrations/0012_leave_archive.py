@@ -0,0 +1,62 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+ARCHIVE_TABLE = 'employee_archivedleaverequest'
+
+
+def partition_archive(apps, schema_editor):
+    # Optional on PostgreSQL (LEAVE_ARCHIVE_PARTITIONED): recreate the empty
+    # archive table partitioned by range of created_at. The primary key has
+    # to include the partition key; ids stay unique because they come from
+    # LeaveRequest. employee.archive adds a partition per year as it
+    # archives, and the default partition catches anything else.
+    if schema_editor.connection.vendor != 'postgresql' or not settings.LEAVE_ARCHIVE_PARTITIONED:
+        return
+    model = apps.get_model('employee', 'ArchivedLeaveRequest')
+    schema_editor.execute(f'ALTER TABLE {ARCHIVE_TABLE} RENAME TO {ARCHIVE_TABLE}_plain')
+    schema_editor.execute(
+        f'CREATE TABLE {ARCHIVE_TABLE} (LIKE {ARCHIVE_TABLE}_plain INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)'
+    )
+    schema_editor.execute(f'DROP TABLE {ARCHIVE_TABLE}_plain')
+    schema_editor.execute(f'ALTER TABLE {ARCHIVE_TABLE} ADD PRIMARY KEY (id, created_at)')
+    schema_editor.execute(
+        f'ALTER TABLE {ARCHIVE_TABLE} ADD CONSTRAINT archive_employee_fk FOREIGN KEY (employee_id) '
+        'REFERENCES employee_employee (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+    schema_editor.execute(f'CREATE TABLE {ARCHIVE_TABLE}_default PARTITION OF {ARCHIVE_TABLE} DEFAULT')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0011_employee_directory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedLeaveRequest',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('reason', models.TextField()),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Approved', 'Approved'), ('Rejected', 'Rejected')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('decided_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('events', models.JSONField(default=list)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_leave_requests', to='employee.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['employee', 'created_at'], name='archive_emp_created_idx'), models.Index(fields=['created_at'], name='archive_created_at_idx'), models.Index(fields=['start_date'], name='archive_start_date_idx')],
+            },
+        ),
+        # Reversing the CreateModel drops the table with its partitions.
+        migrations.RunPython(partition_archive, migrations.RunPython.noop),
+    ]
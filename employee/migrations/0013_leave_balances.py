@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:34
+
+import django.db.models.deletion
+import employee.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0012_leave_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('entitlement', models.PositiveSmallIntegerField(default=employee.models.default_entitlement)),
+                ('taken', models.IntegerField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_balances', to='employee.employee')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('employee', 'year'), name='balance_unique_employee_year')],
+            },
+        ),
+    ]
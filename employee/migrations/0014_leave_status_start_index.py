@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0013_leave_balances'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['status', 'start_date'], name='leave_status_start_idx'),
+        ),
+    ]
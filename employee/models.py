@@ -1,6 +1,12 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
 from django.utils.timezone import now
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+
+from core.tasks import enqueue
 # Employee model that extends the User model with is_employer flag
 # and additional fields like position, department, and date of hire
 # This model will store additional employee-specific information
@@ -11,7 +17,7 @@ from django.contrib.auth.models import User
 class Employee(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     position = models.CharField(max_length=100, default='Unknown')
-    department = models.CharField(max_length=100, default='General')
+    department = models.CharField(max_length=100, default='General', db_index=True)
     date_of_hire = models.DateField(default=now)
     is_employer = models.BooleanField(default=False)
 
@@ -19,8 +25,79 @@ class Employee(models.Model):
         return f"{self.user.first_name} {self.user.last_name} - {self.position}"
     
 
+class LeaveRequestQuerySet(models.QuerySet):
+    def overlapping(self, start_date, end_date):
+        """
+        Requests that are not rejected and share at least one day with the
+        inclusive range ``start_date``..``end_date``.
+        """
+        return self.exclude(status='Rejected').filter(
+            end_date__gte=start_date,
+            start_date__lte=end_date,
+        )
+
+    def covering(self, day):
+        """Approved requests under way on ``day``."""
+        return self.filter(status='Approved', start_date__lte=day, end_date__gte=day)
+
+    def department_conflicts(self, department, start_date, end_date):
+        """Overlapping requests for everyone in ``department``, in one query."""
+        return (
+            self.overlapping(start_date, end_date)
+            .filter(employee__department=department)
+            .select_related('employee__user')
+            .order_by('start_date', 'id')
+        )
+
+    def decide(self, status, actor=None):
+        """
+        Approve or reject every pending request in this queryset at once.
+
+        Runs a fixed number of set-based UPDATEs inside one transaction instead
+        of two full-row saves per request, records one status event per
+        request, attributed to ``actor``, and adds approvals to the leave
+        balances. Deactivating the users and
+        materialising their absences are queued as background tasks for when
+        the transaction commits. Requests that are no longer pending are left
+        untouched. Returns the number of requests decided.
+        """
+        if status not in ('Approved', 'Rejected'):
+            raise ValueError(f"Cannot decide leave requests as {status!r}.")
+
+        from .balances import record_taken
+        from .signals import leave_requests_decided
+
+        with transaction.atomic():
+            # Lock only the leave rows, not the employees joined in for the
+            # values below. SQLite has no row locks: its connections begin
+            # IMMEDIATE transactions instead (see DB_PROFILE in settings).
+            pending = list(
+                self.filter(status='Pending').select_for_update(of=('self',))
+                .values_list('pk', 'employee__user_id', 'employee_id', 'start_date', 'end_date')
+            )
+            if not pending:
+                return 0
+            pending_ids = [row[0] for row in pending]
+            user_ids = {row[1] for row in pending}
+            decided_at = now()
+            updated = LeaveRequest.objects.filter(pk__in=pending_ids).update(status=status, decided_at=decided_at)
+            LeaveStatusEvent.objects.bulk_create([
+                LeaveStatusEvent(leave_request_id=pk, status=status, actor=actor, created_at=decided_at)
+                for pk in pending_ids
+            ])
+            if status == 'Approved':
+                record_taken([row[2:] for row in pending])
+                enqueue('employee.deactivate_users', {'user_ids': sorted(user_ids)})
+                enqueue('employee.sync_absences', {'leave_request_ids': pending_ids})
+            leave_requests_decided.send(
+                sender=LeaveRequest, leave_request_ids=pending_ids, user_ids=user_ids, status=status,
+            )
+        return updated
+
+
 # This model is used to store leave requests made by employees
 # if an employee's leave request is approved, the User object associated with the request should update it's is_active status
+# (done by the employee.deactivate_users background task once the approval commits)
 class LeaveRequest(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
     start_date = models.DateField()
@@ -28,12 +105,275 @@ class LeaveRequest(models.Model):
     reason = models.TextField()
     status = models.CharField(max_length=20, choices=[('Pending', 'Pending'), ('Approved', 'Approved'), ('Rejected', 'Rejected')], default='Pending')
     created_at = models.DateTimeField(default=now)
+    # When the request was approved or rejected; drives approval-latency
+    # analytics and the rollup refresh watermark.
+    decided_at = models.DateTimeField(null=True, blank=True)
+
+    objects = LeaveRequestQuerySet.as_manager()
+
+    class Meta:
+        # The employer queue lists requests by status, newest first, and the
+        # employee view lists one employee's requests the same way.
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='leave_status_created_idx'),
+            models.Index(fields=['employee', 'status', 'created_at'], name='leave_emp_status_created_idx'),
+            # Overlap checks seek on end_date >= new start, which skips an
+            # employee's past leave; start_date is carried along for the filter.
+            models.Index(fields=['employee', 'end_date', 'start_date'], name='leave_emp_interval_idx'),
+            # Rollup refreshes scan what was filed or decided since their
+            # watermarks.
+            models.Index(fields=['created_at'], name='leave_created_at_idx'),
+            models.Index(fields=['decided_at'], name='leave_decided_at_idx'),
+            # process_leave_transitions finds approved leave under way or just
+            # ended with a range scan on end_date.
+            models.Index(fields=['status', 'end_date'], name='leave_status_end_idx'),
+            # The admin's start date filter, used together with its status filter.
+            models.Index(fields=['status', 'start_date'], name='leave_status_start_idx'),
+        ]
+
+    def approve(self, actor=None):
+        with transaction.atomic():
+            self._transition('Approved', actor)
+            enqueue('employee.deactivate_users', {'user_ids': [self.employee.user_id]})
+
+    def reject(self, actor=None):
+        with transaction.atomic():
+            self._transition('Rejected', actor)
+
+    def _transition(self, status, actor):
+        from .balances import record_taken
+
+        if (status == 'Approved') != (self.status == 'Approved'):
+            record_taken([(self.employee_id, self.start_date, self.end_date)], 1 if status == 'Approved' else -1)
+        self.status = status
+        self.decided_at = now()
+        self.save(update_fields=['status', 'decided_at'])
+        LeaveStatusEvent.objects.create(leave_request=self, status=status, actor=actor, created_at=self.decided_at)
+
+    def timeline(self):
+        """
+        ``(status, timestamp, actor)`` entries from filing to now. Uses the
+        prefetched ``events`` when present (see LeaveStatusEvent.prefetch()).
+        """
+        return [('Pending', self.created_at, None)] + [
+            (event.status, event.created_at, event.actor) for event in self.events.all()
+        ]
+
+    def __str__(self):
+        return f"{self.employee.user.first_name} {self.employee.user.last_name} - {self.status}"
+
+
+class LeaveStatusEventQuerySet(models.QuerySet):
+    def timeline_order(self):
+        return self.select_related('actor').order_by('created_at', 'id')
+
+
+# Append-only history of leave status transitions (LM3). The initial Pending
+# state is the request's own created_at, so only decisions are stored; each
+# event is inserted in the same transaction as the status change it records.
+class LeaveStatusEvent(models.Model):
+    leave_request = models.ForeignKey(LeaveRequest, on_delete=models.CASCADE, related_name='events')
+    status = models.CharField(max_length=20, choices=LeaveRequest._meta.get_field('status').choices)
+    actor = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(default=now)
+
+    objects = LeaveStatusEventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['leave_request', 'created_at'], name='leave_event_req_created_idx'),
+        ]
+
+    @classmethod
+    def prefetch(cls):
+        """Prefetch for LeaveRequest querysets: one query for a whole page's history."""
+        return models.Prefetch('events', queryset=cls.objects.timeline_order())
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Leave status events are append-only.')
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.leave_request_id} - {self.status} at {self.created_at:%Y-%m-%d %H:%M}"
+
+
+class DailyAbsenceManager(models.Manager):
+    def sync(self, leave_request_ids):
+        """
+        Rebuild the absence rows of the given leave requests from their
+        current state: approved requests get one row per day, anything else
+        gets none. Only the rows of these requests are touched.
+        """
+        leave_request_ids = list(leave_request_ids)
+        with transaction.atomic():
+            self.filter(leave_request__in=leave_request_ids).delete()
+            approved = (
+                LeaveRequest.objects.filter(pk__in=leave_request_ids, status='Approved')
+                .select_related('employee')
+            )
+            self.bulk_create(
+                [row for leave in approved for row in self.rows_for(leave)],
+                batch_size=1000,
+            )
+
+    def rows_for(self, leave_request):
+        day = leave_request.start_date
+        while day <= leave_request.end_date:
+            yield self.model(
+                date=day,
+                department=leave_request.employee.department,
+                employee_id=leave_request.employee_id,
+                leave_request_id=leave_request.pk,
+            )
+            day += timedelta(days=1)
+
+
+# One row per employee per day of approved leave, denormalised by department
+# so the absence calendar is a single range read on (department, date).
+# Maintained by DailyAbsence.objects.sync(), run as the employee.sync_absences
+# background task after approvals and LeaveRequest saves, and directly by the
+# Employee signal; rebuild with `manage.py rebuild_absences`.
+class DailyAbsence(models.Model):
+    date = models.DateField()
+    department = models.CharField(max_length=100)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
+    leave_request = models.ForeignKey(LeaveRequest, on_delete=models.CASCADE, related_name='absences')
+
+    objects = DailyAbsenceManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['leave_request', 'date'], name='absence_unique_request_day'),
+        ]
+        indexes = [
+            models.Index(fields=['department', 'date'], name='absence_department_date_idx'),
+            models.Index(fields=['date'], name='absence_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.department}"
+
+
+# Monthly leave figures per employee and status: requests on the month the
+# leave starts, working days on the months they fall in. Analytics charts
+# read a few hundred rows of it instead of grouping every LeaveRequest.
+# Refreshed incrementally by employee.analytics.refresh_rollups()
+# (`manage.py refresh_leave_rollups`).
+class LeaveRollup(models.Model):
+    month = models.DateField()
+    department = models.CharField(max_length=100)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE)
+    status = models.CharField(max_length=20)
+    requests = models.PositiveIntegerField(default=0)
+    business_days = models.PositiveIntegerField(default=0)
+    # Requests with a decided_at, and the sum of their created->decided hours.
+    decided = models.PositiveIntegerField(default=0)
+    latency_hours = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'employee', 'status'], name='rollup_unique_month_employee_status'),
+        ]
+        indexes = [
+            models.Index(fields=['month', 'department'], name='rollup_month_department_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} - {self.department} - {self.status}"
+
+
+# How far each rollup has been refreshed: the newest created_at and
+# decided_at that had been seen when it last ran.
+class RollupWatermark(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)
+    created_at = models.DateTimeField(null=True)
+    decided_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return self.name
+
+
+def default_entitlement():
+    return settings.LEAVE_ANNUAL_ENTITLEMENT_DAYS
+
+
+# Leave entitlement and working days of approved leave per employee and
+# calendar year, so the dashboard and LeaveRequestForm read one row instead
+# of adding up an employee's whole leave history. ``taken`` is adjusted in
+# the transaction that approves leave (employee.balances.record_taken) and
+# can be rebuilt with `manage.py recompute_leave_balances`.
+class LeaveBalance(models.Model):
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_balances')
+    year = models.PositiveSmallIntegerField()
+    entitlement = models.PositiveSmallIntegerField(default=default_entitlement)
+    taken = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'year'], name='balance_unique_employee_year'),
+        ]
+
+    @property
+    def remaining(self):
+        return self.entitlement - self.taken
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.year}: {self.remaining} of {self.entitlement}"
+
+
+# One searchable line per employee ("username first last department
+# position"), denormalised from Employee and User so a single indexed table
+# answers directory searches. Kept current by employee.search.sync() from the
+# Employee/User signals and bulk loaders; the index over it is backend
+# specific (see migration 0011 and employee.search).
+class DirectoryEntry(models.Model):
+    employee = models.OneToOneField(Employee, on_delete=models.CASCADE, primary_key=True, related_name='directory_entry')
+    document = models.TextField()
+
+    def __str__(self):
+        return self.document
+
+
+# Cold storage for decided leave requests that are long over, so queries
+# over LeaveRequest do not pay for years of closed history. Rows are moved
+# here in batches by employee.archive.archive_leave() (`manage.py
+# archive_leave`) and keep their original id. The status history travels
+# with the row as ``events``, since LeaveStatusEvent rows are removed with
+# the request. Exports and the timeline read it only when asked
+# (include_archive); rollups always include it. On PostgreSQL the table can
+# be partitioned by created_at (LEAVE_ARCHIVE_PARTITIONED, migration 0012).
+class ArchivedLeaveRequest(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='archived_leave_requests')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    reason = models.TextField()
+    status = models.CharField(max_length=20, choices=LeaveRequest._meta.get_field('status').choices)
+    created_at = models.DateTimeField()
+    decided_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(default=now)
+    # [{"status", "at" (ISO 8601), "actor_id", "actor"}], oldest first.
+    events = models.JSONField(default=list)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['employee', 'created_at'], name='archive_emp_created_idx'),
+            models.Index(fields=['created_at'], name='archive_created_at_idx'),
+            # Rollups are rebuilt per month of start_date.
+            models.Index(fields=['start_date'], name='archive_start_date_idx'),
+        ]
 
-    def approve(self):
-        self.status = 'Approved'
-        self.save()
-        self.employee.user.is_active = False
-        self.employee.user.save()
+    def timeline(self):
+        """LeaveRequest.timeline() for an archived request, rebuilt from ``events``."""
+        return [('Pending', self.created_at, None)] + [
+            (
+                event['status'],
+                parse_datetime(event['at']),
+                User(pk=event['actor_id'], username=event['actor']) if event['actor_id'] else None,
+            )
+            for event in self.events
+        ]
 
     def __str__(self):
-        return f"{self.employee.user.first_name} {self.employee.user.last_name} - {self.status}"
\ No newline at end of file
+        return f"{self.employee.user.first_name} {self.employee.user.last_name} - {self.status} (archived)"
@@ -0,0 +1,109 @@
+# Keyset (cursor) pagination helpers.
+# OFFSET pagination makes the database walk and discard every row before the
+# requested page, so page N gets slower as N grows. Keyset pagination instead
+# remembers the (created_at, id) of the last row shown and asks for rows
+# "older than that", which an index on created_at can answer directly.
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(obj):
+    """Encode the sort key of ``obj`` (a model instance or values() dict) as an opaque, URL-safe cursor."""
+    created_at, pk = (obj['created_at'], obj['id']) if isinstance(obj, dict) else (obj.created_at, obj.pk)
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, pk)`` for a cursor, or ``None`` if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+def _page_queryset(queryset, cursor, page_size):
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    queryset = queryset.order_by('-created_at', '-id')
+
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    return queryset[:page_size + 1], page_size
+
+
+def _split_page(rows, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
+
+
+def keyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return ``(rows, next_cursor)`` for one page of ``queryset``, newest first.
+
+    The queryset must have ``created_at`` and ``id`` columns. One extra row is
+    fetched to tell whether there is a next page, so every page costs a single
+    query no matter how deep it is.
+    """
+    page, page_size = _page_queryset(queryset, cursor, page_size)
+    return _split_page(list(page), page_size)
+
+
+async def akeyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Async version of keyset_page() for async views."""
+    page, page_size = _page_queryset(queryset, cursor, page_size)
+    return _split_page([row async for row in page], page_size)
+
+
+def merged_keyset_page(querysets, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    keyset_page() across several querysets of model instances, such as live
+    and archived leave requests: one page is read from each and the newest
+    rows of all of them kept, so a page costs one query per queryset.
+    """
+    rows = []
+    for queryset in querysets:
+        page, size = _page_queryset(queryset, cursor, page_size)
+        rows.extend(page)
+    rows.sort(key=lambda row: (row.created_at, row.pk), reverse=True)
+    return _split_page(rows, size)
+
+
+def id_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    keyset_page() for tables without ``created_at``: ``(rows, next_cursor)``
+    in ascending id order, where the cursor is the last id shown. Rows may be
+    model instances or values() dicts.
+    """
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    queryset = queryset.order_by('id')
+    if cursor:
+        try:
+            queryset = queryset.filter(id__gt=int(base64.urlsafe_b64decode(cursor.encode())))
+        except (binascii.Error, UnicodeError, ValueError):
+            pass
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]['id'] if isinstance(rows[-1], dict) else rows[-1].pk
+        next_cursor = base64.urlsafe_b64encode(str(last).encode()).decode()
+    return rows, next_cursor
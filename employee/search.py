@@ -0,0 +1,186 @@
+# Employee directory search for employer autocomplete.
+#
+# DirectoryEntry holds one lowercase line per employee built from the User
+# and Employee fields people search by. The index over it depends on the
+# database (migration 0011 creates it):
+#   PostgreSQL - a pg_trgm GIN index, so substring matches and word
+#                similarity (typo tolerance) are both index lookups;
+#   SQLite     - an FTS5 trigram table kept in step with DirectoryEntry by
+#                triggers: words are matched as substrings; when nothing
+#                matches, the rows sharing the query's rarer trigrams are
+#                re-scored with difflib to allow for typos;
+#   others     - a plain icontains over DirectoryEntry.
+import difflib
+import re
+
+from django.db import connection
+
+from .models import DirectoryEntry, Employee
+
+FTS_TABLE = 'employee_directory_fts'
+FTS_VOCAB = 'employee_directory_vocab'
+# Trigram indexes cannot answer anything shorter.
+MIN_QUERY_LENGTH = 3
+MAX_RESULTS = 20
+
+# Substring matches fetched on SQLite before ordering them in Python;
+# ranking every match in SQL is slow for short, common queries.
+CANDIDATES_PER_RESULT = 5
+
+# Typo fallback on SQLite: candidates share at least one of the query's
+# FUZZY_TRIGRAMS rarest trigrams, and are kept when every query word is at
+# least FUZZY_CUTOFF similar to one of their words. Candidates are ranked by
+# trigrams shared, so common trigrams are dropped once the rarer ones cover
+# FUZZY_RANKED_ROWS rows: ranking cost grows with every row matched.
+FUZZY_TRIGRAMS = 6
+FUZZY_RANKED_ROWS = 10000
+FUZZY_CANDIDATES = 100
+FUZZY_CUTOFF = 0.75
+
+
+def document_for(employee):
+    user = employee.user
+    parts = (user.username, user.first_name, user.last_name, employee.department, employee.position)
+    return ' '.join(part for part in parts if part).lower()
+
+
+def sync(employee_ids):
+    """Rebuild the directory entries of ``employee_ids`` from their current rows."""
+    employee_ids = list(employee_ids)
+    employees = Employee.objects.filter(pk__in=employee_ids).select_related('user')
+    DirectoryEntry.objects.filter(employee_id__in=employee_ids).delete()
+    DirectoryEntry.objects.bulk_create(
+        [DirectoryEntry(employee_id=employee.pk, document=document_for(employee)) for employee in employees],
+        batch_size=1000,
+    )
+
+
+def sync_users(user_ids):
+    sync(Employee.objects.filter(user_id__in=list(user_ids)).values_list('pk', flat=True))
+
+
+def rebuild(batch_size=2000):
+    """Recreate every directory entry. Returns the number written."""
+    DirectoryEntry.objects.all().delete()
+    written, batch = 0, []
+    for employee in Employee.objects.select_related('user').order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(DirectoryEntry(employee_id=employee.pk, document=document_for(employee)))
+        if len(batch) >= batch_size:
+            DirectoryEntry.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    DirectoryEntry.objects.bulk_create(batch)
+    written += len(batch)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            # Also repairs an FTS index that drifted from its content table.
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return written
+
+
+def _words(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def _postgresql_ids(query, limit):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT employee_id FROM employee_directoryentry
+            WHERE document ILIKE %(contains)s OR %(query)s <%% document
+            ORDER BY word_similarity(%(query)s, document) DESC, employee_id
+            LIMIT %(limit)s
+            """,
+            {'contains': f"%{query.lower()}%", 'query': query.lower(), 'limit': limit},
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fts(match, limit, ranked=False):
+    order = ' ORDER BY rank' if ranked else ''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, document FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s{order} LIMIT %s',
+            [match, limit],
+        )
+        return cursor.fetchall()
+
+
+def _rarest_trigrams(words):
+    trigrams = sorted({word[i:i + 3] for word in words for i in range(len(word) - 2)})
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT term, doc FROM {FTS_VOCAB} WHERE term IN ({', '.join(['%s'] * len(trigrams))}) "
+            "ORDER BY doc LIMIT %s",
+            [*trigrams, FUZZY_TRIGRAMS],
+        )
+        return cursor.fetchall()
+
+
+def _similarity(matchers, document):
+    """Per query word, its best difflib ratio against the words of ``document``."""
+    tokens = document.split()
+    scores = []
+    for matcher in matchers:
+        best = 0.0
+        for token in tokens:
+            matcher.set_seq1(token)
+            # The quick ratios are upper bounds; skip tokens that cannot win.
+            if matcher.real_quick_ratio() > best and matcher.quick_ratio() > best:
+                best = max(best, matcher.ratio())
+        scores.append(best)
+    return scores
+
+
+def _word_score(words, document):
+    # Whole words first, then word prefixes, then any substring.
+    tokens = document.split()
+    return sum(2 if word in tokens else 1 if any(t.startswith(word) for t in tokens) else 0 for word in words)
+
+
+def _sqlite_ids(query, limit):
+    words = [word for word in _words(query) if len(word) >= MIN_QUERY_LENGTH]
+    if not words:
+        return []
+    matches = _fts(' '.join(f'"{word}"' for word in words), limit * CANDIDATES_PER_RESULT)
+    if matches:
+        matches.sort(key=lambda row: -_word_score(words, row[1]))
+        return [pk for pk, _ in matches[:limit]]
+
+    terms, covered = [], 0
+    for term, rows in _rarest_trigrams(words):
+        if terms and covered + rows > FUZZY_RANKED_ROWS:
+            break
+        terms.append(term)
+        covered += rows
+    if not terms:
+        return []
+    match = ' OR '.join(f'"{term}"' for term in terms)
+    # A lone trigram too common to rank is still worth a look at some rows.
+    ranked = covered <= FUZZY_RANKED_ROWS
+    matchers = [difflib.SequenceMatcher(None, b=word, autojunk=False) for word in words]
+    scored = []
+    for pk, document in _fts(match, FUZZY_CANDIDATES, ranked=ranked):
+        scores = _similarity(matchers, document)
+        if min(scores) >= FUZZY_CUTOFF:
+            scored.append((-sum(scores), pk))
+    return [pk for _, pk in sorted(scored)[:limit]]
+
+
+def _fallback_ids(query, limit):
+    queryset = DirectoryEntry.objects.all()
+    for word in _words(query):
+        queryset = queryset.filter(document__contains=word)
+    return list(queryset.order_by('employee_id').values_list('employee_id', flat=True)[:limit])
+
+
+def search(query, limit=10):
+    """Employees (with their user) matching ``query``, best first."""
+    query = query.strip()
+    if len(query) < MIN_QUERY_LENGTH or not _words(query):
+        return []
+    limit = max(1, min(limit, MAX_RESULTS))
+    find = {'postgresql': _postgresql_ids, 'sqlite': _sqlite_ids}.get(connection.vendor, _fallback_ids)
+    ids = find(query, limit)
+    employees = Employee.objects.select_related('user').in_bulk(ids)
+    return [employees[pk] for pk in ids if pk in employees]
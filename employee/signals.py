@@ -0,0 +1,86 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from core.models import ChangeCounter
+from core.tasks import enqueue
+
+from . import balances, search
+from .models import DailyAbsence, Employee, LeaveRequest, LeaveRollup
+
+# Sent by LeaveRequestQuerySet.decide() inside its transaction, since the
+# set-based UPDATEs it runs do not fire post_save. Provides
+# ``leave_request_ids``, ``user_ids`` and the new ``status``.
+leave_requests_decided = Signal()
+
+# Sent by balances.recompute() once it has rewritten balances in bulk, which
+# fires no post_save. Provides ``user_ids``.
+leave_balances_recomputed = Signal()
+
+
+@receiver(post_save, sender=LeaveRequest)
+def sync_leave_absences(sender, instance, created, **kwargs):
+    # New pending requests have nothing to materialise yet.
+    if created and instance.status != 'Approved':
+        return
+    enqueue('employee.sync_absences', {'leave_request_ids': [instance.pk]})
+
+
+@receiver(post_delete, sender=LeaveRequest)
+def release_deleted_leave(sender, instance, **kwargs):
+    # Approvals are added to the balance by approve()/decide().
+    if instance.status == 'Approved':
+        balances.record_taken([(instance.employee_id, instance.start_date, instance.end_date)], -1)
+
+
+@receiver(post_save, sender=Employee)
+def move_absences_with_department(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'department' not in update_fields):
+        return
+    DailyAbsence.objects.filter(employee=instance).exclude(
+        department=instance.department,
+    ).update(department=instance.department)
+
+
+@receiver(post_save, sender=Employee)
+def move_rollups_with_department(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'department' not in update_fields):
+        return
+    LeaveRollup.objects.filter(employee=instance).exclude(
+        department=instance.department,
+    ).update(department=instance.department)
+
+
+# Change counters behind the JSON API's ETags (employee.api). Leave rows
+# carry employee names and departments, so people changes bump both.
+@receiver([post_save, post_delete], sender=LeaveRequest)
+def bump_leave_counter(sender, **kwargs):
+    ChangeCounter.bump('leave')
+
+
+@receiver(leave_requests_decided)
+def bump_leave_counter_on_decision(sender, **kwargs):
+    ChangeCounter.bump('leave')
+
+
+@receiver([post_save, post_delete], sender=Employee)
+@receiver([post_save, post_delete], sender=User)
+def bump_people_counters(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the API does not expose.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    ChangeCounter.bump('employee')
+    ChangeCounter.bump('leave')
+
+
+# Directory search entries follow the Employee and User fields they index.
+@receiver(post_save, sender=Employee)
+def sync_directory_for_employee(sender, instance, **kwargs):
+    search.sync([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def sync_directory_for_user(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and set(update_fields) <= {'last_login', 'password', 'is_active'}):
+        return
+    search.sync_users([instance.pk])
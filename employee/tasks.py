@@ -0,0 +1,28 @@
+# Background side effects of leave decisions, run by `manage.py run_worker`.
+# Each handler gets the payloads of a whole batch and is safe to re-run.
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from core.models import ChangeCounter
+from core.tasks import task
+
+from .models import DailyAbsence
+from .transitions import on_leave_user_ids
+
+
+@task('employee.deactivate_users')
+def deactivate_users(payloads):
+    # Only leave that has already started; future leave is picked up by
+    # process_leave_transitions on its first day.
+    user_ids = {pk for payload in payloads for pk in payload['user_ids']}
+    updated = User.objects.filter(
+        pk__in=user_ids, is_active=True,
+    ).filter(pk__in=on_leave_user_ids(timezone.localdate())).update(is_active=False)
+    # The API's employee rows show is_active; queryset updates send no signal.
+    if updated:
+        ChangeCounter.bump('employee')
+
+
+@task('employee.sync_absences')
+def sync_absences(payloads):
+    DailyAbsence.objects.sync({pk for payload in payloads for pk in payload['leave_request_ids']})
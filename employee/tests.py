@@ -1,3 +1,890 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User, update_last_login
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.db.models.signals import post_delete
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from core.models import Task
+from core.testing import AsyncViewsMixin, QueryBudgetMixin, TaskQueueMixin
+from . import analytics, balances, holidays, search
+from .forms import OVERLAP_ERROR, LeaveRequestForm
+from .models import (
+    ArchivedLeaveRequest, DailyAbsence, DirectoryEntry, Employee, LeaveBalance, LeaveRequest, LeaveRollup,
+    LeaveStatusEvent, RollupWatermark,
+)
+
+
+def make_employee(username, is_employer=False, department='General'):
+    user = User.objects.create_user(username=username)
+    return Employee.objects.create(user=user, is_employer=is_employer, department=department)
+
+
+class LeaveQueueViewTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = make_employee('boss', is_employer=True)
+        cls.employee = make_employee('worker')
+        base = timezone.now()
+        for i in range(30):
+            LeaveRequest.objects.create(
+                employee=cls.employee,
+                start_date=date(2025, 1, 1) + timedelta(days=i),
+                end_date=date(2025, 1, 1) + timedelta(days=i),
+                reason='Personal',
+                created_at=base - timedelta(minutes=i),
+            )
+
+    def setUp(self):
+        caches['dashboard'].clear()
+
+    def test_non_employer_is_forbidden(self):
+        self.client.force_login(self.employee.user)
+        response = self.client.get(reverse('leave_queue'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_pages_follow_cursor_newest_first(self):
+        self.client.force_login(self.employer.user)
+        first = self.client.get(reverse('leave_queue'))
+        page1 = first.context['leave_requests']
+        self.assertEqual(len(page1), 25)
+        self.assertIsNotNone(first.context['next_cursor'])
+
+        second = self.client.get(reverse('leave_queue'), {'cursor': first.context['next_cursor']})
+        page2 = second.context['leave_requests']
+        self.assertEqual(len(page2), 5)
+        self.assertIsNone(second.context['next_cursor'])
+        self.assertTrue(page1[-1].created_at > page2[0].created_at)
+
+    def test_queue_and_calendar_within_query_budget(self):
+        self.client.force_login(self.employer.user)
+        self.assertWithinQueryBudget(reverse('leave_queue'))
+        self.assertWithinQueryBudget(reverse('absence_calendar') + '?month=2025-01')
+
+    def test_deep_page_runs_same_number_of_queries(self):
+        self.client.force_login(self.employer.user)
+        first = self.client.get(reverse('leave_queue'))
+        # user, role and the page itself; the session comes from the cache.
+        with self.assertNumQueries(3):
+            self.client.get(reverse('leave_queue'))
+        with self.assertNumQueries(3):
+            self.client.get(reverse('leave_queue'), {'cursor': first.context['next_cursor']})
+
+
+class LeaveDecisionTests(TaskQueueMixin, TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.employer = make_employee('boss', is_employer=True)
+        self.workers = [make_employee(f'worker{i}') for i in range(5)]
+        today = timezone.localdate()
+        self.requests = [
+            LeaveRequest.objects.create(
+                employee=worker, start_date=today, end_date=today + timedelta(days=4), reason='Rest',
+            )
+            for worker in self.workers
+        ]
+
+    def test_bulk_approve_uses_fixed_number_of_queries(self):
+        ids = [leave.pk for leave in self.requests]
+        with self.runTasks():
+            # The change counter is bumped after commit, outside this count.
+            with self.assertNumQueries(7):
+                updated = LeaveRequest.objects.filter(pk__in=ids).decide('Approved')
+            self.assertTrue(User.objects.filter(employee__in=self.workers, is_active=True).exists())
+        self.assertEqual(updated, 5)
+        self.assertFalse(User.objects.filter(employee__in=self.workers, is_active=True).exists())
+        self.assertEqual(DailyAbsence.objects.count(), 25)
+        self.assertFalse(Task.objects.exists())
+
+    def test_decided_requests_are_not_decided_again(self):
+        self.requests[0].reject()
+        updated = LeaveRequest.objects.all().decide('Approved')
+        self.assertEqual(updated, 4)
+        self.requests[0].refresh_from_db()
+        self.assertEqual(self.requests[0].status, 'Rejected')
+        self.assertTrue(User.objects.get(pk=self.workers[0].user_id).is_active)
+
+    def test_decide_view_rejects_selected_requests(self):
+        self.client.force_login(self.employer.user)
+        response = self.client.post(reverse('leave_decide'), {
+            'decision': 'reject',
+            'ids': [self.requests[0].pk, self.requests[1].pk],
+        })
+        self.assertRedirects(response, reverse('leave_queue'))
+        self.assertEqual(LeaveRequest.objects.filter(status='Rejected').count(), 2)
+        self.assertEqual(
+            list(LeaveStatusEvent.objects.values_list('status', 'actor__username')),
+            [('Rejected', 'boss'), ('Rejected', 'boss')],
+        )
+
+    def test_timeline_prefetches_history_for_the_whole_page(self):
+        self.requests[0].reject(actor=self.employer.user)
+        LeaveRequest.objects.all().decide('Approved')
+        self.client.force_login(self.employer.user)
+        self.client.get(reverse('leave_timeline'))
+        with self.assertNumQueries(4):  # user, role, page, events
+            response = self.client.get(reverse('leave_timeline'))
+        results = response.json()['results']
+        self.assertEqual(len(results), 5)
+        rejected = next(row for row in results if row['id'] == self.requests[0].pk)
+        self.assertEqual([(e['status'], e['by']) for e in rejected['timeline']], [('Pending', None), ('Rejected', 'boss')])
+
+    def test_status_events_are_append_only(self):
+        self.requests[0].approve()
+        event = LeaveStatusEvent.objects.get()
+        event.status = 'Rejected'
+        with self.assertRaises(ValueError):
+            event.save()
+
+    def test_single_approve_writes_only_changed_fields(self):
+        leave = self.requests[0]
+        leave.reason = 'Changed in memory only'
+        leave.approve()
+        leave.refresh_from_db()
+        self.assertEqual(leave.status, 'Approved')
+        self.assertEqual(leave.reason, 'Rest')
+
+
+class LeaveTransitionTests(TaskQueueMixin, TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.starting = make_employee('starting')
+        self.future = make_employee('future')
+        self.returning = make_employee('returning')
+        self.long_gone = make_employee('long_gone')
+        for employee, start, end in [
+            (self.starting, self.today, self.today + timedelta(days=2)),
+            (self.future, self.today + timedelta(days=10), self.today + timedelta(days=12)),
+            (self.returning, self.today - timedelta(days=5), self.today - timedelta(days=1)),
+            (self.long_gone, self.today - timedelta(days=90), self.today - timedelta(days=80)),
+        ]:
+            LeaveRequest.objects.create(employee=employee, start_date=start, end_date=end, reason='x', status='Approved')
+        User.objects.filter(username__in=['returning', 'long_gone']).update(is_active=False)
+
+    def active(self):
+        return set(User.objects.filter(is_active=True).values_list('username', flat=True))
+
+    def test_transitions_are_set_based_and_idempotent(self):
+        out = io.StringIO()
+        call_command('process_leave_transitions', stdout=out)
+        self.assertIn('deactivated 1 user(s), reactivated 1 user(s)', out.getvalue())
+        self.assertEqual(self.active(), {'future', 'returning'})
+
+        with self.assertNumQueries(2):  # one candidate SELECT per direction, no UPDATEs
+            call_command('process_leave_transitions', stdout=out)
+        self.assertEqual(self.active(), {'future', 'returning'})
+
+    def test_approval_only_deactivates_leave_already_under_way(self):
+        pending = LeaveRequest.objects.create(
+            employee=self.future, start_date=self.today + timedelta(days=20), end_date=self.today + timedelta(days=21),
+            reason='y',
+        )
+        with self.runTasks():
+            pending.approve()
+        self.assertIn('future', self.active())
+
+        call_command('process_leave_transitions', '--date', str(self.today + timedelta(days=10)), stdout=io.StringIO())
+        self.assertNotIn('future', self.active())
+
+    def test_deactivation_after_approval_changes_the_employee_etag(self):
+        boss = make_employee('boss', is_employer=True)
+        self.client.force_login(boss.user)
+        url = reverse('api_employee_list')
+        etag = self.client.get(url)['ETag']
+        pending = LeaveRequest.objects.create(
+            employee=self.future, start_date=self.today, end_date=self.today, reason='y',
+        )
+        with self.captureOnCommitCallbacks(execute=True), self.runTasks():
+            pending.approve()
+        self.assertNotIn('future', self.active())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(next(row for row in response.json()['results'] if row['username'] == 'future')['is_active'])
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.employer = make_employee('boss', is_employer=True)
+        self.alice = make_employee('alice', department='Finance')
+        for day in range(1, 4):
+            LeaveRequest.objects.create(
+                employee=self.alice, start_date=date(2025, 5, day * 7), end_date=date(2025, 5, day * 7), reason='x',
+            )
+        self.client.force_login(self.employer.user)
+
+    def test_field_selection_and_cursor_pagination(self):
+        url = reverse('api_leave_list')
+        first = self.client.get(url, {'fields': 'id,status,username', 'limit': 2}).json()
+        self.assertEqual(len(first['results']), 2)
+        self.assertEqual(set(first['results'][0]), {'id', 'status', 'username'})
+        second = self.client.get(url, {'fields': 'id', 'limit': 2, 'cursor': first['next_cursor']}).json()
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next_cursor'])
+
+        employees = self.client.get(reverse('api_employee_list'), {'fields': 'username,department', 'limit': 1}).json()
+        self.assertEqual(employees['results'], [{'username': 'boss', 'department': 'General'}])
+        self.assertEqual(self.client.get(url, {'fields': 'password'}).status_code, 400)
+
+    def test_bad_filters_are_a_400_without_an_etag(self):
+        for name, params in [
+            ('api_leave_list', {'start_date': '2025-02-30'}),
+            ('api_leave_list', {'status': 'bogus'}),
+            ('api_leave_list', {'include_archive': '1'}),
+            ('api_employee_list', {'status': 'Pending'}),
+        ]:
+            with self.subTest(name=name, **params):
+                response = self.client.get(reverse(name), params)
+                self.assertEqual(response.status_code, 400)
+                self.assertNotIn('ETag', response)
+        rows = self.client.get(reverse('api_leave_list'), {'status': 'Approved'}).json()['results']
+        self.assertEqual(rows, [])
+
+    def test_unchanged_poll_is_a_304_without_reading_rows(self):
+        url = reverse('api_leave_list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"leave-'))
+        with self.assertNumQueries(3):  # user, role and the change counter
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(url, {'status': 'Pending'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True) as bumps:
+            LeaveRequest.objects.filter(employee=self.alice).decide('Approved')
+            # Not inside the decision's transaction: the counter row stays unlocked.
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertTrue(bumps)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_logins_do_not_change_the_employee_etag(self):
+        url = reverse('api_employee_list')
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            update_last_login(None, self.alice.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.department = 'Sales'
+            self.alice.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class AdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('root', 'root@example.com', None)
+        self.client.force_login(self.admin)
+
+    def add_leave(self, count):
+        for i in range(count):
+            employee = make_employee(f'staff{LeaveRequest.objects.count()}', department='Finance')
+            UserProfile.objects.create(user=employee.user)
+            LeaveRequest.objects.create(employee=employee, start_date=date(2025, 8, 1), end_date=date(2025, 8, 2), reason='x')
+
+    def changelist_queries(self, url, params):
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.client.get(url, params).status_code, 200)
+        return len(captured)
+
+    def test_changelists_do_not_query_per_row(self):
+        for url, params in (
+            (reverse('admin:employee_leaverequest_changelist'), {'status__exact': 'Pending'}),
+            (reverse('admin:employee_employee_changelist'), {'department': 'Finance'}),
+            (reverse('admin:accounts_userprofile_changelist'), {}),
+        ):
+            self.add_leave(2)
+            few = self.changelist_queries(url, params)
+            self.add_leave(10)
+            self.assertEqual(self.changelist_queries(url, params), few)
+
+    def test_decided_requests_keep_their_dates_and_employee(self):
+        self.add_leave(1)
+        leave = LeaveRequest.objects.get()
+        url = reverse('admin:employee_leaverequest_change', args=[leave.pk])
+        self.assertIn('start_date', self.client.get(url).context['adminform'].form.fields)
+        leave.approve()
+        fields = self.client.get(url).context['adminform'].form.fields
+        self.assertFalse({'employee', 'start_date', 'end_date'} & set(fields))
+
+
+class DirectorySearchTests(TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.employer = make_employee('boss', is_employer=True)
+        self.alice = make_employee('ajohnson', department='Finance')
+        User.objects.filter(pk=self.alice.user_id).update(first_name='Alice', last_name='Johnson')
+        self.alice.user.refresh_from_db()
+        self.alice.user.save()  # a full save resyncs the entry
+        self.bob = make_employee('bsmith', department='Engineering')
+
+    def usernames(self, query):
+        return [employee.user.username for employee in search.search(query)]
+
+    def test_prefix_typo_and_department_matches(self):
+        self.assertEqual(self.usernames('ali'), ['ajohnson'])
+        self.assertEqual(self.usernames('alice johns'), ['ajohnson'])
+        self.assertEqual(self.usernames('jhonson'), ['ajohnson'])
+        self.assertEqual(self.usernames('engin'), ['bsmith'])
+        self.assertEqual(self.usernames('x'), [])
+
+    def test_entries_follow_saves_and_deletes(self):
+        self.bob.department = 'Sales'
+        self.bob.save()
+        self.assertEqual(self.usernames('sales'), ['bsmith'])
+        self.assertEqual(self.usernames('engin'), [])
+        self.bob.user.delete()
+        self.assertEqual(self.usernames('bsmith'), [])
+
+        DirectoryEntry.objects.all().delete()
+        call_command('rebuild_directory', stdout=io.StringIO())
+        self.assertEqual(self.usernames('alice'), ['ajohnson'])
+
+    def test_autocomplete_endpoint(self):
+        self.client.force_login(self.employer.user)
+        response = self.client.get(reverse('directory_search'), {'q': 'fin'})
+        self.assertEqual(response.json()['results'][0]['name'], 'Alice Johnson')
+
+
+class LeaveOverlapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = make_employee('boss', is_employer=True)
+        cls.alice = make_employee('alice', department='Finance')
+        cls.bob = make_employee('bob', department='Finance')
+        cls.carol = make_employee('carol', department='Sales')
+        LeaveRequest.objects.create(employee=cls.alice, start_date=date(2025, 6, 2), end_date=date(2025, 6, 6), reason='Trip')
+        LeaveRequest.objects.create(employee=cls.bob, start_date=date(2025, 6, 5), end_date=date(2025, 6, 9), reason='Trip', status='Rejected')
+        LeaveRequest.objects.create(employee=cls.carol, start_date=date(2025, 6, 3), end_date=date(2025, 6, 4), reason='Trip')
+
+    def setUp(self):
+        caches['dashboard'].clear()
+
+    def test_submit_view_files_pending_leave(self):
+        self.client.force_login(self.carol.user)
+        response = self.client.post(reverse('submit_leave'), {
+            'start_date': '2025-08-04', 'end_date': '2025-08-05', 'reason': 'Family',
+        })
+        self.assertRedirects(response, reverse('dashboard'))
+        self.assertTrue(LeaveRequest.objects.filter(employee=self.carol, status='Pending', reason='Family').exists())
+
+        response = self.client.post(reverse('submit_leave'), {
+            'start_date': '2025-08-05', 'end_date': '2025-08-06', 'reason': 'Again',
+        })
+        self.assertEqual(response.status_code, 200)
+
+    def test_overlap_filed_concurrently_is_a_form_error(self):
+        # Stands in for PostgreSQL's exclusion constraint rejecting a request
+        # that another one, filed at the same moment, overlaps.
+        race = IntegrityError('conflicting key value violates exclusion constraint "leave_no_overlap"')
+        self.client.force_login(self.carol.user)
+        with mock.patch.object(LeaveRequest, 'save', side_effect=race):
+            response = self.client.post(reverse('submit_leave'), {
+                'start_date': '2025-08-04', 'end_date': '2025-08-05', 'reason': 'Family',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].non_field_errors(), [OVERLAP_ERROR])
+        self.assertFalse(LeaveRequest.objects.filter(reason='Family').exists())
+
+    def test_form_rejects_overlapping_leave(self):
+        form = LeaveRequestForm(
+            {'start_date': '2025-06-06', 'end_date': '2025-06-10', 'reason': 'More'}, employee=self.alice,
+        )
+        self.assertFalse(form.is_valid())
+
+    def test_form_ignores_rejected_and_adjacent_leave(self):
+        form = LeaveRequestForm(
+            {'start_date': '2025-06-07', 'end_date': '2025-06-10', 'reason': 'More'}, employee=self.alice,
+        )
+        self.assertTrue(form.is_valid())
+        form = LeaveRequestForm(
+            {'start_date': '2025-06-05', 'end_date': '2025-06-08', 'reason': 'Again'}, employee=self.bob,
+        )
+        self.assertTrue(form.is_valid())
+
+    def test_department_conflicts_in_one_query(self):
+        self.client.force_login(self.employer.user)
+        with self.assertNumQueries(1):
+            conflicts = list(LeaveRequest.objects.department_conflicts('Finance', date(2025, 6, 1), date(2025, 6, 30)))
+        self.assertEqual([leave.employee for leave in conflicts], [self.alice])
+
+        response = self.client.get(reverse('leave_conflicts'), {
+            'department': 'Sales', 'start_date': '2025-06-04', 'end_date': '2025-06-04',
+        })
+        self.assertEqual(len(response.json()['conflicts']), 1)
+
+    def test_conflicts_reject_impossible_dates(self):
+        self.client.force_login(self.employer.user)
+        response = self.client.get(reverse('leave_conflicts'), {
+            'department': 'Sales', 'start_date': '2025-02-30', 'end_date': '2025-03-02',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+
+
+class DailyAbsenceTests(TaskQueueMixin, TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.employer = make_employee('boss', is_employer=True)
+        self.alice = make_employee('alice', department='Finance')
+        self.leave = LeaveRequest.objects.create(
+            employee=self.alice, start_date=date(2025, 6, 2), end_date=date(2025, 6, 4), reason='Trip',
+        )
+
+    def test_pending_leave_is_not_materialised(self):
+        self.assertFalse(DailyAbsence.objects.exists())
+
+    def test_approval_paths_materialise_one_row_per_day(self):
+        with self.runTasks():
+            self.leave.approve()
+        self.assertEqual(DailyAbsence.objects.filter(department='Finance').count(), 3)
+
+        other = LeaveRequest.objects.create(
+            employee=self.alice, start_date=date(2025, 7, 1), end_date=date(2025, 7, 2), reason='Trip',
+        )
+        with self.runTasks():
+            LeaveRequest.objects.filter(pk=other.pk).decide('Approved')
+        self.assertEqual(DailyAbsence.objects.filter(leave_request=other).count(), 2)
+
+    def test_edit_reject_and_department_move_update_rows(self):
+        with self.runTasks():
+            self.leave.approve()
+            self.leave.end_date = date(2025, 6, 2)
+            self.leave.save()
+        self.assertEqual(DailyAbsence.objects.count(), 1)
+
+        self.alice.department = 'Sales'
+        self.alice.save()
+        self.assertEqual(DailyAbsence.objects.get().department, 'Sales')
+
+        with self.runTasks():
+            self.leave.reject()
+        self.assertFalse(DailyAbsence.objects.exists())
+
+    def test_rebuild_command_and_calendar_view(self):
+        self.leave.approve()
+        DailyAbsence.objects.all().delete()
+        call_command('rebuild_absences', stdout=open(os.devnull, 'w'))
+        self.assertEqual(DailyAbsence.objects.count(), 3)
+
+        self.client.force_login(self.employer.user)
+        response = self.client.get(reverse('absence_calendar'), {'month': '2025-06', 'department': 'Finance'})
+        days = dict(response.context['days'])
+        self.assertEqual(len(days), 30)
+        self.assertEqual(len(days[date(2025, 6, 3)]), 1)
+        self.assertEqual(days[date(2025, 6, 5)], [])
+
+    def test_calendar_falls_back_to_this_month_at_the_ends_of_the_calendar(self):
+        self.client.force_login(self.employer.user)
+        this_month = date.today().replace(day=1)
+        for month in ('0001-01', '9999-12', '2025-13'):
+            with self.subTest(month=month):
+                response = self.client.get(reverse('absence_calendar'), {'month': month})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['month'], this_month)
+        response = self.client.get(reverse('absence_calendar'), {'month': '9998-12'})
+        self.assertEqual(response.context['next_month'], date(9999, 1, 1))
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = make_employee('boss', is_employer=True)
+        cls.alice = make_employee('alice', department='Finance')
+        cls.bob = make_employee('bob', department='Sales')
+        LeaveRequest.objects.create(employee=cls.alice, start_date=date(2025, 6, 2), end_date=date(2025, 6, 4), reason='Trip, with comma')
+        LeaveRequest.objects.create(employee=cls.bob, start_date=date(2025, 7, 1), end_date=date(2025, 7, 2), reason='Rest', status='Approved')
+
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.client.force_login(self.employer.user)
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get(reverse('export', args=['leave']), {'department': 'Finance'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['id', 'username'])
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"Trip, with comma"', lines[1])
+
+    def test_ndjson_export_filters_by_status_and_dates(self):
+        response = self.client.get(reverse('export', args=['leave']), {
+            'format': 'ndjson', 'status': 'Approved', 'start_date': '2025-07-02',
+        })
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['username'] for row in rows], ['bob'])
+        self.assertEqual(rows[0]['start_date'], '2025-07-01')
+
+    def test_export_command_writes_employees(self):
+        out = io.StringIO()
+        call_command('export_records', 'employees', '--format', 'csv', '--department', 'Sales', stdout=out)
+        self.assertEqual(out.getvalue().splitlines()[1].split(',')[1], 'bob')
+        with self.assertRaises(CommandError):
+            call_command('export_records', 'employees', '--status', 'Approved', stdout=io.StringIO())
+
+    def test_export_rejects_bad_filters_instead_of_exporting_everything(self):
+        for kind, params in [
+            ('leave', {'start_date': '2025-02-30'}),
+            ('leave', {'end_date': 'June'}),
+            ('leave', {'status': 'bogus'}),
+            ('leave', {'start_date': '2025-07-02', 'end_date': '2025-07-01'}),
+            ('employees', {'status': 'Approved'}),
+            ('employees', {'include_archive': '1'}),
+        ]:
+            with self.subTest(kind=kind, **params):
+                response = self.client.get(reverse('export', args=[kind]), params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+
+class ImportEmployeesTests(TestCase):
+    def setUp(self):
+        make_employee('taken')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.csv_path = os.path.join(self.directory.name, 'staff.csv')
+        with open(self.csv_path, 'w', encoding='utf-8') as handle:
+            handle.write(
+                'username,email,first_name,last_name,department,role,password\n'
+                'ann,ann@example.com,Ann,One,Finance,employee,Str0ng-passphrase!\n'
+                'ben,ben@example.com,Ben,Two,Sales,employer,\n'
+                'taken,taken@example.com,Tom,Three,Sales,,\n'
+            )
+
+    def run_import(self, *args):
+        call_command('import_employees', self.csv_path, '--workers', '1', *args,
+                     stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_import_creates_users_employees_and_profiles(self):
+        self.run_import('--chunk-size', '2')
+        ann = Employee.objects.select_related('user__profile').get(user__username='ann')
+        self.assertEqual(ann.department, 'Finance')
+        self.assertTrue(ann.user.check_password('Str0ng-passphrase!'))
+        ben = Employee.objects.select_related('user__profile').get(user__username='ben')
+        self.assertTrue(ben.is_employer)
+        self.assertEqual(ben.user.profile.role, 'employer')
+        self.assertFalse(ben.user.has_usable_password())
+        self.assertEqual(User.objects.filter(username='taken').count(), 1)
+        self.assertFalse(os.path.exists(self.csv_path + '.progress'))
+
+    def test_resume_skips_committed_rows(self):
+        with open(self.csv_path + '.progress', 'w') as checkpoint:
+            checkpoint.write('{"rows_done": 1}')
+        self.run_import('--resume')
+        self.assertFalse(User.objects.filter(username='ann').exists())
+        self.assertTrue(User.objects.filter(username='ben').exists())
+
+    def test_short_rows_and_impossible_dates_are_reported(self):
+        with open(self.csv_path, 'w', encoding='utf-8') as handle:
+            handle.write(
+                'username,email,first_name,last_name,date_of_hire\n'
+                'dan\n'
+                'eve,eve@example.com,Eve,Four,2025-02-30\n'
+                'fay,fay@example.com,Fay,Five,2025-02-28\n'
+            )
+        stderr = io.StringIO()
+        call_command('import_employees', self.csv_path, '--workers', '1', stdout=io.StringIO(), stderr=stderr)
+        self.assertEqual(stderr.getvalue().splitlines(), [
+            'Row 1 (dan): email is required.',
+            'Row 2 (eve): date_of_hire must be a valid YYYY-MM-DD date.',
+        ])
+        self.assertEqual(list(User.objects.filter(username__in=['dan', 'eve', 'fay']).values_list('username', flat=True)), ['fay'])
+
+
+class GenerateDatasetTests(TestCase):
+    def test_generates_requested_volume_reproducibly(self):
+        call_command('generate_dataset', '--employees', '30', '--requests-per-employee', '4',
+                     '--chunk-size', '16', stdout=io.StringIO())
+        self.assertEqual(Employee.objects.count(), 30)
+        self.assertEqual(LeaveRequest.objects.count(), 120)
+        first = list(LeaveRequest.objects.order_by('id').values_list('start_date', 'end_date', 'status')[:10])
+        approved_days = sum(
+            (leave.end_date - leave.start_date).days + 1 for leave in LeaveRequest.objects.filter(status='Approved')
+        )
+        self.assertEqual(DailyAbsence.objects.count(), approved_days)
+
+        call_command('generate_dataset', '--employees', '30', '--requests-per-employee', '4',
+                     '--chunk-size', '16', '--clear', stdout=io.StringIO())
+        again = list(LeaveRequest.objects.order_by('id').values_list('start_date', 'end_date', 'status')[:10])
+        self.assertEqual(first, again)
+
+    def test_clear_deletes_in_bulk_without_per_row_signals(self):
+        call_command('generate_dataset', '--employees', '5', '--requests-per-employee', '3', stdout=io.StringIO())
+        kept = make_employee('kept')
+        decided = LeaveRequest.objects.create(employee=kept, start_date=date(2025, 5, 5), end_date=date(2025, 5, 5), reason='x')
+        LeaveRequest.objects.filter(pk=decided.pk).decide('Approved', actor=User.objects.get(username='gen-0000000'))
+        sent = []
+
+        def receiver(sender, **kwargs):
+            sent.append(sender)
+
+        post_delete.connect(receiver)
+        self.addCleanup(post_delete.disconnect, receiver)
+
+        call_command('generate_dataset', '--clear', '--employees', '1', '--requests-per-employee', '0',
+                     '--no-rebuild', '--prefix', 'gen', stdout=io.StringIO())
+        self.assertEqual(sent, [])
+        self.assertEqual(sorted(Employee.objects.values_list('user__username', flat=True)), ['gen-0000000', 'kept'])
+        self.assertEqual(LeaveRequest.objects.get().pk, decided.pk)
+        self.assertIsNone(decided.events.get().actor_id)
+
+
+class AsyncViewTests(AsyncViewsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer = make_employee('boss', is_employer=True)
+        cls.alice = make_employee('alice', department='Finance')
+        for day in range(1, 4):
+            LeaveRequest.objects.create(
+                employee=cls.alice, start_date=date(2025, 5, day * 3), end_date=date(2025, 5, day * 3), reason=f'Day {day}',
+            )
+
+    def setUp(self):
+        caches['dashboard'].clear()
+
+    async def test_async_routes_are_served(self):
+        from accounts.views import adashboard_view
+        from employee.views import aleave_queue_view, amy_leave_view
+        self.assertIs(resolve(reverse('dashboard')).func, adashboard_view)
+        self.assertIs(resolve(reverse('leave_queue')).func, aleave_queue_view)
+        self.assertIs(resolve(reverse('my_leave')).func, amy_leave_view)
+
+    async def test_async_dashboard_and_leave_list(self):
+        await self.async_client.aforce_login(self.alice.user)
+        response = await self.async_client.get(reverse('dashboard'))
+        self.assertContains(response, 'Finance')
+        self.assertContains(response, 'Day 3')
+
+        response = await self.async_client.get(reverse('my_leave'))
+        self.assertEqual(len(response.context['leave_requests']), 3)
+
+    async def test_async_queue_enforces_employer_role(self):
+        await self.async_client.aforce_login(self.alice.user)
+        response = await self.async_client.get(reverse('leave_queue'))
+        self.assertEqual(response.status_code, 403)
+
+        await self.async_client.aforce_login(self.employer.user)
+        response = await self.async_client.get(reverse('leave_queue'))
+        self.assertEqual([leave.reason for leave in response.context['leave_requests']], ['Day 3', 'Day 2', 'Day 1'])
+
+    def test_asgi_middleware_stays_on_the_event_loop(self):
+        # Django logs every sync middleware it has to wrap in a thread hop.
+        with self.settings(DEBUG=True), self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+    async def test_static_files_are_served_under_asgi(self):
+        with self.settings(WHITENOISE_USE_FINDERS=True):
+            response = await self.async_client.get('/static/admin/css/base.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'body', b''.join([chunk async for chunk in response]))
+
+
+class LeaveAnalyticsTests(TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.employer = make_employee('boss', is_employer=True)
+        self.ann = make_employee('ann', department='Finance')
+        self.ben = make_employee('ben', department='Sales')
+        # Mon 2025-03-03 .. Mon 2025-03-10 is six business days.
+        self.long = LeaveRequest.objects.create(
+            employee=self.ann, start_date=date(2025, 3, 3), end_date=date(2025, 3, 10), reason='Trip',
+            created_at=timezone.now() - timedelta(hours=10),
+        )
+        LeaveRequest.objects.create(employee=self.ben, start_date=date(2025, 3, 8), end_date=date(2025, 3, 9), reason='Weekend')
+        LeaveRequest.objects.create(employee=self.ben, start_date=date(2025, 4, 1), end_date=date(2025, 4, 1), reason='Dentist')
+        # Filed well before the refresh overlap window.
+        LeaveRequest.objects.exclude(pk=self.long.pk).update(created_at=timezone.now() - timedelta(hours=12))
+
+    def get_series(self, name, **params):
+        self.client.force_login(self.employer.user)
+        response = self.client.get(reverse('analytics', args=[name]), {'from': '2025-01', 'to': '2025-12', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['points']
+
+    def test_business_days_are_vectorised_over_ranges(self):
+        self.assertEqual(
+            list(analytics.business_days([date(2025, 3, 3), date(2025, 3, 8)], [date(2025, 3, 10), date(2025, 3, 9)])),
+            [6, 0],
+        )
+
+    def test_rollups_feed_trend_rate_and_latency(self):
+        self.assertEqual(analytics.refresh_rollups(), 2)
+        self.long.approve()
+        self.assertEqual(analytics.refresh_rollups(), 1)  # only March is rebuilt
+
+        trend = self.get_series('trend')
+        self.assertIn({'month': '2025-03', 'status': 'Approved', 'requests': 1, 'business_days': 6}, trend)
+        self.assertIn({'month': '2025-03', 'status': 'Pending', 'requests': 1, 'business_days': 0}, trend)
+
+        march = self.get_series('approval-rate', department='Finance')[0]
+        self.assertEqual((march['approved'], march['rejected'], march['rate']), (1, 0, 1.0))
+        latency = self.get_series('approval-latency', by='department')
+        self.assertAlmostEqual(latency[0]['mean_hours'], 10, delta=0.1)
+        self.assertEqual(latency[0]['department'], 'Finance')
+
+    def test_rollup_days_split_by_month_and_match_the_balances(self):
+        # Thu 29 May .. Tue 3 June 2025; Madaraka Day falls on Sunday 1 June
+        # and is observed on Monday 2 June.
+        leave = LeaveRequest.objects.create(
+            employee=self.ann, start_date=date(2025, 5, 29), end_date=date(2025, 6, 3), reason='Trip',
+        )
+        leave.approve()
+        self.assertEqual(analytics.refresh_rollups(), 4)  # March, April, May and June
+        rows = {
+            row.month: (row.requests, row.business_days)
+            for row in LeaveRollup.objects.filter(employee=self.ann, status='Approved')
+        }
+        self.assertEqual(rows[date(2025, 5, 1)], (1, 2))
+        self.assertEqual(rows[date(2025, 6, 1)], (0, 1))
+        self.assertEqual(sum(days for _, days in rows.values()), balances.current(self.ann.user, 2025).taken)
+
+    def test_untouched_months_are_not_rebuilt(self):
+        analytics.refresh_rollups()
+        mark = RollupWatermark.objects.get()
+        RollupWatermark.objects.update(created_at=mark.created_at + timedelta(hours=1))
+        with self.assertNumQueries(6):  # savepoint, watermark, aggregate, months, save, release
+            self.assertEqual(analytics.refresh_rollups(), 0)
+        self.assertEqual(LeaveRollup.objects.count(), 3)
+
+    def test_unknown_series_is_404(self):
+        self.client.force_login(self.employer.user)
+        self.assertEqual(self.client.get(reverse('analytics', args=['nope'])).status_code, 404)
+
+
+class LeaveArchiveTests(TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.employer = make_employee('boss', is_employer=True)
+        self.ann = make_employee('ann', department='Finance')
+        filed = timezone.now() - timedelta(days=1000)
+        self.old = [
+            LeaveRequest.objects.create(employee=self.ann, start_date=date(2023, 3, day), end_date=date(2023, 3, day),
+                                        reason='Old', created_at=filed)
+            for day in (6, 7)
+        ]
+        self.old[0].approve(actor=self.employer.user)
+        self.old[1].reject(actor=self.employer.user)
+        self.pending = LeaveRequest.objects.create(employee=self.ann, start_date=date(2023, 3, 8),
+                                                   end_date=date(2023, 3, 8), reason='Forgotten', created_at=filed)
+        self.recent = LeaveRequest.objects.create(employee=self.ann, start_date=timezone.localdate(),
+                                                  end_date=timezone.localdate(), reason='Now', status='Approved')
+
+    def archive(self, *args):
+        call_command('archive_leave', *args, stdout=io.StringIO())
+
+    def test_archives_old_decided_requests_in_resumable_batches(self):
+        self.archive('--batch-size', '1', '--max-batches', '1')
+        self.assertEqual(ArchivedLeaveRequest.objects.count(), 1)
+        self.archive('--batch-size', '1')
+        self.assertEqual(set(ArchivedLeaveRequest.objects.values_list('pk', flat=True)), {leave.pk for leave in self.old})
+        self.assertEqual(set(LeaveRequest.objects.values_list('pk', flat=True)), {self.pending.pk, self.recent.pk})
+        self.assertFalse(LeaveStatusEvent.objects.exists())
+        archived = ArchivedLeaveRequest.objects.get(pk=self.old[0].pk)
+        self.assertEqual((archived.status, archived.reason), ('Approved', 'Old'))
+        self.assertEqual([(status, actor and actor.username) for status, _, actor in archived.timeline()],
+                         [('Pending', None), ('Approved', 'boss')])
+
+    def test_timeline_and_export_read_the_archive_only_when_asked(self):
+        self.archive()
+        self.client.force_login(self.employer.user)
+        hot = self.client.get(reverse('leave_timeline')).json()['results']
+        self.assertEqual({row['id'] for row in hot}, {self.pending.pk, self.recent.pk})
+        with self.assertNumQueries(5):  # user, role, page, events, archive page
+            both = self.client.get(reverse('leave_timeline'), {'include_archive': '1'}).json()['results']
+        self.assertEqual([row['id'] for row in both], [self.recent.pk, self.pending.pk, self.old[1].pk, self.old[0].pk])
+        self.assertEqual([e['by'] for e in both[-1]['timeline']], [None, 'boss'])
+        self.assertTrue(both[-1]['archived'])
+
+        response = self.client.get(reverse('export', args=['leave']), {'format': 'ndjson', 'include_archive': '1'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], sorted(leave.pk for leave in [*self.old, self.pending, self.recent]))
+
+    def test_rollups_still_count_archived_requests(self):
+        self.archive()
+        analytics.refresh_rollups(full=True)
+        march = LeaveRollup.objects.filter(month=date(2023, 3, 1))
+        self.assertEqual(dict(march.values_list('status', 'requests')), {'Approved': 1, 'Rejected': 1, 'Pending': 1})
+
+
+class LeaveBalanceTests(TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.ann = make_employee('ann', department='Finance')
+        self.ben = make_employee('ben', department='Sales')
+        # Two weeks around Easter 2025: ten weekdays less Good Friday and Easter Monday.
+        self.easter = LeaveRequest.objects.create(employee=self.ann, start_date=date(2025, 4, 14),
+                                                  end_date=date(2025, 4, 25), reason='Easter')
+        # Mon 29 Dec 2025 .. Fri 2 Jan 2026: three days in 2025, one in 2026 (New Year's Day).
+        self.new_year = LeaveRequest.objects.create(employee=self.ann, start_date=date(2025, 12, 29),
+                                                    end_date=date(2026, 1, 2), reason='New Year')
+
+    def balance(self, employee, year):
+        return LeaveBalance.objects.get(employee=employee, year=year)
+
+    def test_kenyan_calendar_moves_sunday_holidays_to_monday(self):
+        self.assertEqual(balances.days_by_year(date(2025, 4, 14), date(2025, 4, 25)), {2025: 8})
+        self.assertIn(date(2023, 1, 2), holidays.holidays(2023))  # New Year's Day 2023 was a Sunday
+        with self.settings(LEAVE_HOLIDAY_CALENDAR='none'):
+            self.assertEqual(balances.days_by_year(date(2025, 4, 14), date(2025, 4, 25)), {2025: 10})
+
+    def test_approvals_update_the_ledger_per_year(self):
+        self.easter.approve()
+        LeaveRequest.objects.filter(pk=self.new_year.pk).decide('Approved')
+        self.assertEqual(self.balance(self.ann, 2025).taken, 11)
+        self.assertEqual(self.balance(self.ann, 2026).taken, 1)
+        self.assertEqual(self.balance(self.ann, 2025).remaining, 10)
+
+        self.easter.reject()
+        self.assertEqual(self.balance(self.ann, 2025).taken, 3)
+        self.new_year.refresh_from_db()
+        self.new_year.delete()
+        self.assertEqual((self.balance(self.ann, 2025).taken, self.balance(self.ann, 2026).taken), (0, 0))
+
+    def test_recompute_matches_the_ledger_for_a_department_or_year(self):
+        LeaveRequest.objects.all().decide('Approved')
+        expected = dict(LeaveBalance.objects.values_list('year', 'taken'))
+        LeaveBalance.objects.update(taken=0)
+        call_command('recompute_leave_balances', '--department', 'Finance', stdout=io.StringIO())
+        self.assertEqual(dict(LeaveBalance.objects.filter(employee=self.ann).values_list('year', 'taken')), expected)
+        self.assertEqual(balances.recompute(year=2025), 2)
+        self.assertEqual(self.balance(self.ben, 2025).taken, 0)
+
+    def test_form_rejects_requests_beyond_the_balance(self):
+        self.easter.approve()
+        LeaveBalance.objects.filter(employee=self.ann, year=2025).update(entitlement=14)
+        # 6 days left in 2025, of which the pending New Year request holds 3.
+        form = LeaveRequestForm({'start_date': '2025-06-09', 'end_date': '2025-06-12', 'reason': 'Trip'}, employee=self.ann)
+        self.assertFalse(form.is_valid())
+        self.assertIn('only 3 remain', form.non_field_errors()[0])
+        form = LeaveRequestForm({'start_date': '2025-06-09', 'end_date': '2025-06-11', 'reason': 'Trip'}, employee=self.ann)
+        self.assertTrue(form.is_valid())
+
+    def test_dashboard_follows_entitlement_edits_and_recomputes(self):
+        year = timezone.localdate().year
+        self.client.force_login(self.ann.user)
+        self.assertContains(self.client.get(reverse('dashboard')), '<strong>21</strong> of 21')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaveBalance.objects.update_or_create(employee=self.ann, year=year, defaults={'entitlement': 30})
+        self.assertContains(self.client.get(reverse('dashboard')), '<strong>30</strong> of 30')
 
+        LeaveBalance.objects.filter(employee=self.ann, year=year).update(taken=5)
+        caches['dashboard'].clear()
+        self.assertContains(self.client.get(reverse('dashboard')), '<strong>25</strong> of 30')
+        with self.captureOnCommitCallbacks(execute=True):
+            balances.recompute(year=year)
+        self.assertEqual(balances.current(self.ann.user).taken, 0)
+        self.assertContains(self.client.get(reverse('dashboard')), '<strong>30</strong> of 30')
 
@@ -0,0 +1,48 @@
+# Keeps User.is_active in step with approved leave: accounts are switched off
+# while their owner is on leave and back on once it ends. Both directions
+# only select users whose flag is actually wrong, so running the job again
+# (or twice a day) changes nothing.
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+
+from core.models import ChangeCounter
+
+from .models import LeaveRequest
+
+
+def on_leave_user_ids(day):
+    return LeaveRequest.objects.covering(day).values('employee__user_id')
+
+
+def _update_in_batches(users, is_active, batch_size):
+    updated = 0
+    ids = list(users.values_list('pk', flat=True).distinct().order_by('pk'))
+    for start in range(0, len(ids), batch_size):
+        # Re-check the flag so a concurrent change is not overwritten.
+        updated += User.objects.filter(
+            pk__in=ids[start:start + batch_size], is_active=not is_active,
+        ).update(is_active=is_active)
+    if updated:
+        ChangeCounter.bump('employee')
+    return updated
+
+
+def deactivate_on_leave(day, batch_size=1000):
+    """Deactivate active users whose approved leave covers ``day``."""
+    users = User.objects.filter(is_active=True, pk__in=on_leave_user_ids(day))
+    return _update_in_batches(users, False, batch_size)
+
+
+def reactivate_returning(day, lookback_days=7, batch_size=1000):
+    """
+    Reactivate users whose approved leave ended in the ``lookback_days``
+    before ``day`` and who are not on another leave. The window lets a missed
+    run catch up without reviving accounts disabled for other reasons long
+    after their last leave.
+    """
+    ended = LeaveRequest.objects.filter(
+        status='Approved', end_date__gte=day - timedelta(days=lookback_days), end_date__lt=day,
+    ).values('employee__user_id')
+    users = User.objects.filter(is_active=False, pk__in=ended).exclude(pk__in=on_leave_user_ids(day))
+    return _update_in_batches(users, True, batch_size)
@@ -1,2 +1,16 @@
+from django.conf import settings
+from django.urls import path
+from . import views
+
 urlpatterns = [
+    path('leave/', views.amy_leave_view if settings.ASYNC_VIEWS else views.my_leave_view, name='my_leave'),
+    path('leave/new/', views.submit_leave_view, name='submit_leave'),
+    path('queue/', views.aleave_queue_view if settings.ASYNC_VIEWS else views.leave_queue_view, name='leave_queue'),
+    path('queue/decide/', views.leave_decide_view, name='leave_decide'),
+    path('timeline/', views.leave_timeline_view, name='leave_timeline'),
+    path('directory/search/', views.directory_search_view, name='directory_search'),
+    path('conflicts/', views.leave_conflicts_view, name='leave_conflicts'),
+    path('calendar/', views.absence_calendar_view, name='absence_calendar'),
+    path('export/<str:kind>/', views.export_view, name='export'),
+    path('analytics/<str:series>/', views.analytics_view, name='analytics'),
 ]
@@ -0,0 +1,332 @@
+import calendar
+from datetime import MAXYEAR, MINYEAR, date, timedelta
+from itertools import groupby
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError, transaction
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_POST
+
+from accounts.decorators import employer_required
+from core.metrics import query_budget
+from core.shortcuts import arender
+from . import analytics, exports, search
+from .forms import OVERLAP_ERROR, LeaveRequestForm
+from .models import ArchivedLeaveRequest, DailyAbsence, Employee, LeaveRequest, LeaveStatusEvent
+from .pagination import akeyset_page, keyset_page, merged_keyset_page
+
+STATUS_VALUES = {value for value, _ in LeaveRequest._meta.get_field('status').choices}
+
+
+def _include_archive(request):
+    return request.GET.get('include_archive') == '1'
+
+
+def _queue_status(request):
+    status = request.GET.get('status', 'Pending')
+    return status if status in STATUS_VALUES else 'Pending'
+
+
+def _queue_queryset(status):
+    return LeaveRequest.objects.filter(status=status).select_related('employee__user')
+
+
+@query_budget(4)
+@employer_required
+def leave_queue_view(request):
+    # LM1: employers see every leave request, pending first by default.
+    # Pages are keyed on (created_at, id) so deep pages cost the same as page 1.
+    status = _queue_status(request)
+    leave_requests, next_cursor = keyset_page(_queue_queryset(status), request.GET.get('cursor'))
+
+    return render(request, 'employee/leave_queue.html', {
+        'leave_requests': leave_requests,
+        'next_cursor': next_cursor,
+        'status': status,
+        'status_choices': sorted(STATUS_VALUES),
+    })
+
+
+@query_budget(4)
+@employer_required
+async def aleave_queue_view(request):
+    # Async twin of leave_queue_view for ASGI deployments (settings.ASYNC_VIEWS).
+    status = _queue_status(request)
+    leave_requests, next_cursor = await akeyset_page(_queue_queryset(status), request.GET.get('cursor'))
+
+    return await arender(request, 'employee/leave_queue.html', {
+        'leave_requests': leave_requests,
+        'next_cursor': next_cursor,
+        'status': status,
+        'status_choices': sorted(STATUS_VALUES),
+    })
+
+
+@query_budget(4)
+@login_required
+def my_leave_view(request):
+    # ESS3: an employee's own leave requests, newest first.
+    queryset = LeaveRequest.objects.filter(employee_id=request.ees_role.employee_id)
+    leave_requests, next_cursor = keyset_page(queryset, request.GET.get('cursor'))
+    return render(request, 'employee/my_leave.html', {
+        'leave_requests': leave_requests,
+        'next_cursor': next_cursor,
+    })
+
+
+@query_budget(4)
+@login_required
+async def amy_leave_view(request):
+    # Async twin of my_leave_view for ASGI deployments (settings.ASYNC_VIEWS).
+    role = await request.aees_role()
+    queryset = LeaveRequest.objects.filter(employee_id=role.employee_id)
+    leave_requests, next_cursor = await akeyset_page(queryset, request.GET.get('cursor'))
+    return await arender(request, 'employee/my_leave.html', {
+        'leave_requests': leave_requests,
+        'next_cursor': next_cursor,
+    })
+
+
+@login_required
+def submit_leave_view(request):
+    # ESS2: employees file leave requests, which start out Pending.
+    employee_id = request.ees_role.employee_id
+    if employee_id is None:
+        raise PermissionDenied
+
+    if request.method == 'POST':
+        form = LeaveRequestForm(request.POST, employee=Employee(pk=employee_id, user_id=request.user.pk))
+        if form.is_valid():
+            try:
+                with transaction.atomic():
+                    form.save()
+            except IntegrityError as exc:
+                # On PostgreSQL an overlapping request filed after clean()
+                # checked is caught by the leave_no_overlap constraint.
+                if 'leave_no_overlap' not in str(exc):
+                    raise
+                form.add_error(None, OVERLAP_ERROR)
+            else:
+                messages.success(request, 'Your leave request has been submitted.')
+                return redirect('dashboard')
+    else:
+        form = LeaveRequestForm()
+
+    return render(request, 'employee/leave_form.html', {'form': form})
+
+
+DECISIONS = {'approve': 'Approved', 'reject': 'Rejected'}
+
+
+@employer_required
+@require_POST
+def leave_decide_view(request):
+    # LM2: approve or reject a batch of pending requests in one transaction.
+    status = DECISIONS.get(request.POST.get('decision'))
+    ids = [pk for pk in request.POST.getlist('ids') if pk.isdigit()]
+    if status is None or not ids:
+        messages.error(request, 'Select at least one request and a decision.')
+        return redirect('leave_queue')
+
+    updated = LeaveRequest.objects.filter(pk__in=ids).decide(status, actor=request.user)
+    messages.success(request, f'{updated} leave request(s) {status.lower()}.')
+    return redirect('leave_queue')
+
+
+@query_budget(5)
+@login_required
+def leave_timeline_view(request):
+    # LM3: status history for a page of requests, newest first. Employers see
+    # everyone's (optionally one status), employees their own. The history of
+    # the whole page is fetched by a single prefetch query; archived requests
+    # (include_archive=1) carry theirs with them and cost one more query.
+    role = request.ees_role
+    querysets = [LeaveRequest.objects.prefetch_related(LeaveStatusEvent.prefetch())]
+    if _include_archive(request):
+        querysets.append(ArchivedLeaveRequest.objects.all())
+    if role.is_employer:
+        status = request.GET.get('status')
+        if status in STATUS_VALUES:
+            querysets = [queryset.filter(status=status) for queryset in querysets]
+    elif role.employee_id is not None:
+        querysets = [queryset.filter(employee_id=role.employee_id) for queryset in querysets]
+    else:
+        raise PermissionDenied
+
+    leave_requests, next_cursor = merged_keyset_page(
+        [queryset.select_related('employee__user') for queryset in querysets], request.GET.get('cursor'),
+    )
+    return JsonResponse({
+        'results': [
+            {
+                'id': leave.pk,
+                'employee': leave.employee.user.get_full_name() or leave.employee.user.username,
+                'start_date': leave.start_date.isoformat(),
+                'end_date': leave.end_date.isoformat(),
+                'status': leave.status,
+                'archived': isinstance(leave, ArchivedLeaveRequest),
+                'timeline': [
+                    {'status': status, 'at': at.isoformat(), 'by': actor.username if actor else None}
+                    for status, at, actor in leave.timeline()
+                ],
+            }
+            for leave in leave_requests
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
+@query_budget(4)
+@employer_required
+def directory_search_view(request):
+    # Autocomplete for the employee directory: by name, username,
+    # department or position, tolerant of prefixes and small typos.
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        limit = 10
+    employees = search.search(request.GET.get('q', ''), limit)
+    return JsonResponse({
+        'results': [
+            {
+                'id': employee.pk,
+                'username': employee.user.username,
+                'name': employee.user.get_full_name(),
+                'department': employee.department,
+                'position': employee.position,
+            }
+            for employee in employees
+        ],
+    })
+
+
+@query_budget(4)
+@employer_required
+def leave_conflicts_view(request):
+    # Who in a department is already off during a proposed date range.
+    department = request.GET.get('department')
+    try:
+        start_date = parse_date(request.GET.get('start_date', ''))
+        end_date = parse_date(request.GET.get('end_date', ''))
+    except ValueError:
+        # Well formed but impossible, such as 2025-02-30.
+        start_date = end_date = None
+    if not department or start_date is None or end_date is None or start_date > end_date:
+        return JsonResponse(
+            {'error': 'department, start_date and end_date (YYYY-MM-DD) are required.'},
+            status=400,
+        )
+
+    conflicts = LeaveRequest.objects.department_conflicts(department, start_date, end_date)
+    return JsonResponse({
+        'department': department,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'conflicts': [
+            {
+                'id': leave.pk,
+                'employee': leave.employee.user.get_full_name() or leave.employee.user.username,
+                'start_date': leave.start_date.isoformat(),
+                'end_date': leave.end_date.isoformat(),
+                'status': leave.status,
+            }
+            for leave in conflicts
+        ],
+    })
+
+
+def _parse_month(value):
+    # The first and last representable years are refused: the calendar's
+    # previous/next links would step outside what date can hold.
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        if not MINYEAR < year < MAXYEAR:
+            raise ValueError(value)
+        return date(year, month, 1)
+    except (AttributeError, ValueError):
+        today = date.today()
+        return date(today.year, today.month, 1)
+
+
+@query_budget(4)
+@employer_required
+def absence_calendar_view(request):
+    # Who is out on each day of a month, optionally for one department.
+    # Reads the materialised DailyAbsence rows in a single range query.
+    first_day = _parse_month(request.GET.get('month'))
+    last_day = first_day.replace(day=calendar.monthrange(first_day.year, first_day.month)[1])
+    department = request.GET.get('department', '')
+
+    absences = DailyAbsence.objects.filter(date__range=(first_day, last_day))
+    if department:
+        absences = absences.filter(department=department)
+    absences = absences.select_related('employee__user').order_by('date', 'department', 'employee_id')
+
+    by_day = {day: list(rows) for day, rows in groupby(absences, key=lambda absence: absence.date)}
+    days = [
+        (first_day + timedelta(days=offset), by_day.get(first_day + timedelta(days=offset), []))
+        for offset in range(last_day.day)
+    ]
+
+    return render(request, 'employee/absence_calendar.html', {
+        'days': days,
+        'month': first_day,
+        'previous_month': (first_day - timedelta(days=1)).replace(day=1),
+        'next_month': last_day + timedelta(days=1),
+        'department': department,
+    })
+
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+@employer_required
+def export_view(request, kind):
+    # Payroll export, streamed row by row so memory stays flat.
+    if kind not in exports.EXPORTS:
+        raise Http404
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        return JsonResponse({'error': f"format must be one of {', '.join(exports.FORMATS)}."}, status=400)
+
+    try:
+        filters = exports.parse_filters(kind, request.GET)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    response = StreamingHttpResponse(
+        exports.stream(kind, fmt, **filters),
+        content_type=EXPORT_CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+
+@query_budget(4)
+@employer_required
+def analytics_view(request, series):
+    # Leave trends, approval rate and approval latency per month, read from
+    # the LeaveRollup summary (see employee.analytics).
+    if series not in analytics.SERIES:
+        raise Http404
+    first_month, last_month = analytics.default_range()
+    if request.GET.get('from'):
+        first_month = _parse_month(request.GET['from'])
+    if request.GET.get('to'):
+        last_month = _parse_month(request.GET['to'])
+    department = request.GET.get('department') or None
+    by_department = request.GET.get('by') == 'department'
+
+    return JsonResponse({
+        'series': series,
+        'from': first_month.strftime('%Y-%m'),
+        'to': last_month.strftime('%Y-%m'),
+        'department': department,
+        'points': analytics.series(series, first_month, last_month, department, by_department),
+    })